@@ -1,12 +1,12 @@
 import ctypes
 import inspect
 import logging
-import time
 from argparse import Namespace
 from consolemenu import SelectionMenu
 from logging import Logger, StreamHandler
 
 from automation import utility
+from automation.clock import Clock, VirtualClock
 from automation.afkj_automation import AFKJAutomation
 from metadata.afkj_metadata import AFKJMetadata
 
@@ -17,18 +17,28 @@ def main() -> None:
     logger: Logger = utility.init_logging()
     config, settings = utility.read_config(args.config)
 
+    # Time can only be compressed when replaying, a real emulator runs at its own pace
+    clock = VirtualClock(args.speed) if args.replay and args.speed != 1 else Clock()
     afkj = AFKJMetadata(server=args.server)
-    bot = AFKJAutomation(config=config, logger=logger, metadata=afkj)
+    bot = AFKJAutomation(config=config, logger=logger, metadata=afkj, clock=clock)
 
     # Boot up text
     logger.info("Loaded settings file: " + str(settings.split("\\")[-1]))
     logger.info("Version: " + afkj.version)
 
     # Nice name for the window and debugging peoples screenshots
-    ctypes.windll.kernel32.SetConsoleTitleW("AutoAFK2 v" + afkj.version)
+    if hasattr(ctypes, "windll"):  # Windows only, replays can run anywhere
+        ctypes.windll.kernel32.SetConsoleTitleW("AutoAFK2 v" + afkj.version)
 
     # Boot up activities before tasks are ran
-    bot.connect()
+    if args.profile:
+        bot.start_profiling(args.profile)
+    if args.replay:
+        bot.connect_replay(args.replay)
+    else:
+        bot.connect()
+    if args.record:
+        bot.start_recording(args.record)
     bot.resolution_check()
     if not args.proxy:
         bot.wait_until_game_active()
@@ -85,7 +95,7 @@ def main() -> None:
 
     if args.teamup:
         logger.info("Starting up team-up farming")
-        start_time = time.time()
+        start_time = bot.clock.time()
         limit_minutes = config.getint("ACTIVITIES", "teamup_limit")
 
         if limit_minutes == 0:
@@ -96,8 +106,10 @@ def main() -> None:
             logger.info(f"Time remaining: {limit_minutes} minutes")
             logger.info("Time limit can be configured in settings.ini\n")
 
-        while time.time() - start_time < limit:
-            bot.team_up()
+        # One restart into the fast stream for the whole session rather than two per join
+        with bot.frame_rate("fast"):
+            while bot.clock.time() - start_time < limit:
+                bot.team_up()
 
     if args.abyss:
         logger.info("Opening Trials of Abyss")
@@ -254,7 +266,7 @@ def main() -> None:
 
     if selection == 8:
         logger.info("Starting up team-up farming")
-        start_time = time.time()
+        start_time = bot.clock.time()
         limit_minutes = config.getint("ACTIVITIES", "teamup_limit")
 
         if limit_minutes == 0:
@@ -265,8 +277,10 @@ def main() -> None:
             logger.info(f"Time remaining: {limit_minutes} minutes")
             logger.info("Time limit can be configured in settings.ini\n")
 
-        while time.time() - start_time < limit:
-            bot.team_up()
+        # One restart into the fast stream for the whole session rather than two per join
+        with bot.frame_rate("fast"):
+            while bot.clock.time() - start_time < limit:
+                bot.team_up()
 
     if selection == 9:
         logger.info("Starting up Chain Proxy farming")
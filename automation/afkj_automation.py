@@ -2,29 +2,54 @@
 
 import inspect
 import math
-import time
 from configparser import ConfigParser
 from datetime import datetime
 from humanfriendly import format_timespan
 from logging import Logger
-from typing import Any
+from typing import (
+    Any,
+    Union,  # TODO: Update Python. Union required for Python <3.10
+)
 
+from automation.clock import Clock
+from automation.push_counter import PushCounter
 from interaction.emulator_interaction import EmulatorInteractions
+from interaction.navigation import NavigationGraph
+from interaction.scene_classifier import SceneClassifier
 
 
 class AFKJAutomation(EmulatorInteractions):
     """AFKJ Automation Class."""
 
-    def __init__(self, config: ConfigParser, logger: Logger, metadata) -> None:
+    def __init__(
+        self,
+        config: ConfigParser,
+        logger: Logger,
+        metadata,
+        clock: Union[Clock, None] = None,
+    ) -> None:
         """Initialize AFKJ automation functions.
 
         Args:
             config (ConfigParser): Configurations from settings.ini.
             logger (Logger): Logger.
             metadata (_type_): AFKJ metadata.
+            clock (Clock | None, optional): Clock for every wait and timestamp, real time if None. Defaults to None.
         """
-        super().__init__(config=config, logger=logger)
+        super().__init__(config=config, logger=logger, clock=clock)
         self.metadata: Any = metadata
+        self.scene_classifier = SceneClassifier(metadata.scenes)
+        self.navigation = NavigationGraph(metadata.routes)
+        self.manifest.regions = metadata.regions  # Manifest entries can name a region
+        self.check_templates(
+            [image for anchors in metadata.scenes.values() for image, _, _ in anchors]
+            + [
+                image
+                for edges in metadata.routes.values()
+                for images, _ in edges.values()
+                for image in images
+            ]
+        )
 
     def team_up(self) -> None:
         """Perma-loop for finding and joining Corrupt Creatures.
@@ -32,9 +57,11 @@ class AFKJAutomation(EmulatorInteractions):
         This perma-loop is called from the startup flags and will continuously search for Corrupt Creatures
         to join. It will also handle Synergy battles and lending heroes. It will restart itself if it gets
         stuck or times out for any reason.
+
+        Callers run it inside frame_rate("fast"), switching rate restarts scrcpy so it isn't done per cycle.
         """
         timer = 0
-        start: float = time.time()
+        start: float = self.clock.time()
 
         while True:
             # Naughty perma-loop, nested inside another when we call this with startup flags so calling 'return' will start from the top
@@ -55,12 +82,7 @@ class AFKJAutomation(EmulatorInteractions):
                 click=True,
                 region=self.metadata.regions["chat_selection"],
             ):  # Open the Team-Up section
-                self.click(
-                    "teamup/chat",
-                    seconds=2,
-                    suppress=True,
-                    region=self.metadata.regions["right_sidebar"],
-                )  # Open Chat window
+                self.click("teamup/chat", seconds=2, suppress=True)  # Open Chat window
                 self.click(
                     "teamup/chat_yellow",
                     retry=5,
@@ -70,23 +92,15 @@ class AFKJAutomation(EmulatorInteractions):
                     region=self.metadata.regions["right_sidebar"],
                 )  # Open Chat window
 
-            # Loop while searching for 'Join' button
-            while not self.is_visible(
-                "teamup/join",
-                seconds=0,
-                confidence=0.8,
-                region=self.metadata.regions["chat_window"],
-            ):
+            # Loop while searching for 'Join' button, the caller keeps the stream fast so we get in before the lobby fills
+            while not self.is_visible("teamup/join", seconds=0):
 
                 # If it's been more than 300s we might be stuck so we try these to get back to the chat window
-                if (time.time() - self.metadata.last_corrupt) > 300 and (
-                    time.time() - self.metadata.last_synergy
+                if (self.clock.time() - self.metadata.last_corrupt) > 300 and (
+                    self.clock.time() - self.metadata.last_synergy
                 ) > 300:
                     self.click(
-                        "teamup/chat",
-                        seconds=0,
-                        suppress=True,
-                        region=self.metadata.regions["right_sidebar"],
+                        "teamup/chat", seconds=0, suppress=True
                     )  # Ensure we actually have chat open
                     self.click(
                         "teamup/teamup",
@@ -108,22 +122,16 @@ class AFKJAutomation(EmulatorInteractions):
                     self.swipe(1000, 1500, 1000, 500, 500)
 
                 # Synergy battle hero lending is handled here for reasons
-                if self.is_visible(
-                    "teamup/synergy",
-                    seconds=0,
-                    region=self.metadata.regions["chat_window"],
-                ):
-                    x, y = self.returnxy(
-                        "teamup/synergy", region=self.metadata.regions["chat_window"]
-                    )
+                if self.is_visible("teamup/synergy", seconds=0):
+                    x, y = self.return_xy("teamup/synergy")
                     # We wait 60s between each one else we can end up opening and closing the same one repeatadly
                     if (
                         x != 0
-                    ):  # 0 is the 'nothing found' return value from returnxy() so skip if it's returned
+                    ):  # 0 is the 'nothing found' return value from return_xy() so skip if it's returned
                         # If green button found and it's been more than 60s since the last Synergy
-                        if self.return_pixel_colour(
-                            x, y + 220, 2, seconds=0
-                        ) < 200 and (time.time() - self.metadata.last_synergy > 120):
+                        if self.return_pixel_color(x, y + 220, 2, seconds=0) < 200 and (
+                            self.clock.time() - self.metadata.last_synergy > 120
+                        ):
                             self.logger.info("Synergy Battle found!")
                             self.click_xy(
                                 x, y + 220
@@ -141,26 +149,21 @@ class AFKJAutomation(EmulatorInteractions):
                                     region=self.metadata.regions["back"],
                                 )
                                 self.logger.info("Hero lent\n")
-                                self.metadata.last_synergy = time.time()
+                                self.metadata.last_synergy = self.clock.time()
                                 return
                             else:
                                 self.logger.info(
                                     "Something went wrong with Synergy Battle, returning\n"
                                 )
-                                self.metadata.last_synergy = time.time()
+                                self.metadata.last_synergy = self.clock.time()
                                 return
                     else:
                         self.logger.info("Synergy button gone!\n")
                         return
 
             # Log start time and click 'Join'
-            duration = time.time() - start
-            self.click_last(
-                "teamup/join",
-                seconds=4,
-                confidence=0.8,
-                region=self.metadata.regions["chat_window"],
-            )
+            duration = self.clock.time() - start
+            self.click_last("teamup/join", seconds=4)
 
             # If Ready button is not visible after clicking join then it's been disbanded/level locked etc so we restart
             if not self.is_visible(
@@ -207,11 +210,7 @@ class AFKJAutomation(EmulatorInteractions):
                     return
 
             # Deploy Heroes
-            while self.is_visible(
-                "teamup/ready_lobby",
-                confidence=0.8,
-                region=self.metadata.regions["bottom_buttons"],
-            ):
+            while self.is_visible("teamup/ready_lobby"):
                 self.logger.info("Deploying heroes")
                 self.wait(
                     2
@@ -219,12 +218,7 @@ class AFKJAutomation(EmulatorInteractions):
                 self.click_xy(120, 1300)
                 self.click_xy(270, 1300)
                 self.click_xy(450, 1300)
-                self.click(
-                    "teamup/ready_lobby",
-                    suppress=True,
-                    confidence=0.8,
-                    region=self.metadata.regions["bottom_buttons"],
-                )
+                self.click("teamup/ready_lobby", suppress=True)
                 break  # Break loop otherwise if we miss a button due to lag we loop here until battle starts
 
             # Wait until battle finishes
@@ -250,7 +244,7 @@ class AFKJAutomation(EmulatorInteractions):
 
             # Finish up and start the loop again
             timer = 0
-            self.metadata.last_corrupt = time.time()
+            self.metadata.last_corrupt = self.clock.time()
             return
 
     def start_autoprogress(self) -> None:
@@ -363,7 +357,7 @@ class AFKJAutomation(EmulatorInteractions):
         )
 
         self.wait(2)  # For things to load
-        self.click("buttons/main_menu", region=self.metadata.regions["main_menu"])
+        self.click("buttons/main_menu")
         self.click(
             "buttons/friends",
             region=self.metadata.regions["menu_activities"],
@@ -402,7 +396,7 @@ class AFKJAutomation(EmulatorInteractions):
             name=inspect.currentframe().f_code.co_name, state="open"
         )
 
-        self.click("buttons/main_menu", region=self.metadata.regions["main_menu"])
+        self.click("buttons/main_menu")
         self.click(
             "buttons/mail", region=self.metadata.regions["menu_activities"], seconds=2
         )
@@ -441,7 +435,7 @@ class AFKJAutomation(EmulatorInteractions):
             name=inspect.currentframe().f_code.co_name, state="open"
         )
 
-        self.click("buttons/main_menu", region=self.metadata.regions["main_menu"])
+        self.click("buttons/main_menu")
         self.click(
             "buttons/emporium",
             region=self.metadata.regions["menu_activities"],
@@ -496,15 +490,9 @@ class AFKJAutomation(EmulatorInteractions):
         counter: int = 0
 
         self.logger.info("Battling Arena")
-        self.safe_open_and_close(
-            name=inspect.currentframe().f_code.co_name, state="open"
-        )
-
-        self.click_xy(450, 1825)
-        if self.is_visible("labels/battle_modes"):
-            self.click(
-                "buttons/arena", region=self.metadata.regions["battle_modes"], seconds=2
-            )
+        if self.safe_open_and_close(
+            name=inspect.currentframe().f_code.co_name, state="open", scene="arena"
+        ):
             if self.is_visible(
                 "labels/arena_weekly_report", region=self.metadata.regions["top_third"]
             ):
@@ -535,14 +523,20 @@ class AFKJAutomation(EmulatorInteractions):
                         seconds=3,
                         region=self.metadata.regions["bottom_buttons"],
                     )
-                self.click_xy(180, 1450, seconds=6)  # Leftmost opponent
+                self.click_xy(180, 1450, seconds=0)  # Leftmost opponent
+                self.wait_for(
+                    "buttons/battle",
+                    region=self.metadata.regions["bottom_buttons"],
+                    timeout=6,
+                )
                 self.click(
                     "buttons/battle", region=self.metadata.regions["bottom_buttons"]
                 )
-                while not self.is_visible(
+                while not self.wait_for(
                     "labels/tap_to_close",
                     region=self.metadata.regions["bottom_buttons"],
                     confidence=0.8,
+                    timeout=3,
                 ):
                     # Clear promotion screen if visible (not sure this does anything with while is_visible loop at the end covering the case)
                     if self.is_visible(
@@ -550,16 +544,8 @@ class AFKJAutomation(EmulatorInteractions):
                         region=self.metadata.regions["bottom_third"],
                     ):
                         self.click_xy(550, 1800)
-                    if self.is_visible(
-                        "buttons/skip_inverse",
-                        seconds=0,
-                        region=self.metadata.regions["x3_and_skip"],
-                    ):
-                        self.click(
-                            "buttons/skip_inverse",
-                            seconds=3,
-                            region=self.metadata.regions["x3_and_skip"],
-                        )
+                    if self.is_visible("buttons/skip_inverse", seconds=0):
+                        self.click("buttons/skip_inverse", seconds=3)
                         self.click("buttons/confirm", suppress=True)
                         self.logger.info("Skip available, skipping the fight")
                     timeout += 1
@@ -580,9 +566,15 @@ class AFKJAutomation(EmulatorInteractions):
                     self.click(
                         "labels/tap_to_close",
                         region=self.metadata.regions["bottom_buttons"],
-                        seconds=4,
+                        seconds=0,
                         suppress=True,
                     )
+                    self.wait_until_gone(
+                        "labels/tap_to_close",
+                        region=self.metadata.regions["bottom_buttons"],
+                        confidence=0.8,
+                        timeout=4,
+                    )
                 counter += 1
             # Collect Victory Rewards
             self.click_xy(200, 550)
@@ -615,16 +607,12 @@ class AFKJAutomation(EmulatorInteractions):
         timer: int = 0
 
         self.logger.info("Battling Dream Realm")
-        self.safe_open_and_close(
-            name=inspect.currentframe().f_code.co_name, state="open"
-        )
-
-        self.click_xy(450, 1825, seconds=3)
-        self.click(
-            "buttons/dream_realm",
-            region=self.metadata.regions["battle_modes"],
-            seconds=3,
-        )
+        if not self.safe_open_and_close(
+            name=inspect.currentframe().f_code.co_name,
+            state="open",
+            scene="dream_realm",
+        ):
+            return
         self.click_xy(1000, 50)  # Clear new season info popup
 
         # First collect rewards
@@ -659,17 +647,19 @@ class AFKJAutomation(EmulatorInteractions):
                 region=self.metadata.regions["bottom_buttons"],
                 seconds=5,
             )
-            time.sleep(60)  # wait for battle to end
-            while not self.is_visible(
-                "labels/tap_to_close", region=self.metadata.regions["bottom_buttons"]
-            ):  # Few clicks to clear loot too
-                timer += 1
-                if timer > 60:
-                    self.logger.info("DR Timer Exceeded!")
-                    break
-                if self.is_visible("labels/dr_first_kill"):
-                    self.click_xy(550, 1800)  # clear rewards popup
-                pass
+            # Wait for battle to end, returning as soon as it does rather than a fixed 60 seconds
+            with self.frame_rate("slow"):  # Nothing to react to until it ends
+                while not self.wait_for(
+                    "labels/tap_to_close",
+                    region=self.metadata.regions["bottom_buttons"],
+                    timeout=10,
+                ):  # Few clicks to clear loot too
+                    timer += 1
+                    if timer > 24:
+                        self.logger.info("DR Timer Exceeded!")
+                        break
+                    if self.is_visible("labels/dr_first_kill", retry=1):
+                        self.click_xy(550, 1800)  # clear rewards popup
             self.click(
                 "labels/tap_to_close",
                 region=self.metadata.regions["bottom_buttons"],
@@ -763,7 +753,7 @@ class AFKJAutomation(EmulatorInteractions):
             name=inspect.currentframe().f_code.co_name, state="open"
         )
 
-        self.click("buttons/main_menu", region=self.metadata.regions["main_menu"])
+        self.click("buttons/main_menu")
         self.click(
             "buttons/quests", region=self.metadata.regions["menu_activities"], seconds=3
         )
@@ -771,11 +761,7 @@ class AFKJAutomation(EmulatorInteractions):
 
         if self.is_visible("labels/daily_quests"):
             self.logger.info("    Collecting Daily Quests")
-            self.is_visible(
-                "buttons/quick_claim",
-                region=self.metadata.regions["bottom_third"],
-                click=True,
-            )
+            self.is_visible("buttons/quick_claim", click=True)
             self.wait(3)
             if self.config.getboolean("ADVANCED", "collect_daily_rewards") is True:
                 self.click_xy(900, 200, seconds=2)  # collect dailies
@@ -853,16 +839,9 @@ class AFKJAutomation(EmulatorInteractions):
 
         # Level up all if enabled
         if self.config.getboolean("ADVANCED", "use_level_up_all"):
-            while self.is_visible(
-                "buttons/level_up_all_active",
-                region=self.metadata.regions["bottom_third"],
-                confidence=0.92,
-            ):
-                self.click(
-                    "buttons/level_up_all_active",
-                    region=self.metadata.regions["bottom_third"],
-                    confidence=0.92,
-                )  # sligtly higher confidence as inactive is the same but greyscale
+            # Slightly higher confidence in img/manifest.json as inactive is the same but greyscale
+            while self.is_visible("buttons/level_up_all_active"):
+                self.click("buttons/level_up_all_active")
                 self.logger.info("Level up all clicked!")
         # Else we level the heros individually
         else:
@@ -892,7 +871,13 @@ class AFKJAutomation(EmulatorInteractions):
                     seconds=0,
                 ):
                     dust_level()
-                    self.swipe(800, 1800, 800, 1800, 5000)  # Hacky way to hold it down
+                    self.hold(
+                        800,
+                        1800,
+                        5000,
+                        image="buttons/levelup_double",
+                        region=self.metadata.regions["levelup_hero"],
+                    )
                     dust_level()
                 while self.is_visible(
                     "buttons/levelup_single",
@@ -900,7 +885,13 @@ class AFKJAutomation(EmulatorInteractions):
                     seconds=0,
                 ):
                     dust_level()
-                    self.swipe(800, 1800, 800, 1800, 5000)  # Hacky way to hold it down
+                    self.hold(
+                        800,
+                        1800,
+                        5000,
+                        image="buttons/levelup_single",
+                        region=self.metadata.regions["levelup_hero"],
+                    )
                     dust_level()
                 self.click(
                     "buttons/back",
@@ -975,9 +966,7 @@ class AFKJAutomation(EmulatorInteractions):
             name=inspect.currentframe().f_code.co_name, state="open"
         )
         self.logger.info("Collecting noble path")
-        self.click(
-            "buttons/main_menu", region=self.metadata.regions["main_menu"], seconds=2
-        )
+        self.click("buttons/main_menu", seconds=2)
         self.click(
             "buttons/noble_path",
             region=self.metadata.regions["menu_activities"],
@@ -995,10 +984,7 @@ class AFKJAutomation(EmulatorInteractions):
             # This will claim quests/collet rewards
             self.click_xy(750, 450)  # Click Quests
             if self.is_visible(
-                "buttons/quick_claim",
-                click=True,
-                region=self.metadata.regions["bottom_third"],
-                seconds=5,
+                "buttons/quick_claim", click=True, seconds=5
             ):  # Can also be 'claim_all_italics'
                 self.click_xy(1000, 1800)  # Clear Loot
             # # Travelogue
@@ -1213,12 +1199,7 @@ class AFKJAutomation(EmulatorInteractions):
                 ):
                     self.logger.info("Opening " + faction + " tower\n")
                     if self.is_visible(
-                        "towers/lvl",
-                        click=True,
-                        region=(15, 850, 1050, 800),
-                        seconds=3,
-                        y_relative=-50,
-                        grayscale=True,
+                        "towers/lvl", click=True, seconds=3, y_relative=-50
                     ):
                         if self.is_visible("buttons/battle"):
                             self.formation_handler()
@@ -1243,7 +1224,11 @@ class AFKJAutomation(EmulatorInteractions):
                                     self.click("buttons/back")
                                     self.click("buttons/back")
                                     break
-                                self.wait(5)
+                                self.wait_for_any(
+                                    ["buttons/next", "buttons/retry"],
+                                    region=self.metadata.regions["bottom_buttons"],
+                                    timeout=5,
+                                )
                     else:
                         self.logger.info("Tower floor not found!")
                         break
@@ -1274,64 +1259,74 @@ class AFKJAutomation(EmulatorInteractions):
                         y_relative=-20,
                     ):
                         if self.is_visible(
-                            "towers/lvl",
-                            click=True,
-                            region=(15, 850, 1050, 800),
-                            seconds=3,
-                            y_relative=-50,
-                            grayscale=True,
+                            "towers/lvl", click=True, seconds=3, y_relative=-50
                         ):
                             self.formation_handler()
-                            while True:
-                                self.click(
-                                    "buttons/battle",
-                                    suppress=True,
-                                    region=self.metadata.regions["bottom_buttons"],
-                                )
-                                if self.is_visible(
-                                    "buttons/next",
-                                    click=True,
-                                    seconds=4,
-                                    region=self.metadata.regions["bottom_buttons"],
-                                ):
-                                    self.logger.info(
-                                        faction.capitalize()
-                                        + " win detected, moving to next floor\n"
+                            counter = PushCounter(
+                                tower.capitalize() + " tower",
+                                self.logger,
+                                clock=self.clock,
+                            )
+                            # The loop only ends by an exception (stopping the bot), so the summary goes in finally
+                            try:
+                                while True:
+                                    self.click(
+                                        "buttons/battle",
+                                        suppress=True,
+                                        region=self.metadata.regions["bottom_buttons"],
                                     )
-                                    self.metadata.stage_defeats = 0
-                                    self.formation_handler()
-                                if self.is_visible(
-                                    "buttons/retry",
-                                    click=True,
-                                    region=self.metadata.regions["bottom_buttons"],
-                                ):
-                                    # Increment defeats
-                                    self.metadata.stage_defeats += 1
-                                    # If were past the defeat cap handle formation change, else standard log output
-                                    if (
-                                        self.metadata.stage_defeats >= 1
-                                        and self.metadata.stage_defeats
-                                        % self.config.getint("PUSHING", "defeat_limit")
-                                        == 0
+                                    if self.is_visible(
+                                        "buttons/next",
+                                        click=True,
+                                        seconds=4,
+                                        region=self.metadata.regions["bottom_buttons"],
                                     ):
-                                        self.metadata.formation = (
-                                            self.metadata.stage_defeats
-                                            / self.config.getint(
-                                                "PUSHING", "defeat_limit"
-                                            )
-                                        ) + 1  # number of defeats / defeat_limit, plus 1 as we start on formation #1
-                                        self.logger.info(
-                                            str(self.metadata.stage_defeats)
-                                            + " defeats, trying next formation"
-                                        )
-                                        self.wait()
-                                        self.formation_handler(self.metadata.formation)
-                                    else:
                                         self.logger.info(
-                                            "Defeat #"
-                                            + str(self.metadata.stage_defeats)
-                                            + "! Retrying"
+                                            faction.capitalize()
+                                            + " win detected, moving to next floor\n"
                                         )
+                                        self.metadata.stage_defeats = 0
+                                        counter.attempt(victory=True)
+                                        self.formation_handler()
+                                    if self.is_visible(
+                                        "buttons/retry",
+                                        click=True,
+                                        region=self.metadata.regions["bottom_buttons"],
+                                    ):
+                                        # Increment defeats
+                                        self.metadata.stage_defeats += 1
+                                        counter.attempt(victory=False)
+                                        # If were past the defeat cap handle formation change, else standard log output
+                                        if (
+                                            self.metadata.stage_defeats >= 1
+                                            and self.metadata.stage_defeats
+                                            % self.config.getint(
+                                                "PUSHING", "defeat_limit"
+                                            )
+                                            == 0
+                                        ):
+                                            self.metadata.formation = (
+                                                self.metadata.stage_defeats
+                                                / self.config.getint(
+                                                    "PUSHING", "defeat_limit"
+                                                )
+                                            ) + 1  # number of defeats / defeat_limit, plus 1 as we start on formation #1
+                                            self.logger.info(
+                                                str(self.metadata.stage_defeats)
+                                                + " defeats, trying next formation"
+                                            )
+                                            self.wait()
+                                            self.formation_handler(
+                                                self.metadata.formation
+                                            )
+                                        else:
+                                            self.logger.info(
+                                                "Defeat #"
+                                                + str(self.metadata.stage_defeats)
+                                                + "! Retrying"
+                                            )
+                            finally:
+                                self.logger.info(counter.summary())
 
             if self.safe_open_and_close(
                 name=inspect.currentframe().f_code.co_name, state="close"
@@ -1345,11 +1340,7 @@ class AFKJAutomation(EmulatorInteractions):
                 name=inspect.currentframe().f_code.co_name, state="open"
             )
             self.logger.info("Auto-retrying Trial of Abyss")
-            self.click(
-                "buttons/main_menu",
-                region=self.metadata.regions["main_menu"],
-                seconds=3,
-            )
+            self.click("buttons/main_menu", seconds=3)
             if self.is_visible("buttons/trial_of_abyss", click=True):
                 pass
             else:
@@ -1358,11 +1349,9 @@ class AFKJAutomation(EmulatorInteractions):
                     region=self.metadata.regions["menu_activities"],
                     seconds=3,
                 )
-                while not self.is_visible(
-                    "events/abyss", region=self.metadata.regions["bottom_third"]
-                ):
+                while not self.is_visible("events/abyss"):
                     self.swipe(700, 1800, 250, 1800, 2000)
-                self.click("events/abyss", region=self.metadata.regions["bottom_third"])
+                self.click("events/abyss")
                 self.click(
                     "buttons/abyss_entry", region=self.metadata.regions["bottom_third"]
                 )
@@ -1408,18 +1397,14 @@ class AFKJAutomation(EmulatorInteractions):
         # Runs all available DR attempts
         if mode == "dream_realm":
             self.logger.info("Using all Dream Realm attempts")
-            self.safe_open_and_close(
-                name=inspect.currentframe().f_code.co_name, state="open"
-            )
+            if not self.safe_open_and_close(
+                name=inspect.currentframe().f_code.co_name,
+                state="open",
+                scene="dream_realm",
+            ):
+                return
             dr_counter = 0
 
-            self.click_xy(450, 1825, seconds=3)
-            self.click(
-                "buttons/dream_realm",
-                region=self.metadata.regions["battle_modes"],
-                seconds=3,
-            )
-
             # 20 Attempts
             for _ in range(19):
                 # Handle opening the Battle
@@ -1459,16 +1444,8 @@ class AFKJAutomation(EmulatorInteractions):
                             return
                         # When we haven't seen the x3 button three times in a row we can assume the battle is over
                         while dr_counter < 3:
-                            if self.is_visible(
-                                "buttons/skip_inverse",
-                                seconds=0,
-                                region=self.metadata.regions["x3_and_skip"],
-                            ):
-                                self.click(
-                                    "buttons/skip_inverse",
-                                    seconds=2,
-                                    region=self.metadata.regions["x3_and_skip"],
-                                )
+                            if self.is_visible("buttons/skip_inverse", seconds=0):
+                                self.click("buttons/skip_inverse", seconds=2)
                                 self.click(
                                     "buttons/confirm",
                                     seconds=3,
@@ -1507,114 +1484,139 @@ class AFKJAutomation(EmulatorInteractions):
             ):
                 self.logger.info("Dream Realm attempts exhausted.\n")
 
-        # For pushing afk stages
+        # For pushing afk stages. Runs as a loop over select -> battle -> result states rather than calling
+        # itself after every battle, so overnight pushes don't grow the stack
         if mode == "afkstages":
-            timeout = 0
-            if self.is_visible(
-                "buttons/records",
-                region=self.metadata.regions["bottom_buttons"],
-                seconds=0,
-                retry=20,
-            ):
+            counter = PushCounter("AFK Stages", self.logger, clock=self.clock)
+            state: str = "select"
 
-                # Change formation if we we beat the 2nd round or have defeat >10 times in a row
-                if (
-                    load_formation is True
-                    or self.metadata.stage_defeats
-                    >= self.config.getint("PUSHING", "defeat_limit")
-                ):
-                    # More than 10 defeats in a row and a multiple of 10 (i.e load new formation on 10th/20th/30th etc defeat)
-                    if (
-                        self.metadata.stage_defeats >= 1
-                        and self.metadata.stage_defeats
-                        % self.config.getint("PUSHING", "defeat_limit")
-                        == 0
+            while state != "done":
+                if state == "select":
+                    if not self.is_visible(
+                        "buttons/records",
+                        region=self.metadata.regions["bottom_buttons"],
+                        seconds=0,
+                        retry=20,
                     ):
-                        self.metadata.formation = (
-                            self.metadata.stage_defeats
-                            / self.config.getint("PUSHING", "defeat_limit")
-                        ) + 1  # number of defeats / defeat_limit, plus 1 as we start on formation #1
-                        self.logger.info(
-                            str(self.metadata.stage_defeats)
-                            + " defeats, trying next formation"
-                        )
-                        self.formation_handler(self.metadata.formation)
-                        if (
-                            self.metadata.first_stage_won is True
-                        ):  # Manually select second round if we've won the first
-                            self.wait()  # To stop getting stuck if this buttons not pressed
-                            self.click_xy(550, 1100)
-                    elif load_formation is True:
-                        self.formation_handler(self.metadata.formation)
-
-                # Season 3 single stage code
-
-                # Start Battle
-                self.click(
-                    "buttons/battle",
-                    retry=5,
-                    region=self.metadata.regions["bottom_buttons"],
-                    seconds=0,
-                )
-                self.click("buttons/confirm", seconds=0, suppress=True)
-                self.wait(
-                    5
-                )  # Long wait to stop false positives from the back button on the battle selection screen
+                        self.logger.info("Something went wrong opening AFK Stages!")
+                        self.save_screenshot("afk_stage_error")
+                        self.recover()
+                        state = "done"
+                        continue
 
-                # Wait til we see the back button in the post battle screen before running next checks
-                while not self.is_visible(
-                    "buttons/back",
-                    region=self.metadata.regions["bottom_buttons"],
-                    seconds=2,
-                ):
-                    timeout += 1
+                    # Change formation if we we beat the 2nd round or have defeat >10 times in a row
                     if (
-                        timeout > 30
-                    ):  # If nothing at 30 seconds start clicking in case battery saver mode is active
-                        self.click_location("neutral")
-                    if (
-                        timeout > 60
-                    ):  # Still nothing at 60 seconds? Quit as somethings gone wrong
-                        self.logger.info("Battle timeout error!")
-                        break
-
-                # Post battle screen detection
-                result = ""
-                while result == "":
-                    # Loop the different scenarios until we get an image match ('retry' is defeat, 'battle' is normal stage victory, 'talent_trials' is talent stage victory)
-                    images = [
-                        "buttons/retry",
+                        load_formation is True
+                        or self.metadata.stage_defeats
+                        >= self.config.getint("PUSHING", "defeat_limit")
+                    ):
+                        # More than 10 defeats in a row and a multiple of 10 (i.e load new formation on 10th/20th/30th etc defeat)
+                        if (
+                            self.metadata.stage_defeats >= 1
+                            and self.metadata.stage_defeats
+                            % self.config.getint("PUSHING", "defeat_limit")
+                            == 0
+                        ):
+                            self.metadata.formation = (
+                                self.metadata.stage_defeats
+                                / self.config.getint("PUSHING", "defeat_limit")
+                            ) + 1  # number of defeats / defeat_limit, plus 1 as we start on formation #1
+                            self.logger.info(
+                                str(self.metadata.stage_defeats)
+                                + " defeats, trying next formation"
+                            )
+                            self.formation_handler(self.metadata.formation)
+                            if (
+                                self.metadata.first_stage_won is True
+                            ):  # Manually select second round if we've won the first
+                                self.wait()  # To stop getting stuck if this buttons not pressed
+                                self.click_xy(550, 1100)
+                        elif load_formation is True:
+                            self.formation_handler(self.metadata.formation)
+                    state = "battle"
+
+                elif state == "battle":
+                    # Season 3 single stage code
+
+                    # Start Battle
+                    self.click(
                         "buttons/battle",
-                        "buttons/talent_trials",
-                    ]
-                    result = self.is_visible_array(
-                        images,
-                        confidence=0.9,
+                        retry=5,
+                        region=self.metadata.regions["bottom_buttons"],
                         seconds=0,
-                        retry=1,
-                        click=True,
+                    )
+                    self.click("buttons/confirm", seconds=0, suppress=True)
+                    # Wait until we've left the battle selection screen to stop false positives from its back button
+                    self.wait_until_gone(
+                        "buttons/battle",
                         region=self.metadata.regions["bottom_buttons"],
+                        timeout=5,
                     )
 
-                # Retry button indicates defeat, we run the defeat logic
-                if result == "buttons/retry":
-                    self.metadata.stage_defeats += 1
-                    self.logger.info(
-                        "Defeat #" + str(self.metadata.stage_defeats) + "! Retrying"
-                    )
-                    self.blind_push("afkstages", load_formation=False)
-
-                # The other two mean we have a victory
-                elif result == "buttons/battle" or result == "buttons/talent_trials":
-                    self.metadata.stage_defeats = 0  # Reset defeats
-                    self.metadata.formation = 1  # Reset formation
-                    self.logger.info("Victory! Stage passed\n")
-                    self.metadata.first_stage_won = False
-                    self.blind_push("afkstages", load_formation=True)
-            else:
-                self.logger.info("Something went wrong opening AFK Stages!")
-                self.save_screenshot("afk_stage_error")
-                self.recover()
+                    # Wait til we see the back button in the post battle screen before running next checks
+                    timeout = 0
+                    while not self.wait_for(
+                        "buttons/back",
+                        region=self.metadata.regions["bottom_buttons"],
+                        timeout=3,
+                    ):
+                        timeout += 1
+                        if (
+                            timeout > 30
+                        ):  # If nothing at 30 seconds start clicking in case battery saver mode is active
+                            self.click_location("neutral")
+                        if (
+                            timeout > 60
+                        ):  # Still nothing at 60 seconds? Quit as somethings gone wrong
+                            self.logger.info("Battle timeout error!")
+                            break
+                    state = "result"
+
+                elif state == "result":
+                    # Post battle screen detection
+                    result = ""
+                    while result == "":
+                        # Loop the different scenarios until we get an image match ('retry' is defeat, 'battle' is normal stage victory, 'talent_trials' is talent stage victory)
+                        images = [
+                            "buttons/retry",
+                            "buttons/battle",
+                            "buttons/talent_trials",
+                        ]
+                        result = self.is_visible_array(
+                            images,
+                            confidence=0.9,
+                            seconds=0,
+                            retry=1,
+                            click=True,
+                            region=self.metadata.regions["bottom_buttons"],
+                        )
+
+                    # Retry button indicates defeat, we run the defeat logic
+                    if result == "buttons/retry":
+                        self.metadata.stage_defeats += 1
+                        self.logger.info(
+                            "Defeat #" + str(self.metadata.stage_defeats) + "! Retrying"
+                        )
+                        counter.attempt(victory=False)
+                        load_formation = False
+
+                    # The other two mean we have a victory
+                    elif (
+                        result == "buttons/battle" or result == "buttons/talent_trials"
+                    ):
+                        self.metadata.stage_defeats = 0  # Reset defeats
+                        self.metadata.formation = 1  # Reset formation
+                        self.logger.info("Victory! Stage passed\n")
+                        self.metadata.first_stage_won = False
+                        counter.attempt(victory=True)
+                        load_formation = True
+                    else:
+                        self.logger.info("Battle result not found, stopping push")
+                        state = "done"
+                        continue
+                    state = "select"
+
+            self.logger.info(counter.summary())
 
     def open_afk_stages(self, afkstages: bool = True) -> None:
         """Opens the AFK or Talent Stages based on the provided flag.
@@ -1670,6 +1672,7 @@ class AFKJAutomation(EmulatorInteractions):
             region=self.metadata.regions["bottom_third"],
         )
         self.click("buttons/confirm", retry=1, suppress=True, seconds=0)
+        counter = PushCounter("AFK Stage chain", self.logger, clock=self.clock)
         while True:
             # Victory Logic
             if self.is_visible("buttons/next", retry=1, click=True, seconds=3):
@@ -1682,6 +1685,7 @@ class AFKJAutomation(EmulatorInteractions):
                 )
                 self.logger.info("Victory!\n")
                 self.metadata.stage_defeats = 0
+                counter.attempt(victory=True)
                 self.formation_handler()
                 self.click(
                     "buttons/battle",
@@ -1701,6 +1705,7 @@ class AFKJAutomation(EmulatorInteractions):
             ):
                 # Increment defeats
                 self.metadata.stage_defeats += 1
+                counter.attempt(victory=False)
                 # If were past the defeat cap handle formation change, else standard log output
                 if (
                     self.metadata.stage_defeats >= 1
@@ -1761,6 +1766,8 @@ class AFKJAutomation(EmulatorInteractions):
                 self.click("buttons/back", suppress=True)
                 self.click("buttons/back2", suppress=True)
 
+        counter = PushCounter("Dura's Trials", self.logger, clock=self.clock)
+
         def handle_battle(floor_type: str = "") -> None:
             """Handles the battle process for Dura's Trials.
 
@@ -1797,6 +1804,7 @@ class AFKJAutomation(EmulatorInteractions):
                 ):
                     # Increment defeats
                     self.metadata.stage_defeats += 1
+                    counter.attempt(victory=False)
                     # If were past the defeat cap handle formation change, else standard log output
                     if (
                         self.metadata.stage_defeats >= 1
@@ -1823,6 +1831,7 @@ class AFKJAutomation(EmulatorInteractions):
                     if self.is_visible("buttons/next2", retry=1, click=True, seconds=5):
                         self.logger.info("Victory!\n")
                         self.metadata.stage_defeats = 0
+                        counter.attempt(victory=True)
                         self.formation_handler()
                     if self.is_visible("buttons/retry2", retry=1, seconds=5):
                         self.logger.info("Victory! Highest stage cleared!\n")
@@ -1839,6 +1848,7 @@ class AFKJAutomation(EmulatorInteractions):
                     ):  # High confidence so we don't catch the greyscale version
                         self.logger.info("Victory!\n")
                         self.metadata.stage_defeats = 0
+                        counter.attempt(victory=True)
                         self.formation_handler()
                     if self.is_visible(
                         "buttons/continue_green", retry=1, click=True, seconds=5
@@ -1874,23 +1884,13 @@ class AFKJAutomation(EmulatorInteractions):
             self.logger.info("Checking top row Charm Trials..")
             self.metadata.stage_defeats = 0
             if self.is_visible(
-                "buttons/rate_up",
-                grayscale=True,
-                click=True,
-                region=(50, 1175, 950, 150),
-                confidence=0.75,
-                seconds=4,
+                "buttons/rate_up", click=True, region=(50, 1175, 950, 150), seconds=4
             ):
 
                 # Handle top row Dawnrise
                 self.logger.info("Checking Dawnrise")
                 self.click_xy(400, 1800, seconds=7)
-                if self.is_visible(
-                    "buttons/sweep",
-                    seconds=0,
-                    retry=2,
-                    region=self.metadata.regions["bottom_third"],
-                ):
+                if self.is_visible("buttons/sweep", seconds=0, retry=2):
                     self.logger.info("Max Dawnrise floor reached!\n")
                 else:
                     if self.is_visible(
@@ -1925,23 +1925,13 @@ class AFKJAutomation(EmulatorInteractions):
             self.metadata.stage_defeats = 0
             self.metadata.formation = 1  # Reset on new levels
             if self.is_visible(
-                "buttons/rate_up",
-                grayscale=True,
-                click=True,
-                region=(50, 1400, 950, 150),
-                confidence=0.75,
-                seconds=3,
+                "buttons/rate_up", click=True, region=(50, 1400, 950, 150), seconds=3
             ):
 
                 # Handle bottom row Dawnrise
                 self.logger.info("Checking Dawnrise")
                 self.click_xy(400, 1800, seconds=7)
-                if self.is_visible(
-                    "buttons/sweep",
-                    seconds=0,
-                    retry=2,
-                    region=self.metadata.regions["bottom_third"],
-                ):
+                if self.is_visible("buttons/sweep", seconds=0, retry=2):
                     self.logger.info("Max Dawnrise floor reached!\n")
                 else:
                     if self.is_visible(
@@ -1974,6 +1964,7 @@ class AFKJAutomation(EmulatorInteractions):
             self.logger.info("Something went wrong opening Dura's Trials!")
             self.recover()
 
+        self.logger.info(counter.summary())
         if self.safe_open_and_close(
             name=inspect.currentframe().f_code.co_name, state="close"
         ):
@@ -2015,7 +2006,13 @@ class AFKJAutomation(EmulatorInteractions):
                 seconds=0,
             ):
                 self.logger.info("Holding button")
-                self.swipe(550, 1250, 550, 1250, 4000)  # Hacky way to hold it down
+                self.hold(
+                    550,
+                    1250,
+                    4000,
+                    image="buttons/tap_and_hold",
+                    region=self.metadata.regions["chat_window"],
+                )
             if self.is_visible(
                 "labels/time_change",
                 region=self.metadata.regions["chat_window"],
@@ -0,0 +1,140 @@
+"""Clock Module."""
+
+import threading
+import time
+from typing import Callable
+
+
+class Clock:
+    """Clock Class.
+
+    Every sleep, timeout and timestamp in the bot goes through one of these so it can be swapped for a VirtualClock,
+    and so there's one place that knows how long we spent waiting.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the clock."""
+        self.slept: float = 0.0  # Real seconds spent in sleep()
+        self.waited: float = 0.0  # Real seconds spent in wait_for()
+
+    def time(self) -> float:
+        """Get the wall clock time.
+
+        Returns:
+            float: Seconds since the epoch.
+        """
+        return time.time()
+
+    def monotonic(self) -> float:
+        """Get the time for measuring intervals and deadlines.
+
+        Returns:
+            float: Monotonic seconds.
+        """
+        return time.monotonic()
+
+    def _real(self, seconds: float) -> float:
+        """Convert clock seconds to real seconds.
+
+        Args:
+            seconds (float): Clock seconds.
+
+        Returns:
+            float: Real seconds.
+        """
+        return seconds
+
+    def sleep(self, seconds: float, account: bool = True) -> None:
+        """Sleep.
+
+        Args:
+            seconds (float): Clock seconds to sleep.
+            account (bool, optional): Add to the slept total, False for background threads. Defaults to True.
+        """
+        started: float = time.perf_counter()
+        time.sleep(max(0.0, self._real(seconds)))
+        if account:
+            self.slept += time.perf_counter() - started
+
+    def wait_for(
+        self,
+        condition: threading.Condition,
+        predicate: Callable[[], bool],
+        timeout: float,
+    ) -> bool:
+        """Wait on a condition until the predicate is true or the timeout passes, the condition must be held.
+
+        Args:
+            condition (threading.Condition): Condition to wait on.
+            predicate (Callable[[], bool]): Checked each time the condition is notified.
+            timeout (float): Clock seconds to wait at most.
+
+        Returns:
+            bool: The predicate's last value.
+        """
+        started: float = time.perf_counter()
+        result = condition.wait_for(predicate, max(0.0, self._real(timeout)))
+        self.waited += time.perf_counter() - started
+        return result
+
+    def stats(self) -> dict[str, float]:
+        """Return time spent waiting.
+
+        Returns:
+            dict[str, float]: Real seconds slept and spent waiting for frames.
+        """
+        return {"slept": round(self.slept, 2), "waited": round(self.waited, 2)}
+
+
+class VirtualClock(Clock):
+    """Virtual Clock Class.
+
+    Runs time faster than real time, at speed 100 a 60 second wait takes 0.6 real seconds while everything reading
+    the clock sees the full 60 seconds pass. Meant for replayed sessions, a real emulator won't speed up with it.
+    """
+
+    def __init__(self, speed: float = 100.0) -> None:
+        """Initialize the clock at the current wall time.
+
+        Args:
+            speed (float, optional): Clock seconds per real second. Defaults to 100.0.
+        """
+        super().__init__()
+        self.speed: float = speed
+        self._real_start: float = time.monotonic()
+        self._wall_start: float = time.time()
+
+    def _elapsed(self) -> float:
+        """Get clock seconds since the clock was created.
+
+        Returns:
+            float: Clock seconds.
+        """
+        return (time.monotonic() - self._real_start) * self.speed
+
+    def time(self) -> float:
+        """Get the virtual wall clock time.
+
+        Returns:
+            float: Seconds since the epoch.
+        """
+        return self._wall_start + self._elapsed()
+
+    def monotonic(self) -> float:
+        """Get the virtual time for measuring intervals and deadlines.
+
+        Returns:
+            float: Monotonic seconds.
+        """
+        return self._real_start + self._elapsed()
+
+    def _real(self, seconds: float) -> float:
+        """Convert clock seconds to real seconds.
+
+        Args:
+            seconds (float): Clock seconds.
+
+        Returns:
+            float: Real seconds.
+        """
+        return seconds / self.speed
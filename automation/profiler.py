@@ -0,0 +1,178 @@
+"""Profiler Module."""
+
+import contextlib
+import json
+import threading
+import time
+from functools import wraps
+from logging import Logger
+from typing import Any, Callable, ContextManager
+
+
+class Profiler:
+    """Profiler Class.
+
+    Counters and timers for the hot paths (frames, matching, input, shell and waiting) tagged with the activity
+    that is running, so a run can be broken down afterwards. Timers are exclusive, a wait inside a hold counts as
+    waiting and not as input. Disabled it hands out a shared no-op context so the hot paths cost next to nothing.
+    """
+
+    CATEGORIES: tuple[str, ...] = ("frame", "match", "input", "shell", "sleep")
+    _NULL: ContextManager = contextlib.nullcontext()
+
+    def __init__(self, enabled: bool = False) -> None:
+        """Initialize the profiler.
+
+        Args:
+            enabled (bool, optional): Start timing straight away. Defaults to False.
+        """
+        self.enabled: bool = enabled
+        self.activity: str = "startup"
+        # activity -> category -> [count, seconds], plus 'wall' for the time spent in the activity
+        self.totals: dict[str, dict[str, list[float]]] = {}
+        self._activity_started: float = time.perf_counter()
+        self._local: threading.local = threading.local()
+
+    def enable(self) -> None:
+        """Start timing, from the current activity."""
+        self.enabled = True
+        self._activity_started = time.perf_counter()
+
+    def start(self, activity: str) -> None:
+        """Attribute everything from now on to an activity.
+
+        Args:
+            activity (str): Activity name, e.g. 'arena'.
+        """
+        if not self.enabled:
+            self.activity = activity
+            return
+        now = time.perf_counter()
+        self._add(self.activity, "wall", now - self._activity_started)
+        self.activity = activity
+        self._activity_started = now
+
+    def timer(self, category: str) -> ContextManager:
+        """Time a block of code.
+
+        Args:
+            category (str): One of CATEGORIES.
+
+        Returns:
+            ContextManager: Context that records the block's time.
+        """
+        if not self.enabled:
+            return self._NULL
+        return _Timer(self, category)
+
+    def wrap(self, category: str, function: Callable[..., Any]) -> Callable[..., Any]:
+        """Time every call to a function.
+
+        Args:
+            category (str): One of CATEGORIES.
+            function (Callable[..., Any]): Function to time.
+
+        Returns:
+            Callable[..., Any]: Timed function.
+        """
+
+        @wraps(function)
+        def timed(*args: Any, **kwargs: Any) -> Any:
+            with self.timer(category):
+                return function(*args, **kwargs)
+
+        return timed
+
+    def _add(self, activity: str, category: str, seconds: float) -> None:
+        """Add a timing.
+
+        Args:
+            activity (str): Activity name.
+            category (str): Category, or 'wall'.
+            seconds (float): Time to add.
+        """
+        counter = self.totals.setdefault(activity, {}).setdefault(category, [0, 0.0])
+        counter[0] += 1
+        counter[1] += seconds
+
+    def report(self) -> dict[str, Any]:
+        """Build the report, closing off the current activity.
+
+        Returns:
+            dict[str, Any]: activity -> wall_s and count/seconds per category, plus 'other_s' for time
+                            outside every timer (our own Python code and logging).
+        """
+        self.start(self.activity)
+        report: dict[str, Any] = {}
+        for activity, categories in self.totals.items():
+            wall = categories.get("wall", [0, 0.0])[1]
+            entry: dict[str, Any] = {"wall_s": round(wall, 3)}
+            measured = 0.0
+            for category in self.CATEGORIES:
+                count, seconds = categories.get(category, [0, 0.0])
+                entry[category] = {"count": int(count), "seconds": round(seconds, 3)}
+                measured += seconds
+            entry["other_s"] = round(max(0.0, wall - measured), 3)
+            report[activity] = entry
+        return report
+
+    def summary(self, report: dict[str, Any]) -> list[str]:
+        """Format a report as a table.
+
+        Args:
+            report (dict[str, Any]): Report from report().
+
+        Returns:
+            list[str]: Table lines, seconds per category for every activity.
+        """
+        columns = ("wall",) + self.CATEGORIES + ("other",)
+        lines = ["activity".ljust(24) + "".join(c.rjust(9) for c in columns)]
+        for activity, entry in report.items():
+            values = (
+                [entry["wall_s"]]
+                + [entry[category]["seconds"] for category in self.CATEGORIES]
+                + [entry["other_s"]]
+            )
+            lines.append(
+                activity[:24].ljust(24)
+                + "".join(str(round(value, 1)).rjust(9) for value in values)
+            )
+        return lines
+
+    def save(self, path: str, logger: Logger) -> None:
+        """Log the summary table and write the JSON report.
+
+        Args:
+            path (str): File to write the report to.
+            logger (Logger): Logger.
+        """
+        report = self.report()
+        for line in self.summary(report):
+            logger.info(line)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=1)
+        logger.info("Profile saved to " + path)
+
+
+class _Timer:
+    """Exclusive timer, time spent in nested timers is taken off the outer one."""
+
+    __slots__ = ("profiler", "category", "started", "nested")
+
+    def __init__(self, profiler: Profiler, category: str) -> None:
+        self.profiler: Profiler = profiler
+        self.category: str = category
+
+    def __enter__(self) -> None:
+        stack: list[_Timer] = self.profiler._local.__dict__.setdefault("stack", [])
+        stack.append(self)
+        self.nested: float = 0.0
+        self.started: float = time.perf_counter()
+
+    def __exit__(self, *exc: Any) -> None:
+        elapsed = time.perf_counter() - self.started
+        stack: list[_Timer] = self.profiler._local.stack
+        stack.pop()
+        if stack:
+            stack[-1].nested += elapsed
+        self.profiler._add(self.profiler.activity, self.category, elapsed - self.nested)
@@ -0,0 +1,76 @@
+"""Push Counter Module."""
+
+from logging import Logger
+from typing import Union  # TODO: Update Python. Union required for Python <3.10
+
+from automation.clock import Clock
+
+
+class PushCounter:
+    """Push Counter Class.
+
+    Running totals for long pushes (AFK stages, towers, charms). Only counters are kept so memory stays flat however
+    many attempts an overnight push makes.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        logger: Logger,
+        report_every: int = 50,
+        clock: Union[Clock, None] = None,
+    ) -> None:
+        """Initialize the counter.
+
+        Args:
+            name (str): Name used in the log output.
+            logger (Logger): Logger.
+            report_every (int, optional): Log a summary every this many attempts. Defaults to 50.
+            clock (Clock | None, optional): Clock the rate is measured on, real time if None. Defaults to None.
+        """
+        self.name: str = name
+        self.logger: Logger = logger
+        self.report_every: int = report_every
+        self.clock: Clock = clock if clock is not None else Clock()
+        self.attempts: int = 0
+        self.victories: int = 0
+        self.started: float = self.clock.monotonic()
+
+    def attempt(self, victory: bool) -> None:
+        """Count one battle.
+
+        Args:
+            victory (bool): True if the battle was won.
+        """
+        self.attempts += 1
+        if victory:
+            self.victories += 1
+        if self.attempts % self.report_every == 0:
+            self.logger.info(self.summary())
+
+    @property
+    def attempts_per_hour(self) -> float:
+        """Get the attempt rate since the push started.
+
+        Returns:
+            float: Attempts per hour.
+        """
+        hours = (self.clock.monotonic() - self.started) / 3600
+        return self.attempts / hours if hours > 0 else 0.0
+
+    def summary(self) -> str:
+        """Describe the push so far.
+
+        Returns:
+            str: Attempts, victories and attempts per hour.
+        """
+        return (
+            self.name
+            + ": "
+            + str(self.attempts)
+            + " attempts, "
+            + str(self.victories)
+            + " victories, "
+            + str(round(self.attempts_per_hour, 1))
+            + " attempts/hour"
+        )
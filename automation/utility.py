@@ -6,6 +6,9 @@ import logging
 import os
 import sys
 import time
+from typing import Union  # TODO: Update Python. Union required for Python <3.10
+
+from automation.clock import Clock
 
 
 def parse_arguments() -> argparse.Namespace:
@@ -69,6 +72,28 @@ def parse_arguments() -> argparse.Namespace:
         help="Define alternative settings file to load",
     )
     parser.add_argument("--forceprint", action="store_true", help="Force print output")
+    parser.add_argument(
+        "--replay",
+        metavar="DIR",
+        help="Replay a recorded session from DIR instead of connecting to the emulator",
+    )
+    parser.add_argument(
+        "--record",
+        metavar="DIR",
+        help="Record frames, inputs and matches to DIR for replaying later",
+    )
+    parser.add_argument(
+        "--profile",
+        metavar="FILE",
+        help="Time matching, input and waiting per activity and save a JSON report to FILE",
+    )
+    parser.add_argument(
+        "--speed",
+        metavar="FACTOR",
+        type=float,
+        default=1.0,
+        help="Run replays on a virtual clock this many times faster than real time",
+    )
 
     return parser.parse_args()
 
@@ -131,7 +156,9 @@ def init_logging() -> logging.Logger:
     return logger
 
 
-def _wait(seconds: int = 1, multiplier: int = 1) -> None:
+def _wait(
+    seconds: int = 1, multiplier: int = 1, clock: Union[Clock, None] = None
+) -> None:
     """Helper wait function. TODO: Overkill - emulator_client.py:27
     Loading multiplier is defined in settings, it is a decimally notated % multiplier. E.G:
     0.9 will run with 90% of the default wait times
@@ -144,5 +171,9 @@ def _wait(seconds: int = 1, multiplier: int = 1) -> None:
                                     0.9 will run with 90% of the default wait times
                                     2.0 will run with 200% of the default wait times
                                     This is handy for slower machines where we need to wait for sections/images to load. Defaults to 1.
+        clock (Clock | None, optional): Clock to sleep on, real time if None. Defaults to None.
     """
-    time.sleep(seconds * multiplier)
+    if clock is not None:
+        clock.sleep(seconds * multiplier)
+    else:
+        time.sleep(seconds * multiplier)
@@ -3,36 +3,78 @@
 import os
 import scrcpy
 import sys
+import threading
+import time
 from configparser import ConfigParser
+from contextlib import contextmanager
 from functools import partial
 from logging import Logger
 from ppadb.client import Client
 from subprocess import Popen, PIPE
-from typing import Any, Union  # TODO: Update Python. Union required for Python <3.10
+from typing import (
+    Any,
+    Iterator,
+    Union,  # TODO: Update Python. Union required for Python <3.10
+)
 
+from automation.clock import Clock
+from automation.profiler import Profiler
 from automation.utility import _wait
+from client.frame_store import FrameStore
+from client.input_backend import InputBackend
+from client.replay_device import ReplayDevice
 
 
 class EmulatorClient:
     """Emulator Client Class."""
 
-    def __init__(self, config: ConfigParser, logger: Logger) -> None:
+    def __init__(
+        self, config: ConfigParser, logger: Logger, clock: Union[Clock, None] = None
+    ) -> None:
         """Initialize the emulator.
 
         Args:
             config (ConfigParser): Configurations from settings.ini.
             logger (Logger): Logger.
+            clock (Clock | None, optional): Clock for every wait and timestamp, real time if None. Defaults to None.
         """
         self.device: Union[Any, None] = None
         self.config: ConfigParser = config
         self.adb: Client = Client(host="127.0.0.1", port=5037)
         self.cwd: str = os.path.dirname(os.path.abspath(sys.argv[0]))
         self.logger: Logger = logger
+        self.clock: Clock = clock if clock is not None else Clock()
+        self.profiler: Profiler = Profiler()  # Disabled until start_profiling()
 
-        self.wait = partial(
-            _wait, multiplier=self.config.getfloat("ADVANCED", "loading_multiplier")
+        self.loading_multiplier: float = self.config.getfloat(
+            "ADVANCED", "loading_multiplier"
+        )
+        self.wait = self.profiler.wrap(
+            "sleep",
+            partial(_wait, multiplier=self.loading_multiplier, clock=self.clock),
         )  # TODO: Overkill
 
+        # Frames from the scrcpy decoder thread, frames.ready is notified every time a new one arrives
+        self.frames: FrameStore = FrameStore(self.clock)
+        self.frame_watchdog: float = self.config.getfloat(
+            "ADVANCED", "frame_watchdog", fallback=5
+        )  # Seconds between checks that scrcpy is still running, 0 to disable
+        self._scrcpy_lock: threading.Lock = threading.Lock()  # One restart at a time
+
+        self.input_backend: Union[InputBackend, None] = None  # Created once connected
+
+        # Scrcpy frame rate for each policy, activities switch with frame_rate()/set_frame_rate()
+        self.frame_rates: dict[str, int] = {
+            policy: self.config.getint("ADVANCED", "fps_" + policy, fallback=fps)
+            for policy, fps in (("slow", 1), ("normal", 5), ("fast", 15))
+        }
+        self.frame_rate_policy: str = "normal"
+        self._fps_usage: dict[int, list[float]] = {}  # fps -> [seconds, CPU seconds]
+        self._fps_since: tuple[float, float] = (
+            time.perf_counter(),
+            time.process_time(),
+        )
+
     def manage_adb_exe(self, command: str, device_name: str = "127.0.0.1:5555") -> None:
         """Get the right ADB path depending on whether we run from Pycharm or compiled .exe.
 
@@ -103,7 +145,7 @@ class EmulatorClient:
         # After getting device run a test echo command to make sure the device is active and catch any errors
         try:
             # If this command is succesul we're connected! (to something at least..)
-            self.device.shell("test")
+            self.shell("test")
         except Exception as e:
             # Else print the error and description and close after 15 seconds
             self.logger.info("Connection error:")
@@ -129,34 +171,51 @@ class EmulatorClient:
 
         # Once we're connected initialise scrcpy
         try:
-            scrcpy_client = scrcpy.Client(device=self.device.serial)
-            scrcpy_client.max_fps = 5
-            scrcpy_client.bitrate = 16000000
-            scrcpy_client.start(daemon_threaded=True)
-            setattr(self.device, "srccpy", scrcpy_client)
+            if self.config.getboolean("ADVANCED", "economy_mode", fallback=False):
+                self.logger.info(
+                    "Economy mode, streaming at up to "
+                    + self.config.get("ADVANCED", "economy_max_size", fallback="960")
+                    + " pixels"
+                )
+            setattr(
+                self.device,
+                "srccpy",
+                self._start_scrcpy(self.frame_rates[self.frame_rate_policy]),
+            )
         except Exception as e:
             self.logger.info("Error starting scrcpy!: " + str(e))
         finally:
             self.logger.info(
                 "Device " + str(self.device.serial) + " connected successfully"
             )
+        if self.frame_watchdog > 0:
+            threading.Thread(
+                target=self._watch_frames, name="frame-watchdog", daemon=True
+            ).start()
 
-        # Automatic server selection if VN version is installed
-        global_version = self.device.shell(
-            "pm list packages com.farlightgames.igame.gp"
+        # Send input over the scrcpy control socket, falling back to adb if scrcpy isn't running
+        self.input_backend = InputBackend(
+            self.device,
+            self.logger,
+            use_scrcpy=self.config.get("ADVANCED", "input_backend", fallback="scrcpy")
+            == "scrcpy",
+            clock=self.clock,
         )
+
+        # Automatic server selection if VN version is installed
+        global_version = self.shell("pm list packages com.farlightgames.igame.gp")
         if str(global_version[-3:-1]) == "vn":
             self.logger.info("VN Client installed, setting server to VN")
             self.metadata.server = "vn"
 
         # Sometimes the game crashes when launching so we make sure its been running for 5 seconds before continuing
-        self.device.shell("monkey -p " + self.metadata.server + " 1")
+        self.shell("monkey -p " + self.metadata.server + " 1")
         self.wait(
             5
         )  # This long wait doesn't slow anything down as the game takes 60 seconds to load anyway
-        while self.device.shell("pidof " + self.metadata.server) == "":
+        while self.shell("pidof " + self.metadata.server) == "":
             counter += 1
-            self.device.shell("monkey -p " + self.metadata.server + " 1")
+            self.shell("monkey -p " + self.metadata.server + " 1")
             self.wait(
                 5
             )  # This long wait doesn't slow anything down as the game takes 60 seconds to load anyway
@@ -164,3 +223,217 @@ class EmulatorClient:
                 self.logger.warning(
                     "Attempting to launch AFK Journey, but cannot detect AFK Journey running"
                 )
+
+    def _start_scrcpy(self, max_fps: int) -> scrcpy.Client:
+        """Start a scrcpy client, the caller attaches it to the device as 'srccpy'.
+
+        Args:
+            max_fps (int): Frame rate to stream at.
+
+        Returns:
+            scrcpy.Client: Running client.
+        """
+        scrcpy_client = scrcpy.Client(device=self.device.serial)
+        scrcpy_client.max_fps = max_fps
+        scrcpy_client.bitrate = 16000000
+        if self.config.getboolean("ADVANCED", "economy_mode", fallback=False):
+            # Stream (and decode) fewer pixels, matching follows whatever size the frames come in at.
+            # max_width is passed to the server as max_size, so it limits the long side
+            max_size: int = self.config.getint(
+                "ADVANCED", "economy_max_size", fallback=960
+            )
+            scrcpy_client.max_width = max_size
+            scrcpy_client.bitrate = round(16000000 * (max_size / 1920) ** 2)
+        scrcpy_client.add_listener(scrcpy.EVENT_FRAME, self._on_frame)
+        scrcpy_client.start(daemon_threaded=True)
+        return scrcpy_client
+
+    def restart_scrcpy(self, reason: str) -> bool:
+        """Replace the scrcpy client with a new one at the current frame rate.
+
+        The old client's last frame stays readable until the new stream has delivered its first frame, so nobody
+        matches against an empty screen in between. Input falls back to adb meanwhile.
+
+        Args:
+            reason (str): Why, for the log.
+
+        Returns:
+            bool: True if the new stream is delivering frames.
+        """
+        if self.device is None or isinstance(self.device, ReplayDevice):
+            return True  # Replays serve frames on demand
+
+        with self._scrcpy_lock:
+            self.logger.debug("Restarting scrcpy, " + reason)
+            frames_received: int = self.frames_received
+            old_client = getattr(self.device, "srccpy", None)
+            if old_client is not None:
+                old_client.stop()
+            try:
+                new_client = self._start_scrcpy(
+                    self.frame_rates[self.frame_rate_policy]
+                )
+            except Exception as e:
+                self.logger.info("Error restarting scrcpy!: " + str(e))
+                return False
+            received: bool = self.wait_for_frame(frames_received, 5)
+            setattr(self.device, "srccpy", new_client)
+            return received
+
+    def _watch_frames(self) -> None:
+        """Restart scrcpy if it has stopped, runs on its own thread.
+
+        A dead decoder thread doesn't always clear 'alive' (scrcpy re-raises socket errors on that thread), so the
+        thread is checked too. Going quiet isn't enough, a static screen sends no frames and a restart holds the
+        scrcpy lock for seconds, blocking frame rate changes and pushing input back to adb.
+        """
+        while True:
+            self.clock.sleep(self.frame_watchdog, account=False)
+            client = getattr(self.device, "srccpy", None)
+            if client is None or self._scrcpy_lock.locked():
+                continue  # Not connected yet, or a restart is already under way
+            decoder: Union[threading.Thread, None] = getattr(
+                client, "stream_loop_thread", None
+            )
+            if not getattr(client, "alive", False):
+                self.logger.info("Scrcpy stopped, restarting it")
+            elif decoder is not None and not decoder.is_alive():
+                self.logger.info("Scrcpy decoder thread died, restarting it")
+            else:
+                continue
+            self.restart_scrcpy("watchdog")
+
+    def set_frame_rate(self, policy: str) -> None:
+        """Switch the scrcpy frame rate policy.
+
+        'fast' when reacting quickly matters (joining team-ups), 'slow' when nothing needs watching for a while
+        (long battles) and 'normal' otherwise, the frame rates are set in settings.ini. Scrcpy can only change
+        frame rate on startup so this restarts it, costing a second or two, and is a no-op if the rate is the same.
+
+        Args:
+            policy (str): String "slow", "normal" or "fast".
+        """
+        fps: int = self.frame_rates[policy]
+        previous: int = self.frame_rates[self.frame_rate_policy]
+        self.frame_rate_policy = policy
+        if fps == previous:
+            return
+        self._account_frame_rate(previous)
+        self.restart_scrcpy(
+            "frame rate " + str(previous) + " -> " + str(fps) + " fps (" + policy + ")"
+        )
+
+    @contextmanager
+    def frame_rate(self, policy: str) -> Iterator[None]:
+        """Use a frame rate policy for a block, restoring the previous one afterwards.
+
+        Args:
+            policy (str): String "slow", "normal" or "fast".
+        """
+        previous: str = self.frame_rate_policy
+        self.set_frame_rate(policy)
+        try:
+            yield
+        finally:
+            self.set_frame_rate(previous)
+
+    def _account_frame_rate(self, fps: int) -> None:
+        """Add the time and CPU used since the last frame rate change to a frame rate.
+
+        Args:
+            fps (int): Frame rate that was in use.
+        """
+        now, cpu = time.perf_counter(), time.process_time()
+        usage = self._fps_usage.setdefault(fps, [0.0, 0.0])
+        usage[0] += now - self._fps_since[0]
+        usage[1] += cpu - self._fps_since[1]
+        self._fps_since = (now, cpu)
+
+    def frame_rate_stats(self) -> dict[int, dict[str, float]]:
+        """Return time spent and CPU used at each frame rate.
+
+        CPU is for the whole bot process, so decoding plus matching, as a percentage of one core.
+
+        Returns:
+            dict[int, dict[str, float]]: Seconds and CPU percent per frame rate.
+        """
+        self._account_frame_rate(self.frame_rates[self.frame_rate_policy])
+        return {
+            fps: {
+                "seconds": round(seconds, 1),
+                "cpu_percent": round(100 * cpu / seconds, 1) if seconds > 0 else 0.0,
+            }
+            for fps, (seconds, cpu) in sorted(self._fps_usage.items())
+        }
+
+    def connect_replay(self, directory: str) -> None:
+        """Stand a recorded session in for the emulator, see client/replay_device.py.
+
+        Args:
+            directory (str): Replay directory with script.json and the frames.
+        """
+        self.device = ReplayDevice(
+            directory, self.logger, package=self.metadata.server, clock=self.clock
+        )
+        self.device.srccpy.add_listener(scrcpy.EVENT_FRAME, self._on_frame)
+        self.device.srccpy.start()
+        self.input_backend = InputBackend(
+            self.device, self.logger, use_scrcpy=False, clock=self.clock
+        )
+        self.logger.info("Replaying " + directory)
+
+    def _on_frame(self, frame: Union[Any, None]) -> None:
+        """Scrcpy frame listener, runs on the decoder thread.
+
+        Args:
+            frame (Any | None): Decoded frame, None when scrcpy polled without new data.
+        """
+        if frame is None:
+            return
+        self.frames.publish(frame)
+
+    @property
+    def frames_received(self) -> int:
+        """Get the number of frames received, which is also the sequence id of the latest one.
+
+        Returns:
+            int: Frames received.
+        """
+        return self.frames.sequence
+
+    @property
+    def frame_time(self) -> float:
+        """Get when the latest frame arrived.
+
+        Returns:
+            float: Arrival time on self.clock, 0.0 before the first frame.
+        """
+        latest = self.frames.latest
+        return latest.time if latest is not None else 0.0
+
+    def wait_for_frame(self, after: int, timeout: float) -> bool:
+        """Block until scrcpy delivers a frame newer than the given count.
+
+        Args:
+            after (int): Value of frames_received to wait past.
+            timeout (float): Maximum time to wait in seconds.
+
+        Returns:
+            bool: True if a new frame arrived, False on timeout.
+        """
+        with self.profiler.timer("sleep"), self.frames.ready:
+            return self.clock.wait_for(
+                self.frames.ready, lambda: self.frames.sequence > after, timeout
+            )
+
+    def shell(self, command: str) -> str:
+        """Run an adb shell command on the device.
+
+        Args:
+            command (str): Shell command.
+
+        Returns:
+            str: Command output.
+        """
+        with self.profiler.timer("shell"):
+            return self.device.shell(command)
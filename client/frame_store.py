@@ -0,0 +1,56 @@
+"""Frame Store Module."""
+
+import numpy as np
+import threading
+from typing import (
+    NamedTuple,
+    Union,  # TODO: Update Python. Union required for Python <3.10
+)
+
+from automation.clock import Clock
+
+
+class Frame(NamedTuple):
+    """A decoded frame with its sequence id and arrival time."""
+
+    image: np.ndarray  # Read-only BGR
+    sequence: int
+    time: float  # On the store's clock
+
+
+class FrameStore:
+    """Frame Store Class.
+
+    Double buffer between the scrcpy decoder thread and the bot. The decoder writes each frame into a fresh array
+    (the back buffer), publish() freezes it read-only and swaps it in as the front frame with a single reference
+    assignment. Readers take the front frame without a lock or a copy, always get a complete frame, and the frame
+    they hold never changes under them however many arrive afterwards.
+    """
+
+    def __init__(self, clock: Clock) -> None:
+        """Initialize the store.
+
+        Args:
+            clock (Clock): Clock frames are timestamped on.
+        """
+        self.clock: Clock = clock
+        self.ready: threading.Condition = threading.Condition()  # Notified on publish
+        self.latest: Union[Frame, None] = None
+        self.sequence: int = 0  # Frames published so far
+
+    def publish(self, image: np.ndarray) -> Frame:
+        """Make a newly decoded frame the latest one.
+
+        Args:
+            image (np.ndarray): BGR frame, the store takes ownership and makes it read-only.
+
+        Returns:
+            Frame: Published frame.
+        """
+        image.flags.writeable = False
+        with self.ready:
+            self.sequence += 1
+            frame = Frame(image, self.sequence, self.clock.monotonic())
+            self.latest = frame
+            self.ready.notify_all()
+        return frame
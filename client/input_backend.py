@@ -0,0 +1,237 @@
+"""Input Backend Module."""
+
+import scrcpy
+import time
+from logging import Logger
+from typing import Any, Union  # TODO: Update Python. Union required for Python <3.10
+
+from automation.clock import Clock
+
+
+class InputBackend:
+    """Input Backend Class.
+
+    Sends taps, swipes and long presses straight down the scrcpy control socket, which costs a socket write rather
+    than an adb shell spawning 'input' on the device. Falls back to adb whenever scrcpy isn't running, and keeps
+    per path tap latency figures so the two can be compared.
+    """
+
+    # Coordinates we work in, scrcpy wants them in its stream resolution and adb in device pixels
+    frame_size: tuple[int, int] = (1080, 1920)
+
+    def __init__(
+        self,
+        device: Any,
+        logger: Logger,
+        use_scrcpy: bool = True,
+        clock: Union[Clock, None] = None,
+    ) -> None:
+        """Initialize the backend.
+
+        Args:
+            device (Any): ADB device, with the scrcpy client attached as 'srccpy' once it is running.
+            logger (Logger): Logger.
+            use_scrcpy (bool, optional): Prefer the scrcpy control socket over adb. Defaults to True.
+            clock (Clock | None, optional): Clock for swipe and hold timing, real time if None. Defaults to None.
+        """
+        self.device: Any = device
+        self.logger: Logger = logger
+        self.clock: Clock = clock if clock is not None else Clock()
+        self.use_scrcpy: bool = use_scrcpy
+        self.device_size: tuple[int, int] = (1080, 1920)  # Set by resolution_check()
+        self.latencies: dict[str, list[float]] = {"scrcpy": [], "adb": []}
+        self._held: Union[tuple[int, int], None] = (
+            None  # Stream coordinates of a press not yet released
+        )
+
+    def _scrcpy(self) -> Union[Any, None]:
+        """Get the scrcpy client if we can send input through it.
+
+        Returns:
+            Any | None: Scrcpy client, None if it isn't running.
+        """
+        if self.use_scrcpy is False:
+            return None
+        client = getattr(self.device, "srccpy", None)
+        if (
+            client is None
+            or not getattr(client, "alive", False)
+            or getattr(client, "control_socket", None) is None
+            or getattr(client, "resolution", None) is None
+        ):
+            return None
+        return client
+
+    def _scale(self, client: Any, x: int, y: int) -> tuple[int, int]:
+        """Map frame coordinates to the scrcpy stream resolution.
+
+        Args:
+            client (Any): Scrcpy client.
+            x (int): X coordinate.
+            y (int): Y coordinate.
+
+        Returns:
+            tuple[int, int]: X, Y in stream coordinates.
+        """
+        width, height = client.resolution
+        return (
+            round(x * width / self.frame_size[0]),
+            round(y * height / self.frame_size[1]),
+        )
+
+    def _to_device(self, x: int, y: int) -> tuple[int, int]:
+        """Map frame coordinates to device pixels for adb input.
+
+        Args:
+            x (int): X coordinate.
+            y (int): Y coordinate.
+
+        Returns:
+            tuple[int, int]: X, Y in device pixels.
+        """
+        if self.device_size == self.frame_size:
+            return x, y
+        width, height = self.device_size
+        return (
+            round(x * width / self.frame_size[0]),
+            round(y * height / self.frame_size[1]),
+        )
+
+    def _record(self, path: str, started: float) -> None:
+        """Store the latency of one tap.
+
+        Args:
+            path (str): String "scrcpy" or "adb".
+            started (float): perf_counter() from before the input was sent.
+        """
+        self.latencies[path].append((time.perf_counter() - started) * 1000)
+        if len(self.latencies[path]) > 1000:
+            del self.latencies[path][:500]
+
+    def tap(self, x: int, y: int) -> None:
+        """Tap the screen.
+
+        Args:
+            x (int): X coordinate.
+            y (int): Y coordinate.
+        """
+        started: float = time.perf_counter()
+        client = self._scrcpy()
+        if client is not None:
+            try:
+                sx, sy = self._scale(client, x, y)
+                client.control.touch(sx, sy, scrcpy.ACTION_DOWN)
+                client.control.touch(sx, sy, scrcpy.ACTION_UP)
+                self._record("scrcpy", started)
+                return
+            except OSError as e:
+                self.logger.debug("Scrcpy input failed, using adb: " + str(e))
+
+        self.device.input_tap(*self._to_device(x, y))
+        self._record("adb", started)
+
+    def swipe(self, x1: int, y1: int, x2: int, y2: int, duration: int) -> None:
+        """Swipe across the screen, blocking for the duration like 'input swipe'.
+
+        Args:
+            x1 (int): Initial X coordinate.
+            y1 (int): Initial Y coordinate.
+            x2 (int): End X coordinate.
+            y2 (int): End Y coordinate.
+            duration (int): Swipe duration in milliseconds.
+        """
+        client = self._scrcpy()
+        if client is not None:
+            try:
+                steps: int = max(
+                    1, duration // 16
+                )  # Roughly one move per display frame
+                sx, sy = self._scale(client, x1, y1)
+                client.control.touch(sx, sy, scrcpy.ACTION_DOWN)
+                for step in range(1, steps + 1):
+                    self.clock.sleep(duration / 1000 / steps)
+                    sx, sy = self._scale(
+                        client,
+                        x1 + (x2 - x1) * step // steps,
+                        y1 + (y2 - y1) * step // steps,
+                    )
+                    client.control.touch(sx, sy, scrcpy.ACTION_MOVE)
+                client.control.touch(sx, sy, scrcpy.ACTION_UP)
+                return
+            except OSError as e:
+                self.logger.debug("Scrcpy input failed, using adb: " + str(e))
+
+        self.device.input_swipe(
+            *self._to_device(x1, y1), *self._to_device(x2, y2), duration
+        )
+
+    def press(self, x: int, y: int) -> bool:
+        """Put a finger down and leave it there until release(), without blocking.
+
+        Only possible over scrcpy, 'input' on the device can't hold a touch between commands.
+
+        Args:
+            x (int): X coordinate.
+            y (int): Y coordinate.
+
+        Returns:
+            bool: True if the press started, False if scrcpy isn't available.
+        """
+        client = self._scrcpy()
+        if client is None:
+            return False
+        try:
+            sx, sy = self._scale(client, x, y)
+            client.control.touch(sx, sy, scrcpy.ACTION_DOWN)
+        except OSError as e:
+            self.logger.debug("Scrcpy press failed: " + str(e))
+            return False
+        self._held = (sx, sy)
+        return True
+
+    def release(self) -> None:
+        """Lift the finger put down by press()."""
+        if self._held is None:
+            return
+        sx, sy = self._held
+        self._held = None
+        client = self._scrcpy()
+        if client is None:
+            return
+        try:
+            client.control.touch(sx, sy, scrcpy.ACTION_UP)
+        except OSError as e:
+            self.logger.debug("Scrcpy release failed: " + str(e))
+
+    def long_press(self, x: int, y: int, duration: int) -> None:
+        """Press and hold a point, blocking for the duration.
+
+        Args:
+            x (int): X coordinate.
+            y (int): Y coordinate.
+            duration (int): Hold time in milliseconds.
+        """
+        if self.press(x, y):
+            self.clock.sleep(duration / 1000)
+            self.release()
+        else:
+            self.swipe(x, y, x, y, duration)
+
+    def stats(self) -> dict[str, dict[str, Union[int, float]]]:
+        """Return tap latency figures for each path.
+
+        Returns:
+            dict[str, dict[str, int | float]]: Count, mean, p50 and max latency in milliseconds per path.
+        """
+        report: dict[str, dict[str, Union[int, float]]] = {}
+        for path, latencies in self.latencies.items():
+            if not latencies:
+                continue
+            ordered = sorted(latencies)
+            report[path] = {
+                "taps": len(ordered),
+                "mean_ms": round(sum(ordered) / len(ordered), 2),
+                "p50_ms": round(ordered[len(ordered) // 2], 2),
+                "max_ms": round(ordered[-1], 2),
+            }
+        return report
@@ -0,0 +1,225 @@
+"""Replay Device Module.
+
+Offline stand in for the emulator, driven by recorded frames and a script of which frame follows which input.
+
+A replay directory holds the frames as images plus a script.json:
+
+    {
+        "start": "main_map.png",
+        "rules": [
+            {"frame": "main_map.png", "tap": [400, 1775, 100, 100], "next": "battle_modes.png"},
+            {"frame": "battle.png", "after": 3, "next": "victory.png"}
+        ]
+    }
+
+A 'tap' rule fires when a tap (or the start of a swipe) lands inside its X, Y, width, height box while its frame is
+showing, an 'after' rule fires once its frame has been showing for that many seconds. Inputs that match no rule
+leave the frame as it is.
+"""
+
+import cv2
+import json
+import numpy as np
+import os
+from logging import Logger
+from typing import (
+    Any,
+    Callable,
+    Union,  # TODO: Update Python. Union required for Python <3.10
+)
+
+from automation.clock import Clock
+
+
+class ReplayClient:
+    """Replay Client Class.
+
+    Implements the parts of scrcpy.Client we use, serving frames from a replay directory.
+    """
+
+    def __init__(
+        self, directory: str, script: dict[str, Any], logger: Logger, clock: Clock
+    ) -> None:
+        """Initialize the client.
+
+        Args:
+            directory (str): Replay directory.
+            script (dict[str, Any]): Parsed script.json.
+            logger (Logger): Logger.
+            clock (Clock): Clock timed rules run on.
+        """
+        self.directory: str = directory
+        self.logger: Logger = logger
+        self.clock: Clock = clock
+        self.rules: list[dict[str, Any]] = script.get("rules", [])
+        self.current: str = script["start"]
+        self.shown_at: float = clock.monotonic()
+        self.alive: bool = True
+        # No control channel, input goes through ReplayDevice
+        self.control_socket: None = None
+        self.resolution: tuple[int, int] = (1080, 1920)
+        self.unmatched: int = 0
+        self._frames: dict[str, np.ndarray] = {}
+        self._listeners: list[Callable[[Any], None]] = []
+
+    @property
+    def last_frame(self) -> np.ndarray:
+        """Get the frame currently showing, advancing any timed rules first.
+
+        Returns:
+            np.ndarray: BGR frame.
+        """
+        self.advance()
+        return self.frame(self.current)
+
+    def advance(self) -> None:
+        """Fire the timed rule for the frame showing if its time has come, the new frame goes to the listeners."""
+        for rule in self.rules:
+            if (
+                rule["frame"] == self.current
+                and "after" in rule
+                and self.clock.monotonic() - self.shown_at >= rule["after"]
+            ):
+                self.show(rule["next"])
+                break
+
+    def frame(self, name: str) -> np.ndarray:
+        """Load a frame, decoding each one only once.
+
+        Args:
+            name (str): Frame file name.
+
+        Returns:
+            np.ndarray: BGR frame.
+        """
+        if name not in self._frames:
+            frame = cv2.imread(os.path.join(self.directory, name), cv2.IMREAD_COLOR)
+            if frame is None:
+                raise FileNotFoundError("Replay frame not found: " + name)
+            self._frames[name] = frame
+        return self._frames[name]
+
+    def show(self, name: str) -> None:
+        """Switch to another frame and tell the frame listeners.
+
+        Args:
+            name (str): Frame file name.
+        """
+        self.logger.debug("Replay: " + self.current + " -> " + name)
+        self.current = name
+        self.shown_at = self.clock.monotonic()
+        frame = self.frame(name)
+        for listener in self._listeners:
+            listener(frame)
+
+    def input(self, x: int, y: int) -> None:
+        """Apply the first tap rule matching an input.
+
+        Args:
+            x (int): X coordinate.
+            y (int): Y coordinate.
+        """
+        self.advance()  # Let any timed rule fire before the input lands
+        for rule in self.rules:
+            if rule["frame"] == self.current and "tap" in rule:
+                rx, ry, rw, rh = rule["tap"]
+                if rx <= x < rx + rw and ry <= y < ry + rh:
+                    self.show(rule["next"])
+                    return
+        self.unmatched += 1
+        self.logger.debug("Replay: no rule for " + str((x, y)) + " on " + self.current)
+
+    def add_listener(self, cls: str, listener: Callable[[Any], None]) -> None:
+        """Register a frame listener, same as scrcpy.Client.
+
+        Args:
+            cls (str): Event name, only frame events are sent.
+            listener (Callable[[Any], None]): Called with each new frame.
+        """
+        self._listeners.append(listener)
+
+    def start(self, threaded: bool = False, daemon_threaded: bool = False) -> None:
+        """Announce the starting frame, later frames are served on demand."""
+        frame = self.frame(self.current)
+        for listener in self._listeners:
+            listener(frame)
+
+    def stop(self) -> None:
+        """Stop serving frames."""
+        self.alive = False
+
+
+class ReplayDevice:
+    """Replay Device Class.
+
+    Implements the parts of the ppadb device we use (shell, input_tap, input_swipe and serial), with a ReplayClient
+    attached as 'srccpy' in place of the scrcpy client.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        logger: Logger,
+        package: str = "",
+        clock: Union[Clock, None] = None,
+    ) -> None:
+        """Initialize the device.
+
+        Args:
+            directory (str): Replay directory with script.json and the frames.
+            logger (Logger): Logger.
+            package (str, optional): Game package name reported as installed. Defaults to "".
+            clock (Clock | None, optional): Clock timed rules run on, real time if None. Defaults to None.
+        """
+        with open(os.path.join(directory, "script.json"), encoding="utf-8") as f:
+            script: dict[str, Any] = json.load(f)
+
+        self.serial: str = "replay:" + os.path.basename(os.path.normpath(directory))
+        self.package: str = package
+        self.srccpy: ReplayClient = ReplayClient(
+            directory, script, logger, clock if clock is not None else Clock()
+        )
+        self.inputs: int = 0
+
+    def shell(self, command: str) -> str:
+        """Answer the adb shell commands the bot sends.
+
+        Args:
+            command (str): Shell command.
+
+        Returns:
+            str: Canned output.
+        """
+        if command == "wm size":
+            width, height = self.srccpy.resolution
+            return "Physical size: " + str(width) + "x" + str(height) + "\n"
+        if command.startswith("pm list packages"):
+            return "package:" + self.package + "\n"
+        if command.startswith("pidof"):
+            return "1\n"
+        return ""
+
+    def input_tap(self, x: int, y: int) -> None:
+        """Tap the replayed screen.
+
+        Args:
+            x (int): X coordinate.
+            y (int): Y coordinate.
+        """
+        self.inputs += 1
+        self.srccpy.input(x, y)
+
+    def input_swipe(
+        self, x1: int, y1: int, x2: int, y2: int, duration: Union[int, None] = None
+    ) -> None:
+        """Swipe the replayed screen, rules match on the start point.
+
+        Args:
+            x1 (int): Initial X coordinate.
+            y1 (int): Initial Y coordinate.
+            x2 (int): End X coordinate.
+            y2 (int): End Y coordinate.
+            duration (int | None, optional): Swipe duration in milliseconds, ignored. Defaults to None.
+        """
+        self.inputs += 1
+        self.srccpy.input(x1, y1)
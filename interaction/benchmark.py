@@ -0,0 +1,573 @@
+"""Template Matching Benchmark Module.
+
+Times every template under img/ against a corpus of recorded 1080x1920 frames, searching the same regions the
+automation searches them in, and compares the result with a saved JSON baseline so matching regressions show up
+before they ship.
+
+    python -m interaction.benchmark FRAMES [--baseline benchmark.json] [--update]
+    python -m interaction.benchmark RECORDING --economy 960
+    python -m interaction.benchmark --startup
+
+FRAMES is any directory of screenshots, e.g. a --record directory (its frames/ are searched recursively). The
+regions are read from the locate calls in automation/ and interaction/, img/manifest.json and the scene anchors
+in AFKJMetadata, templates never searched with a region get the full frame.
+
+With --economy the recorded match queries in RECORDING/trace.jsonl (see --record) are run again on frames shrunk
+to the economy_max_size stream, to check the confidences still hold before turning economy_mode on.
+
+With --startup it times loading the templates from the loose PNGs against loading a freshly compiled
+templates.bundle, the way the release build starts.
+"""
+
+import argparse
+import ast
+import cv2
+import json
+import numpy as np
+import os
+import sys
+import tempfile
+import time
+from logging import Logger
+from PIL import Image
+from pyscreeze import Box, ImageNotFoundException
+from pyscreeze import locate as pyscreeze_locate
+from typing import (
+    Any,
+    Callable,
+    Union,  # TODO: Update Python. Union required for Python <3.10
+)
+
+from automation import utility
+from interaction import matching
+from interaction.template_bundle import TemplateBundle
+from interaction.template_manifest import TemplateManifest
+from interaction.template_registry import TemplateRegistry
+from metadata.afkj_metadata import AFKJMetadata
+
+FULL_FRAME: tuple[int, int, int, int] = (0, 0, 1080, 1920)
+BACKENDS: tuple[str, ...] = ("pyscreeze", "opencv", "grayscale", "downscaled")
+
+
+def template_regions(
+    sources: list[str],
+    metadata: AFKJMetadata,
+    templates: set[str],
+    manifest: Union[TemplateManifest, None] = None,
+) -> dict[str, set[tuple[int, int, int, int]]]:
+    """Find the regions each template is searched in.
+
+    Looks for calls whose first argument is a template name (or a list of them) and resolves their 'region'
+    keyword when it is a literal or an entry of AFKJMetadata.regions. Calls without one use the template's
+    manifest region, anything else counts as the full frame.
+
+    Args:
+        sources (list[str]): Python files to scan.
+        metadata (AFKJMetadata): Metadata holding the named regions and scene anchors.
+        templates (set[str]): Known template names.
+        manifest (TemplateManifest | None, optional): Template defaults with its regions set. Defaults to None.
+
+    Returns:
+        dict[str, set[tuple[int, int, int, int]]]: Regions per template, every template has at least one.
+    """
+    regions: dict[str, set[tuple[int, int, int, int]]] = {}
+
+    def resolve(node: Union[ast.expr, None]) -> tuple[int, int, int, int]:
+        if node is None:
+            return FULL_FRAME
+        if isinstance(node, ast.Subscript) and isinstance(node.slice, ast.Constant):
+            return metadata.regions.get(node.slice.value, FULL_FRAME)
+        try:
+            value = ast.literal_eval(node)
+        except (ValueError, TypeError):
+            return FULL_FRAME
+        return tuple(value) if len(value) == 4 else FULL_FRAME
+
+    for source in sources:
+        with open(source, encoding="utf-8") as f:
+            tree = ast.parse(f.read())
+        for node in ast.walk(tree):
+            if not isinstance(node, ast.Call) or not node.args:
+                continue
+            first = node.args[0]
+            names = first.elts if isinstance(first, ast.List) else [first]
+            images = [
+                name.value
+                for name in names
+                if isinstance(name, ast.Constant) and name.value in templates
+            ]
+            if not images:
+                continue
+            keyword = next((k.value for k in node.keywords if k.arg == "region"), None)
+            region = resolve(keyword)
+            for image in images:
+                searched = region
+                if manifest is not None and keyword is None:
+                    searched = manifest.apply(image, None, None, None)[2]
+                regions.setdefault(image, set()).add(searched)
+
+    for anchors in metadata.scenes.values():
+        for image, region, _ in anchors:
+            regions.setdefault(image, set()).add(tuple(region))
+
+    for image in templates:
+        regions.setdefault(image, {FULL_FRAME})
+    return regions
+
+
+def load_frames(directory: str, logger: Logger) -> list[np.ndarray]:
+    """Load every 1080x1920 screenshot under a directory.
+
+    Args:
+        directory (str): Directory to search recursively.
+        logger (Logger): Logger.
+
+    Returns:
+        list[np.ndarray]: BGR frames.
+    """
+    frames: list[np.ndarray] = []
+    for root, _, files in os.walk(directory):
+        for file in sorted(files):
+            if not file.endswith(".png"):
+                continue
+            frame = cv2.imread(os.path.join(root, file), cv2.IMREAD_COLOR)
+            if frame is None or frame.shape[:2] != (1920, 1080):
+                logger.info("Skipping " + file + ", not a 1080x1920 screenshot")
+                continue
+            frames.append(frame)
+    return frames
+
+
+def backend(
+    name: str, registry: TemplateRegistry, scale: float = 0.5
+) -> Callable[[str, np.ndarray, tuple[int, int, int, int]], Any]:
+    """Build a locate function for one matching backend.
+
+    Args:
+        name (str): 'pyscreeze' (the original PIL path), 'opencv' (cv2 on the region of interest), 'grayscale' or
+                    'downscaled' (both the region and the template resized by 'scale').
+        registry (TemplateRegistry): Preloaded templates.
+        scale (float, optional): Resize factor for the downscaled backend. Defaults to 0.5.
+
+    Returns:
+        Callable[[str, np.ndarray, tuple[int, int, int, int]], Any]: locate(image, frame, region).
+    """
+    if name == "pyscreeze":
+
+        def pyscreeze(
+            image: str, frame: np.ndarray, region: tuple[int, int, int, int]
+        ) -> Union[Box, None]:
+            try:
+                return pyscreeze_locate(
+                    registry.get(image),
+                    Image.fromarray(frame[:, :, ::-1]),
+                    grayscale=False,  # pyscreeze defaults to grayscale, the bot never relies on that
+                    confidence=0.9,
+                    region=region,
+                )
+            except (
+                ImageNotFoundException
+            ):  # Newer pyscreeze raises rather than returning None
+                return None
+
+        return pyscreeze
+    if name == "opencv":
+        return lambda image, frame, region: matching.locate(
+            registry.get(image), frame, 0.9, False, region
+        )
+    if name == "grayscale":
+        return lambda image, frame, region: matching.locate(
+            registry.get(image, grayscale=True), frame, 0.9, True, region
+        )
+
+    small: dict[str, np.ndarray] = {}
+
+    def downscaled(
+        image: str, frame: np.ndarray, region: tuple[int, int, int, int]
+    ) -> Union[Box, None]:
+        if image not in small:
+            template = registry.get(image)
+            small[image] = cv2.resize(
+                template,
+                (
+                    max(1, round(template.shape[1] * scale)),
+                    max(1, round(template.shape[0] * scale)),
+                ),
+                interpolation=cv2.INTER_AREA,
+            )
+        haystack, _, _ = matching.crop(frame, region)
+        haystack = cv2.resize(
+            haystack, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA
+        )
+        return matching.locate(small[image], haystack, 0.9)
+
+    return downscaled
+
+
+def percentile(samples: list[float], q: float) -> float:
+    """Get a percentile of some timings.
+
+    Args:
+        samples (list[float]): Timings in seconds.
+        q (float): Percentile, 0 to 100.
+
+    Returns:
+        float: Percentile in milliseconds.
+    """
+    return round(float(np.percentile(samples, q)) * 1000, 3)
+
+
+def run(
+    frames: list[np.ndarray],
+    regions: dict[str, set[tuple[int, int, int, int]]],
+    registry: TemplateRegistry,
+    backends: list[str],
+    repeat: int = 3,
+) -> dict[str, dict[str, dict[str, float]]]:
+    """Time every template and region against every frame on every backend.
+
+    Args:
+        frames (list[np.ndarray]): BGR frames.
+        regions (dict[str, set[tuple[int, int, int, int]]]): Regions per template.
+        registry (TemplateRegistry): Preloaded templates.
+        backends (list[str]): Backends to time.
+        repeat (int, optional): Times each locate is repeated per frame. Defaults to 3.
+
+    Returns:
+        dict[str, dict[str, dict[str, float]]]: backend -> 'template@x,y,w,h' -> p50_ms, p99_ms and per_sec,
+                                                with the backend's totals under 'all'.
+    """
+    results: dict[str, dict[str, dict[str, float]]] = {}
+
+    for name in backends:
+        locate = backend(name, registry)
+        results[name] = {}
+        everything: list[float] = []
+        for image in sorted(regions):
+            template = registry.get(image)
+            for region in sorted(regions[image]):
+                if template.shape[0] > region[3] or template.shape[1] > region[2]:
+                    continue  # Would raise, same as in the bot
+                samples: list[float] = []
+                for frame in frames:
+                    for _ in range(repeat):
+                        start = time.perf_counter()
+                        locate(image, frame, region)
+                        samples.append(time.perf_counter() - start)
+                results[name][image + "@" + ",".join(map(str, region))] = {
+                    "p50_ms": percentile(samples, 50),
+                    "p99_ms": percentile(samples, 99),
+                    "per_sec": round(len(samples) / sum(samples), 1),
+                }
+                everything.extend(samples)
+        if everything:
+            results[name]["all"] = {
+                "p50_ms": percentile(everything, 50),
+                "p99_ms": percentile(everything, 99),
+                "per_sec": round(len(everything) / sum(everything), 1),
+            }
+    return results
+
+
+def regressions(
+    results: dict[str, dict[str, dict[str, float]]],
+    baseline: dict[str, dict[str, dict[str, float]]],
+    tolerance: float = 0.25,
+    floor_ms: float = 0.2,
+) -> list[str]:
+    """Compare timings with a baseline.
+
+    Args:
+        results (dict[str, dict[str, dict[str, float]]]): New timings from run().
+        baseline (dict[str, dict[str, dict[str, float]]]): Saved timings from run().
+        tolerance (float, optional): Allowed p50 slowdown as a fraction. Defaults to 0.25.
+        floor_ms (float, optional): Slowdowns smaller than this are timer noise and ignored. Defaults to 0.2.
+
+    Returns:
+        list[str]: One line per template that got slower.
+    """
+    slower: list[str] = []
+    for name, timings in results.items():
+        for key, timing in timings.items():
+            before = baseline.get(name, {}).get(key)
+            if before is None:
+                continue
+            if (
+                timing["p50_ms"] > before["p50_ms"] * (1 + tolerance)
+                and timing["p50_ms"] - before["p50_ms"] > floor_ms
+            ):
+                slower.append(
+                    name
+                    + " "
+                    + key
+                    + ": p50 "
+                    + str(before["p50_ms"])
+                    + "ms -> "
+                    + str(timing["p50_ms"])
+                    + "ms"
+                )
+    return slower
+
+
+def startup(root: str, logger: Logger, repeat: int) -> dict[str, list[float]]:
+    """Time loading the templates and manifest from the loose PNGs and from a bundle.
+
+    Args:
+        root (str): Path to the img/ directory.
+        logger (Logger): Logger.
+        repeat (int): Loads per path.
+
+    Returns:
+        dict[str, list[float]]: Load timings in seconds per path, 'touched' includes reading every pixel once.
+    """
+    timings: dict[str, list[float]] = {"png": [], "bundle": [], "bundle touched": []}
+    with tempfile.TemporaryDirectory() as directory:
+        path: str = os.path.join(directory, TemplateBundle.FILE)
+        TemplateBundle.compile(root, path)
+        pngs: int = sum(
+            os.path.getsize(os.path.join(d, f))
+            for d, _, files in os.walk(root)
+            for f in files
+            if f.endswith(".png")
+        )
+        logger.info(
+            "Bundle is "
+            + str(round(os.path.getsize(path) / 1024))
+            + " KB for "
+            + str(round(pngs / 1024))
+            + " KB of PNGs"
+        )
+
+        for _ in range(repeat):
+            start: float = time.perf_counter()
+            manifest = TemplateManifest(os.path.join(root, "manifest.json"), logger)
+            TemplateRegistry(root, logger, manifest.scales()).preload()
+            timings["png"].append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            bundle = TemplateBundle(path)
+            bundle.changed(root)  # Startup checks no template was edited since
+            manifest = TemplateManifest(path, logger, bundle.manifest)
+            registry = TemplateRegistry(root, logger, manifest.scales(), bundle)
+            registry.preload()
+            timings["bundle"].append(time.perf_counter() - start)
+            # The first match on each template pages its pixels in
+            for image in registry.names():
+                registry.get(image).sum()
+            timings["bundle touched"].append(time.perf_counter() - start)
+            del bundle, registry  # Unmap before the directory is removed
+    return timings
+
+
+def validate_scale(
+    directory: str, registry: TemplateRegistry, max_size: int, logger: Logger
+) -> int:
+    """Re-run a recording's match queries on frames shrunk to a smaller stream size.
+
+    Args:
+        directory (str): Recording directory with trace.jsonl and frames/.
+        registry (TemplateRegistry): Preloaded templates, rescaled in place.
+        max_size (int): Long side of the smaller stream, like economy_max_size.
+        logger (Logger): Logger.
+
+    Returns:
+        int: Number of queries whose result changed.
+    """
+    frames: dict[str, np.ndarray] = {}
+    # image -> [queries, lost, gained, moved, lowest score on a kept match]
+    results: dict[str, list[float]] = {}
+
+    with open(os.path.join(directory, "trace.jsonl"), encoding="utf-8") as trace:
+        for line in trace:
+            event = json.loads(line)
+            if event["event"] != "match" or event["frame"] is None:
+                continue
+            if event["frame"] not in frames:
+                frame = cv2.imread(
+                    os.path.join(directory, "frames", event["frame"] + ".png")
+                )
+                factor = max_size / max(frame.shape[:2])
+                frames[event["frame"]] = cv2.resize(
+                    frame, None, fx=factor, fy=factor, interpolation=cv2.INTER_AREA
+                )
+            frame = frames[event["frame"]]
+            scale = (frame.shape[1] / 1080, frame.shape[0] / 1920)
+            registry.rescale(scale)
+
+            try:
+                box, score = matching.find(
+                    registry.get(event["image"], event["grayscale"]),
+                    frame,
+                    event["confidence"],
+                    event["grayscale"],
+                    matching.scale_region(tuple(event["region"]), scale),
+                )
+            except ValueError:  # Template no longer fits the shrunk region
+                box, score = None, 0.0
+
+            counts = results.setdefault(event["image"], [0, 0, 0, 0, 1.0])
+            counts[0] += 1
+            if event["box"] is not None and box is None:
+                counts[1] += 1
+            elif event["box"] is None and box is not None:
+                counts[2] += 1
+            elif box is not None:
+                x, y, _, _ = matching.unscale_box(box, scale)
+                # A few pixels either way is rounding, further is a different match
+                if abs(x - event["box"][0]) > 4 or abs(y - event["box"][1]) > 4:
+                    counts[3] += 1
+                counts[4] = min(counts[4], score)
+
+    changed: int = 0
+    for image, (queries, lost, gained, moved, lowest) in sorted(results.items()):
+        changed += lost + gained + moved
+        if lost or gained or moved:
+            logger.info(
+                image
+                + ": "
+                + str(queries)
+                + " queries, "
+                + str(lost)
+                + " lost, "
+                + str(gained)
+                + " gained, "
+                + str(moved)
+                + " moved, lowest kept score "
+                + str(round(lowest, 3))
+            )
+    logger.info(
+        str(sum(r[0] for r in results.values()))
+        + " recorded queries on "
+        + str(len(frames))
+        + " frames at "
+        + str(max_size)
+        + " pixels, "
+        + str(changed)
+        + " changed"
+    )
+    return changed
+
+
+def main() -> int:
+    """Run the benchmark from the command line.
+
+    Returns:
+        int: Exit code, 1 if matching got slower than the baseline or economy results changed.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark template matching")
+    parser.add_argument(
+        "frames",
+        metavar="FRAMES",
+        nargs="?",
+        help="Directory of 1080x1920 screenshots",
+    )
+    parser.add_argument(
+        "--baseline",
+        metavar="FILE",
+        default="benchmark.json",
+        help="Baseline to compare with, written if it doesn't exist yet",
+    )
+    parser.add_argument("--update", action="store_true", help="Overwrite the baseline")
+    parser.add_argument(
+        "--backends", nargs="+", choices=BACKENDS, default=list(BACKENDS)
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Locates per frame")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="Allowed p50 slowdown, 0.25 = 25%%",
+    )
+    parser.add_argument(
+        "--economy",
+        metavar="MAX_SIZE",
+        type=int,
+        help="Validate a recording's matches at this stream size instead of timing",
+    )
+    parser.add_argument(
+        "--startup",
+        action="store_true",
+        help="Time loading the templates from PNGs and from a bundle instead",
+    )
+    args = parser.parse_args()
+    if args.frames is None and not args.startup:
+        parser.error("FRAMES is required")
+    logger: Logger = utility.init_logging()
+
+    cwd: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if args.startup:
+        timings = startup(os.path.join(cwd, "img"), logger, max(args.repeat, 5))
+        logger.info("templates        p50 ms      max ms")
+        for name, samples in timings.items():
+            logger.info(
+                name.ljust(15)
+                + str(percentile(samples, 50)).rjust(8)
+                + str(percentile(samples, 100)).rjust(12)
+            )
+        return 0
+
+    metadata = AFKJMetadata("global")
+    manifest = TemplateManifest(os.path.join(cwd, "img", "manifest.json"), logger)
+    manifest.regions = metadata.regions
+    registry = TemplateRegistry(os.path.join(cwd, "img"), logger, manifest.scales())
+    registry.preload()
+    if args.economy:
+        return 1 if validate_scale(args.frames, registry, args.economy, logger) else 0
+
+    templates: set[str] = set(registry.names())
+    sources: list[str] = [
+        os.path.join(cwd, package, file)
+        for package in ("automation", "interaction")
+        for file in os.listdir(os.path.join(cwd, package))
+        if file.endswith(".py")
+    ]
+    regions = template_regions(sources, metadata, templates, manifest)
+
+    frames = load_frames(args.frames, logger)
+    if not frames:
+        logger.info("No frames found in " + args.frames)
+        return 1
+    logger.info(
+        "Timing "
+        + str(sum(len(r) for r in regions.values()))
+        + " template/region pairs on "
+        + str(len(frames))
+        + " frames"
+    )
+
+    results = run(frames, regions, registry, args.backends, args.repeat)
+    logger.info("backend       p50 ms   p99 ms   locates/sec")
+    for name in args.backends:
+        total = results[name].get("all")
+        if total is not None:
+            logger.info(
+                name.ljust(12)
+                + str(total["p50_ms"]).rjust(8)
+                + str(total["p99_ms"]).rjust(9)
+                + str(total["per_sec"]).rjust(14)
+            )
+    for name in args.backends:
+        slowest = sorted(
+            ((t["p99_ms"], key) for key, t in results[name].items() if key != "all"),
+            reverse=True,
+        )[:5]
+        logger.debug(name + " slowest: " + str(slowest))
+
+    if os.path.exists(args.baseline) and not args.update:
+        with open(args.baseline, encoding="utf-8") as f:
+            slower = regressions(results, json.load(f), args.tolerance)
+        for line in slower:
+            logger.info("Slower than baseline: " + line)
+        if slower:
+            return 1
+        logger.info("No regressions against " + args.baseline)
+        return 0
+
+    with open(args.baseline, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=1, sort_keys=True)
+    logger.info("Baseline saved to " + args.baseline)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,97 +1,180 @@
 """Emulator Interactions Module."""
 
+import atexit
+import cv2
 import io
 import numpy as np
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from configparser import ConfigParser
 from datetime import datetime
 from logging import Logger
 from PIL import Image
-from pyscreeze import Box, locate, locateAll
+from pyscreeze import Box
+from pyscreeze import locate as pyscreeze_locate
+from pyscreeze import locateAll as pyscreeze_locate_all
 from typing import (
     Any,
     Literal,
     Union,  # TODO: Update Python. Union required for Python <3.10
 )
 
+from automation.clock import Clock
 from client.emulator_client import EmulatorClient
+from client.replay_device import ReplayDevice
+from interaction import matching
+from interaction.frame_data import FrameData
+from interaction.location_index import LocationIndex
+from interaction.matching import Match
+from interaction.match_cache import MatchCache
+from interaction.navigation import Edge, NavigationGraph
+from interaction.scene_classifier import SceneClassifier
+from interaction.session_recorder import SessionRecorder
+from interaction.template_bundle import TemplateBundle
+from interaction.template_manifest import TemplateManifest
+from interaction.screen_stability import ScreenStability
+from interaction.template_registry import TemplateRegistry
 
 
 class EmulatorInteractions(EmulatorClient):
     """Emulator Interactions Class."""
 
-    def __init__(self, config: ConfigParser, logger: Logger) -> None:
+    def __init__(
+        self, config: ConfigParser, logger: Logger, clock: Union[Clock, None] = None
+    ) -> None:
         """Initialize the interactions.
 
         Args:
             config (ConfigParser): Configurations from settings.ini.
             logger (Logger): Logger.
+            clock (Clock | None, optional): Clock for every wait and timestamp, real time if None. Defaults to None.
         """
-        super().__init__(config, logger)
+        super().__init__(config, logger, clock)
+        # Templates and manifest in one memory mapped file in release builds, see interaction/template_bundle.py
+        bundle: Union[TemplateBundle, None] = TemplateBundle.open(
+            os.path.join(self.cwd, "img"), logger
+        )
+        # Default region, confidence, colour mode and capture scale per template, see interaction/template_manifest.py
+        self.manifest: TemplateManifest = TemplateManifest(
+            os.path.join(self.cwd, "img", "manifest.json"),
+            logger,
+            bundle.manifest if bundle is not None else None,
+        )
+        self.templates: TemplateRegistry = TemplateRegistry(
+            os.path.join(self.cwd, "img"), logger, self.manifest.scales(), bundle
+        )
+        self.templates.preload()  # Decode everything once rather than on every locate
+        self.matching_backend: str = self.config.get(
+            "ADVANCED", "matching_backend", fallback="opencv"
+        )  # 'opencv', 'pyscreeze' or 'compare'
+        self.frame_id: int = 0  # Incremented for every new frame scrcpy gives us
+        self.match_cache: MatchCache = MatchCache()
+        self._frame: Union[np.ndarray, None] = None
+        self.frame_data: Union[FrameData, None] = (
+            None  # Grayscale, crops etc. of _frame, shared by every lookup
+        )
+        # Frame pixels per 1080x1920 pixel, set by resolution_check(). Everything outside of matching works in
+        # 1080x1920 coordinates, templates are scaled once and regions and results are mapped at the boundary
+        self.scale: tuple[float, float] = (1.0, 1.0)
+        self.stability: ScreenStability = ScreenStability()
+        # Move on once the screen settles after an input, with 'seconds' as the upper bound. Off until validated on
+        # real devices, a quiet moment during a loading pause can look settled
+        self.settle_on_stable: bool = self.config.getboolean(
+            "ADVANCED", "settle_on_stable", fallback=False
+        )
+        self._pre_input_signature: Union[np.ndarray, None] = None
+        self.input_time: float = (
+            0.0  # When the last input finished sending, on self.clock
+        )
+        self._input_unseen: bool = (
+            False  # No frame newer than the last input has been read yet
+        )
+        self.fresh_frame_timeout: float = self.config.getfloat(
+            "ADVANCED", "fresh_frame_timeout", fallback=0.3
+        )  # How long the first frame read after an input waits for the screen to show it
+        self.matcher_pool: ThreadPoolExecutor = ThreadPoolExecutor(
+            max_workers=os.cpu_count() or 4, thread_name_prefix="matcher"
+        )  # cv2.matchTemplate releases the GIL so batched searches run in parallel
+        atexit.register(self.matcher_pool.shutdown, cancel_futures=True)
+        self.scene_classifier: Union[SceneClassifier, None] = (
+            None  # Set by the game automation class from its metadata scenes
+        )
+        self.navigation: Union[NavigationGraph, None] = (
+            None  # Set by the game automation class from its metadata routes
+        )
+        self.recorder: Union[SessionRecorder, None] = None  # Set by start_recording()
+        self.locations: Union[LocationIndex, None] = None
+        if self.config.getboolean("ADVANCED", "location_prior", fallback=True):
+            # Search around where each template was found before first, see interaction/location_index.py
+            self.locations = LocationIndex(
+                os.path.join(self.cwd, "locations.json"), logger
+            )
+            atexit.register(self._save_locations)
 
     def wait_until_game_active(self) -> None:
         """
-        Confirms that the game has loaded by checking for the 'Guild' text.
-        We press a few buttons to navigate back if needed.
+        Confirms that the game has loaded by checking we're on the main map.
+        We press a button to navigate back if needed, one at a time until the main map shows.
         """
         self.logger.info("Waiting for game to load..")
-        timeoutcounter = 0
+        # Neutral location for closing reward pop ups etc, should never be an in game button here
+        neutral: tuple[int, int] = (420, 50)
+        deadline: float = self.clock.monotonic() + 240  # 4 minutes
 
         while True:
-            if self.is_visible(
-                "labels/guild", seconds=0, region=(730, 1880, 80, 25), confidence=0.8
-            ):
+            if self.current_scene() == "main_map":
                 self.logger.info("Game Loaded!\n")
                 break
-            self.click_xy(
-                420, 50, seconds=1
-            )  # Neutral location for closing reward pop ups etc, should never be an in game button here
-            buttons = ["buttons/back", "buttons/back2", "buttons/claim"]
-            self.click_array(buttons, suppress=True, delay=1)
-            timeoutcounter += 1
-            if timeoutcounter > 15:  # This is nearly 4 minutes currently
+            self._step_back(
+                ["buttons/back", "buttons/back2", "buttons/claim"], neutral=neutral
+            )
+            if self.clock.monotonic() > deadline:
                 self.logger.info(
-                    "Timed out while loading! Guild button was not found so if everything looks good please check in game language is set to English."
+                    "Timed out while loading! The main map (Sun and Stars label) was not found so if everything looks good please check in game language is set to English."
                 )
                 self.save_screenshot("loading_timeout")
                 sys.exit()
 
     def resolution_check(self) -> None:
         """
-        Verify emulator resolution
-        TODO: Add support for variable resolution
+        Verify emulator resolution, and scale templates and input to it once so any 16:9 resolution works
         """
-        resolution_lines = self.device.shell("wm size").split("\n")
+        resolution_lines = self.shell("wm size").split("\n")
         physical_resolution = resolution_lines[0].split(" ")
         override_resolution = resolution_lines[1].split(" ")
 
         if override_resolution[0] != "":
-            if (
-                not str(override_resolution[2]).strip() == "1920x1080"
-                and not str(override_resolution[2]).strip() == "1080x1920"
-            ):
-                self.logger.info(
-                    "Unsupported Override Resolution! ("
-                    + str(override_resolution[2]).strip()
-                    + "). Please change your resolution to 1920x1080"
-                )
-                self.logger.info(
-                    "We will try and scale the image but non-16:9 formats will likely have issues with image detection"
-                )
+            kind, resolution = "Override", str(override_resolution[2]).strip()
         else:
-            if (
-                not str(physical_resolution[2]).strip() == "1920x1080"
-                and not str(physical_resolution[2]).strip() == "1080x1920"
-            ):
-                self.logger.info(
-                    "Unsupported Physical Resolution! ("
-                    + str(physical_resolution[2]).strip()
-                    + "). Please change your resolution to 1920x1080"
-                )
-                self.logger.info(
-                    "We will try and scale the image but non-16:9 formats will likely have issues with image detection"
-                )
+            kind, resolution = "Physical", str(physical_resolution[2]).strip()
+        # Portrait is checked below, here we only care about the size
+        width, height = sorted(int(value) for value in resolution.split("x"))
+        if width * 16 != height * 9:
+            self.logger.info(
+                "Unsupported "
+                + kind
+                + " Resolution! ("
+                + resolution
+                + "). Please change your resolution to 1920x1080"
+            )
+            self.logger.info(
+                "We will try and scale the image but non-16:9 formats will likely have issues with image detection"
+            )
+        self.input_backend.device_size = (width, height)
+
+        # Scrcpy may stream smaller than the device, so scale matching to the frames we actually get
+        frame_width, frame_height = sorted(self.get_frame_array().shape[:2])
+        self.scale = (frame_width / 1080, frame_height / 1920)
+        self.templates.rescale(self.scale)
+        if self.scale != (1.0, 1.0):
+            self.logger.info(
+                "Matching at "
+                + str(frame_width)
+                + "x"
+                + str(frame_height)
+                + ", templates scaled to fit"
+            )
 
         # This will throw an execption if we are in Landscape mode as it'll exceed the screen dimensions using the region
         try:
@@ -114,8 +197,135 @@ class EmulatorInteractions(EmulatorClient):
             y (int): Y coordinate.
             seconds (int, optional): Wait time. Defaults to 1.
         """
-        self.device.input_tap(x, y)
-        self.wait(seconds)
+        self._tap(x, y)
+        self._settle(seconds)
+
+    def _tap(self, x: int, y: int) -> None:
+        """Tap the device, remembering what the screen looked like beforehand so _settle() can tell when it reacted.
+
+        Args:
+            x (int): X coordinate.
+            y (int): Y coordinate.
+        """
+        self._pre_input_signature = self._signature()
+        if self.recorder is not None:
+            self.recorder.event("tap", self.frame_id, x=x, y=y)
+        with self.profiler.timer("input"):
+            self._sending_input()
+            self.input_backend.tap(x, y)
+            self._sent_input()
+
+    def _swipe(self, x1: int, y1: int, x2: int, y2: int, duration: int) -> None:
+        """Swipe on the device, remembering what the screen looked like beforehand.
+
+        Args:
+            x1 (int): Initial X coordinate.
+            y1 (int): Initial Y coordinate.
+            x2 (int): End X coordinate.
+            y2 (int): End Y coordinate.
+            duration (int): Swipe duration in milliseconds.
+        """
+        self._pre_input_signature = self._signature()
+        if self.recorder is not None:
+            self.recorder.event(
+                "swipe", self.frame_id, x1=x1, y1=y1, x2=x2, y2=y2, duration=duration
+            )
+        with self.profiler.timer("input"):
+            self._sending_input()
+            self.input_backend.swipe(x1, y1, x2, y2, duration)
+            self._sent_input()
+
+    def _sending_input(self) -> None:
+        """Note that an input is going out, so the next frame read waits for one that can show it."""
+        # Replays apply input synchronously, their frame is already up to date when the input returns
+        self._input_unseen = not isinstance(self.device, ReplayDevice)
+
+    def _sent_input(self) -> None:
+        """Stamp the input once the backend has sent it.
+
+        Stamped after rather than before as adb input takes 100-300ms, a frame decoded during the send would count
+        as newer than the input while still showing the screen from before it.
+        """
+        self.input_time = self.clock.monotonic()
+
+    def _signature(self) -> Union[np.ndarray, None]:
+        """Stability signature of the current frame.
+
+        Returns:
+            np.ndarray | None: Signature, None if stability detection is disabled.
+        """
+        if self.settle_on_stable is False:
+            return None
+        return self._frame_signature(self.get_frame_array())
+
+    def _frame_signature(self, frame: np.ndarray) -> np.ndarray:
+        """Stability signature of a frame, made once per frame from the second pyramid level.
+
+        Args:
+            frame (np.ndarray): BGR frame from get_frame_array().
+
+        Returns:
+            np.ndarray: Signature.
+        """
+        data: FrameData = self._frame_data(frame)
+        return data.derive("signature", lambda: self.stability.signature(data.level(2)))
+
+    def _settle(self, seconds: float) -> None:
+        """Wait after an input, moving on as soon as the screen has reacted and settled.
+
+        Falls back to the plain wait if there was no input since the last settle or stability detection is disabled.
+
+        Args:
+            seconds (float): Upper bound on the wait, scaled by loading_multiplier.
+        """
+        before: Union[np.ndarray, None] = self._pre_input_signature
+        self._pre_input_signature = None
+
+        if before is None or seconds <= 0:
+            self.wait(seconds)
+            return
+        self.wait_until_stable(before, seconds)
+
+    def wait_until_stable(
+        self, before: np.ndarray, timeout: float, quiet: float = 0.4
+    ) -> bool:
+        """Wait until the screen changes from a signature and then stops changing.
+
+        If the screen never changes we wait the whole timeout, exactly as a fixed wait would, in case the change
+        is just slow to start (loading screens etc).
+
+        Args:
+            before (np.ndarray): Signature from before the input.
+            timeout (float): Maximum wait in seconds, scaled by loading_multiplier.
+            quiet (float, optional): How long the screen has to stay still to count as settled. Defaults to 0.4.
+
+        Returns:
+            bool: True if the screen settled early, False if we waited the full timeout.
+        """
+        deadline: float = self.clock.monotonic() + timeout * self.loading_multiplier
+        changed: bool = False
+        last: np.ndarray = before
+        still_since: float = 0.0
+
+        while True:
+            frames_received: int = self.frames_received
+            now: float = self.clock.monotonic()
+            current: np.ndarray = self._frame_signature(self.get_frame_array())
+
+            if changed is False:
+                if self.stability.changed(before, current):
+                    changed = True
+                    last, still_since = current, now
+            elif not self.stability.stable(last, current):
+                last, still_since = current, now
+            elif now - still_since >= quiet:
+                return True
+
+            remaining: float = deadline - self.clock.monotonic()
+            if remaining <= 0:
+                return False
+            # Scrcpy sends nothing while the screen is static, so a timeout here also means 'still'
+            self.wait_for_frame(frames_received, min(remaining, quiet))
 
     def click_location(self, location: str, seconds: int = 1) -> None:
         """Click a predetermined location.
@@ -132,29 +342,24 @@ class EmulatorInteractions(EmulatorClient):
     def return_xy(
         self,
         image: str,
-        confidence: float = 0.9,
-        grayscale: bool = False,
-        region: tuple[int, int, int, int] = (0, 0, 1080, 1920),
+        confidence: Union[float, None] = None,
+        grayscale: Union[bool, None] = None,
+        region: Union[tuple[int, int, int, int], None] = None,
     ) -> Union[tuple[int, int], tuple[Literal[0], Literal[0]]]:
         """Return X, Y coordinates of image.
 
         Args:
             image (str): Path to image to search.
-            confidence (float, optional): Pyscreeze locate confidence. Defaults to 0.9.
-            grayscale (bool, optional): Pyscreeze locate grayscale. Defaults to False.
-            region (tuple[int, int, int, int], optional): Search region. Defaults to (0, 0, 1080, 1920).
+            confidence (float | None, optional): Pyscreeze locate confidence. Defaults to None, the manifest value or 0.9.
+            grayscale (bool | None, optional): Pyscreeze locate grayscale. Defaults to None, the manifest value or False.
+            region (tuple[int, int, int, int] | None, optional): Search region. Defaults to None, the manifest region or the full frame.
 
         Returns:
             tuple[int, int] | tuple[Literal[0], Literal[0]]: X, Y coordinates.
         """
-        screenshot: Image.Image = self.get_frame()
-        search: Image.Image = Image.open(os.path.join(self.cwd, "img", image + ".png"))
-        result: Box | None = locate(
-            search,
-            screenshot,
-            grayscale=grayscale,
-            confidence=confidence,
-            region=region,
+        frame: np.ndarray = self.get_frame_array()
+        result: Box | None = self._locate(
+            image, frame, confidence=confidence, grayscale=grayscale, region=region
         )
 
         if result is not None:
@@ -166,51 +371,46 @@ class EmulatorInteractions(EmulatorClient):
     def click(
         self,
         image: str,
-        confidence: float = 0.9,
+        confidence: Union[float, None] = None,
         seconds: int = 1,
         retry: int = 3,
         suppress: bool = False,
-        grayscale: bool = False,
-        region: tuple[int, int, int, int] = (0, 0, 1080, 1920),
+        grayscale: Union[bool, None] = None,
+        region: Union[tuple[int, int, int, int], None] = None,
     ) -> None:
         """Perform a click on an image.
 
         Args:
             image (str): Path to image to search.
-            confidence (float, optional): Pyscreeze locate confidence. Defaults to 0.9.
+            confidence (float | None, optional): Pyscreeze locate confidence. Defaults to None, the manifest value or 0.9.
             seconds (int, optional): Wait time. Defaults to 1.
             retry (int, optional): Retry attempts. Defaults to 3.
             suppress (bool, optional): Suppress logging messages. Defaults to False.
-            grayscale (bool, optional): Pyscreeze locate grayscale. Defaults to False.
-            region (tuple[int, int, int, int], optional): Search region. Defaults to (0, 0, 1080, 1920).
+            grayscale (bool | None, optional): Pyscreeze locate grayscale. Defaults to None, the manifest value or False.
+            region (tuple[int, int, int, int] | None, optional): Search region. Defaults to None, the manifest region or the full frame.
         """
         counter: int = 0
-        screenshot: Image.Image = self.get_frame()
-        search: Image.Image = Image.open(os.path.join(self.cwd, "img", image + ".png"))
-        result: Box | None = locate(
-            search,
-            screenshot,
-            grayscale=grayscale,
-            confidence=confidence,
-            region=region,
+        frame: np.ndarray = self.get_frame_array()
+        result: Box | None = self._locate(
+            image, frame, confidence=confidence, grayscale=grayscale, region=region
         )
 
         if result is None and retry != 1:
             while counter < retry:
-                screenshot = self.get_frame()
-                result = locate(
-                    search,
-                    screenshot,
-                    grayscale=grayscale,
+                frame = self.get_frame_array()
+                result = self._locate(
+                    image,
+                    frame,
                     confidence=confidence,
+                    grayscale=grayscale,
                     region=region,
                 )
                 if result is not None:
                     x, y, w, h = result
                     x_center: int = round(x + w / 2)
                     y_center: int = round(y + h / 2)
-                    self.device.input_tap(x_center, y_center)
-                    self.wait(seconds)
+                    self._tap(x_center, y_center)
+                    self._settle(seconds)
                     return
                 if suppress is not True:
                     self.logger.info(
@@ -227,8 +427,8 @@ class EmulatorInteractions(EmulatorClient):
             x, y, w, h = result
             x_center = round(x + w / 2)
             y_center = round(y + h / 2)
-            self.device.input_tap(x_center, y_center)
-            self.wait(seconds)
+            self._tap(x_center, y_center)
+            self._settle(seconds)
         else:
             if suppress is not True:
                 self.logger.info("Image:" + image + " not found!")
@@ -237,51 +437,46 @@ class EmulatorInteractions(EmulatorClient):
     def click_last(
         self,
         image: str,
-        confidence: float = 0.9,
+        confidence: Union[float, None] = None,
         seconds: int = 1,
         retry: int = 3,
         suppress: bool = False,
-        grayscale: bool = False,
-        region: tuple[int, int, int, int] = (0, 0, 1080, 1920),
+        grayscale: Union[bool, None] = None,
+        region: Union[tuple[int, int, int, int], None] = None,
     ) -> None:
         """Pyscreeze's locate() searchs top down, sometimes we want to click the last found image (i.e. the latest join button in chat).
 
         Args:
             image (str): Path to image to search.
-            confidence (float, optional): Pyscreeze locate confidence. Defaults to 0.9.
+            confidence (float | None, optional): Pyscreeze locate confidence. Defaults to None, the manifest value or 0.9.
             seconds (int, optional): Wait time. Defaults to 1.
             retry (int, optional): Retry attempts. Defaults to 3.
             suppress (bool, optional): Suppress logging messages. Defaults to False.
-            grayscale (bool, optional): Pyscreeze locate grayscale. Defaults to False.
-            region (tuple[int, int, int, int], optional): Search region. Defaults to (0, 0, 1080, 1920).
+            grayscale (bool | None, optional): Pyscreeze locate grayscale. Defaults to None, the manifest value or False.
+            region (tuple[int, int, int, int] | None, optional): Search region. Defaults to None, the manifest region or the full frame.
         """
         counter: int = 0
-        screenshot: Image.Image = self.get_frame()
-        search: Image.Image = Image.open(os.path.join(self.cwd, "img", image + ".png"))
-        result: np.Generator[Box, None, None] = locateAll(
-            search,
-            screenshot,
-            grayscale=grayscale,
-            confidence=confidence,
-            region=region,
+        frame: np.ndarray = self.get_frame_array()
+        result: list[Box] = self._locate_all(
+            image, frame, confidence=confidence, grayscale=grayscale, region=region
         )
 
         if result is None and retry != 1:
             while counter < retry:
-                screenshot = self.get_frame()
-                result = locate(
-                    search,
-                    screenshot,
-                    grayscale=grayscale,
+                frame = self.get_frame_array()
+                result = self._locate(
+                    image,
+                    frame,
                     confidence=confidence,
+                    grayscale=grayscale,
                     region=region,
                 )
                 if result is not None:
                     x, y, w, h = result
                     x_center = round(x + w / 2)
                     y_center = round(y + h / 2)
-                    self.device.input_tap(x_center, y_center)
-                    self.wait(seconds)
+                    self._tap(x_center, y_center)
+                    self._settle(seconds)
                     return
                 if suppress is not True:
                     self.logger.info(
@@ -300,8 +495,8 @@ class EmulatorInteractions(EmulatorClient):
                 x, y, w, h = list_results[-1]
                 x_center = round(x + w / 2)
                 y_center = round(y + h / 2)
-                self.device.input_tap(x_center, y_center)
-                self.wait(seconds)
+                self._tap(x_center, y_center)
+                self._settle(seconds)
             else:
                 self.logger.info("click_last error!")
         else:
@@ -312,37 +507,35 @@ class EmulatorInteractions(EmulatorClient):
     def click_array(
         self,
         images: list[str],
-        confidence: float = 0.9,
+        confidence: Union[float, None] = None,
         seconds: int = 1,
         suppress: bool = False,
-        grayscale: bool = False,
-        region: tuple[int, int, int, int] = (0, 0, 1080, 1920),
+        grayscale: Union[bool, None] = None,
+        region: Union[tuple[int, int, int, int], None] = None,
         delay: int = 0,
     ) -> None:
         """Clicks an array of images.
 
         Args:
             images (list[str]): Paths to images to search.
-            confidence (float, optional): Pyscreeze locate confidence. Defaults to 0.9.
+            confidence (float | None, optional): Pyscreeze locate confidence. Defaults to None, the manifest value or 0.9.
             seconds (int, optional): Wait time. Defaults to 1.
             suppress (bool, optional): Suppress logging messages. Defaults to False.
-            grayscale (bool, optional): Pyscreeze locate grayscale. Defaults to False.
-            region (tuple[int, int, int, int], optional): Search region. Defaults to (0, 0, 1080, 1920).
+            grayscale (bool | None, optional): Pyscreeze locate grayscale. Defaults to None, the manifest value or False.
+            region (tuple[int, int, int, int] | None, optional): Search region. Defaults to None, the manifest region or the full frame.
             delay (int, optional): Pause between images else we try and click multiple at once. Defaults to 0.
         """
-        screenshot: Image.Image = self.get_frame()
+        frame: np.ndarray = self.get_frame_array()
+        # Search every image in one pass, then walk them in priority order
+        found: dict[str, Box] = {
+            match.image: match.box
+            for match in self._find_array(
+                images, frame, confidence=confidence, grayscale=grayscale, region=region
+            )
+        }
 
         for image in images:
-            search: Image.Image = Image.open(
-                os.path.join(self.cwd, "img", image + ".png")
-            )
-            result: Box | None = locate(
-                search,
-                screenshot,
-                grayscale=grayscale,
-                confidence=confidence,
-                region=region,
-            )
+            result: Box | None = found.get(image)
 
             if result is not None:
                 if suppress is not False:
@@ -350,8 +543,8 @@ class EmulatorInteractions(EmulatorClient):
                 x, y, w, h = result
                 x_center: int = round(x + w / 2)
                 y_center: int = round(y + h / 2)
-                self.device.input_tap(x_center, y_center)
-                self.wait(seconds)
+                self._tap(x_center, y_center)
+                self._settle(seconds)
                 return
             else:
                 if suppress is not True:
@@ -371,52 +564,114 @@ class EmulatorInteractions(EmulatorClient):
             duration (int, optional): Swipe duration in milliseconds. Defaults to 100.
             seconds (int, optional): Wait time. Defaults to 1.
         """
-        self.device.input_swipe(x1, y1, x2, y2, duration)
-        self.wait(seconds)
+        self._swipe(x1, y1, x2, y2, duration)
+        self._settle(seconds)
+
+    def hold(
+        self,
+        x: int,
+        y: int,
+        duration: int,
+        image: Union[str, None] = None,
+        region: Union[tuple[int, int, int, int], None] = None,
+        confidence: Union[float, None] = None,
+        seconds: int = 1,
+    ) -> None:
+        """Press and hold a point, watching frames during the hold and letting go as soon as the image disappears.
+
+        Falls back to a blocking hold for the full duration when input goes through adb.
+
+        Args:
+            x (int): X coordinate.
+            y (int): Y coordinate.
+            duration (int): Maximum hold time in milliseconds.
+            image (str | None, optional): Release once this image is no longer visible. Defaults to None.
+            region (tuple[int, int, int, int] | None, optional): Search region for the image. Defaults to None, the manifest region or the full frame.
+            confidence (float | None, optional): Locate confidence. Defaults to None, the manifest value or 0.9.
+            seconds (int, optional): Wait time after releasing. Defaults to 1.
+        """
+        self._pre_input_signature = self._signature()
+        if self.recorder is not None:
+            self.recorder.event("hold", self.frame_id, x=x, y=y, duration=duration)
+        with self.profiler.timer("input"):
+            self._sending_input()
+            pressed: bool = self.input_backend.press(x, y)
+            if not pressed:
+                self.input_backend.long_press(x, y, duration)
+            self._sent_input()
+        if not pressed:
+            self._settle(seconds)
+            return
+
+        deadline: float = self.clock.monotonic() + duration / 1000
+        missing: int = 0
+        try:
+            while True:
+                frames_received: int = self.frames_received
+                if image is not None:
+                    found = self._locate(
+                        image,
+                        self.get_frame_array(),
+                        confidence=confidence,
+                        region=region,
+                    )
+                    # Two frames in a row so a button flickering while pressed doesn't end the hold
+                    missing = missing + 1 if found is None else 0
+                    if missing >= 2:
+                        self.logger.debug("Releasing early, " + image + " is gone")
+                        break
+
+                remaining: float = deadline - self.clock.monotonic()
+                if remaining <= 0:
+                    break
+                self.wait_for_frame(frames_received, min(remaining, 0.5))
+        finally:
+            with self.profiler.timer("input"):
+                self.input_backend.release()
+        self._settle(seconds)
 
     def is_visible(
         self,
         image: str,
-        confidence: float = 0.9,
+        confidence: Union[float, None] = None,
         seconds: int = 1,
         retry: int = 3,
         click: bool = False,
-        region: tuple[int, int, int, int] = (0, 0, 1080, 1920),
+        region: Union[tuple[int, int, int, int], None] = None,
         x_relative: int = 0,
         y_relative: int = 0,
-        grayscale: bool = False,
+        grayscale: Union[bool, None] = None,
     ) -> Union[None, bool]:
         """Attempt to locate an image.
 
         Args:
             image (str): Path to image to search.
-            confidence (float, optional): Pyscreeze locate confidence. Defaults to 0.9.
+            confidence (float | None, optional): Pyscreeze locate confidence. Defaults to None, the manifest value or 0.9.
             seconds (int, optional): Wait time. Defaults to 1.
             retry (int, optional): Retry attempts. Defaults to 3.
             click (bool, optional): Click the image. Defaults to False.
-            region (tuple[int, int, int, int], optional): Search region. Defaults to (0, 0, 1080, 1920).
+            region (tuple[int, int, int, int] | None, optional): Search region. Defaults to None, the manifest region or the full frame.
             x_relative (int, optional): X coordinate relative to resolution. Defaults to 0.
             y_relative (int, optional): Y coordinate relative to resolution. Defaults to 0.
-            grayscale (bool, optional): Pyscreeze locate grayscale. Defaults to False.
+            grayscale (bool | None, optional): Pyscreeze locate grayscale. Defaults to None, the manifest value or False.
 
         Returns:
             None | bool: Returns True if the image is found, False if not.
         """
         counter: int = 0
-        screenshot: Image.Image = self.get_frame()
-        search: Image.Image = Image.open(os.path.join(self.cwd, "img", image + ".png"))
-        res: Box | None = locate(
-            search, screenshot, grayscale=False, confidence=confidence, region=region
+        frame: np.ndarray = self.get_frame_array()
+        res: Box | None = self._locate(
+            image, frame, confidence=confidence, grayscale=False, region=region
         )
 
         if res is None and retry != 1:
             while counter < retry:
-                screenshot = self.get_frame()
-                res = locate(
-                    search,
-                    screenshot,
-                    grayscale=grayscale,
+                frame = self.get_frame_array()
+                res = self._locate(
+                    image,
+                    frame,
                     confidence=confidence,
+                    grayscale=grayscale,
                     region=region,
                 )
                 if res is not None:
@@ -424,8 +679,8 @@ class EmulatorInteractions(EmulatorClient):
                         x, y, w, h = res
                         x_center: int = round(x + w / 2) + x_relative
                         y_center: int = round(y + h / 2) + y_relative
-                        self.device.input_tap(x_center, y_center)
-                    self.wait(seconds)
+                        self._tap(x_center, y_center)
+                    self._settle(seconds)
                     return True
                 self.wait()
                 counter = counter + 1
@@ -434,8 +689,8 @@ class EmulatorInteractions(EmulatorClient):
                 x, y, w, h = res
                 x_center = round((x + x_relative) + w / 2)
                 y_center = round((y + y_relative) + h / 2)
-                self.device.input_tap(x_center, y_center)
-            self.wait(seconds)
+                self._tap(x_center, y_center)
+            self._settle(seconds)
             return True
         else:
             return False
@@ -443,68 +698,697 @@ class EmulatorInteractions(EmulatorClient):
     def is_visible_array(
         self,
         images: list[str],
-        confidence: float = 0.9,
+        confidence: Union[float, None] = None,
         seconds: int = 1,
         retry: int = 3,
         click: bool = False,
-        region: tuple[int, int, int, int] = (0, 0, 1080, 1920),
+        region: Union[tuple[int, int, int, int], None] = None,
         x_relative: int = 0,
         y_relative: int = 0,
-        grayscale: bool = False,
+        grayscale: Union[bool, None] = None,
     ) -> Union[Any, Literal["not_found"]]:
         """Takes a array of images as input, and returns the first found image from the array. If none are found returns 'not_found'
         Useful for scanning for multiple images in one screenshot rather than making multiple is_visible calls.
 
         Args:
             images (list[str]): Paths to images to search.
-            confidence (float, optional): Pyscreeze locate confidence. Defaults to 0.9.
+            confidence (float | None, optional): Pyscreeze locate confidence. Defaults to None, the manifest value or 0.9.
             seconds (int, optional): Wait time. Defaults to 1.
             retry (int, optional): Retry attempts. Defaults to 3.
             click (bool, optional): Click the image. Defaults to False.
-            region (tuple[int, int, int, int], optional): Search region. Defaults to (0, 0, 1080, 1920).
+            region (tuple[int, int, int, int] | None, optional): Search region. Defaults to None, the manifest region or the full frame.
             x_relative (int, optional): X coordinate relative to resolution. Defaults to 0.
             y_relative (int, optional): Y coordinate relative to resolution. Defaults to 0.
-            grayscale (bool, optional): Pyscreeze locate grayscale. Defaults to False.
+            grayscale (bool | None, optional): Pyscreeze locate grayscale. Defaults to None, the manifest value or False.
 
         Returns:
             Any | Literal["not_found"]: First found image from the array or 'not_found'.
         """
-        screenshot: Image.Image = self.get_frame()
+        frame: np.ndarray = self.get_frame_array()
+        matches: list[Match] = self._find_array(
+            images, frame, confidence=confidence, grayscale=False, region=region
+        )
 
-        for image in images:
-            search: Image.Image = Image.open(
-                os.path.join(self.cwd, "img", image + ".png")
+        if matches:
+            # Matches come back in the same priority order as images
+            image, res, _ = matches[0]
+            if click is True:
+                x, y, w, h = res
+                x_center = round(x + w / 2) + x_relative
+                y_center = round(y + h / 2) + y_relative
+                self._tap(x_center, y_center)
+            self._settle(seconds)
+            return image
+        # If nothing found return false
+        return "not_found"
+
+    def wait_for(
+        self,
+        image: str,
+        confidence: Union[float, None] = None,
+        region: Union[tuple[int, int, int, int], None] = None,
+        timeout: float = 10,
+        grayscale: Union[bool, None] = None,
+        click: bool = False,
+    ) -> bool:
+        """Wait until an image appears, checking every new frame from scrcpy rather than sleeping a fixed time.
+
+        Args:
+            image (str): Path to image to search.
+            confidence (float | None, optional): Locate confidence. Defaults to None, the manifest value or 0.9.
+            region (tuple[int, int, int, int] | None, optional): Search region. Defaults to None, the manifest region or the full frame.
+            timeout (float, optional): Maximum wait in seconds, scaled by loading_multiplier. Defaults to 10.
+            grayscale (bool | None, optional): Locate grayscale. Defaults to None, the manifest value or False.
+            click (bool, optional): Click the image once found. Defaults to False.
+
+        Returns:
+            bool: True as soon as the image is found, False if the timeout passes first.
+        """
+        return (
+            self.wait_for_any(
+                [image], confidence, region, timeout, grayscale, click=click
             )
-            res: Box | None = locate(
-                search,
-                screenshot,
-                grayscale=False,
+            is not None
+        )
+
+    def wait_for_any(
+        self,
+        images: list[str],
+        confidence: Union[float, None] = None,
+        region: Union[tuple[int, int, int, int], None] = None,
+        timeout: float = 10,
+        grayscale: Union[bool, None] = None,
+        click: bool = False,
+    ) -> Union[str, None]:
+        """Wait until any of the images appear, checking every new frame from scrcpy.
+
+        Args:
+            images (list[str]): Paths to images to search, in priority order.
+            confidence (float | None, optional): Locate confidence. Defaults to None, the manifest value or 0.9.
+            region (tuple[int, int, int, int] | None, optional): Search region. Defaults to None, the manifest region or the full frame.
+            timeout (float, optional): Maximum wait in seconds, scaled by loading_multiplier. Defaults to 10.
+            grayscale (bool | None, optional): Locate grayscale. Defaults to None, the manifest value or False.
+            click (bool, optional): Click the image once found. Defaults to False.
+
+        Returns:
+            str | None: First image found, None if the timeout passes first.
+        """
+        deadline: float = self.clock.monotonic() + timeout * self.loading_multiplier
+
+        while True:
+            frames_received: int = self.frames_received
+            matches: list[Match] = self._find_array(
+                images,
+                self.get_frame_array(),
                 confidence=confidence,
+                grayscale=grayscale,
                 region=region,
             )
-            if res is not None:
+            if matches:
                 if click is True:
-                    x, y, w, h = res
-                    x_center = round(x + w / 2) + x_relative
-                    y_center = round(y + h / 2) + y_relative
-                    self.device.input_tap(x_center, y_center)
-                self.wait(seconds)
-                return image
-        # If nothing found return false
-        return "not_found"
+                    x, y, w, h = matches[0].box
+                    self._tap(round(x + w / 2), round(y + h / 2))
+                    self._pre_input_signature = (
+                        None  # Callers decide how to wait after this
+                    )
+                return matches[0].image
+
+            remaining: float = deadline - self.clock.monotonic()
+            if remaining <= 0:
+                return None
+            # Capped so we still poll if the frame listener isn't running
+            self.wait_for_frame(frames_received, min(remaining, 0.5))
+
+    def wait_until_gone(
+        self,
+        image: str,
+        confidence: Union[float, None] = None,
+        region: Union[tuple[int, int, int, int], None] = None,
+        timeout: float = 10,
+        grayscale: Union[bool, None] = None,
+    ) -> bool:
+        """Wait until an image is no longer visible, checking every new frame from scrcpy.
+
+        Args:
+            image (str): Path to image to search.
+            confidence (float | None, optional): Locate confidence. Defaults to None, the manifest value or 0.9.
+            region (tuple[int, int, int, int] | None, optional): Search region. Defaults to None, the manifest region or the full frame.
+            timeout (float, optional): Maximum wait in seconds, scaled by loading_multiplier. Defaults to 10.
+            grayscale (bool | None, optional): Locate grayscale. Defaults to None, the manifest value or False.
+
+        Returns:
+            bool: True as soon as the image is gone, False if it is still visible when the timeout passes.
+        """
+        deadline: float = self.clock.monotonic() + timeout * self.loading_multiplier
+
+        while True:
+            frames_received: int = self.frames_received
+            if (
+                self._locate(
+                    image,
+                    self.get_frame_array(),
+                    confidence=confidence,
+                    grayscale=grayscale,
+                    region=region,
+                )
+                is None
+            ):
+                return True
+
+            remaining: float = deadline - self.clock.monotonic()
+            if remaining <= 0:
+                return False
+            self.wait_for_frame(frames_received, min(remaining, 0.5))
 
     def get_frame(self) -> Image.Image:
-        """Returns the last frame from scrcpy, if the resolution isn't 1080 we scale it but this will only work in 16:9 resolutions.
+        """Returns the last frame from scrcpy as a PIL image, for saving screenshots.
 
         Returns:
             Image.Image: Last frame from scrcpy.
         """
-        im: Image.Image = Image.fromarray(self.device.srccpy.last_frame[:, :, ::-1])
+        return Image.fromarray(cv2.cvtColor(self.get_frame_array(), cv2.COLOR_BGR2RGB))
 
-        if not im.size == (1080, 1920) and not im.size == (1920, 1080):
-            im = im.resize((1080, 1920))
+    def get_frame_array(self) -> np.ndarray:
+        """Returns the last frame from scrcpy as a BGR numpy array, at whatever resolution scrcpy streams.
 
-        return im
+        Frames aren't resized, templates are scaled to them instead (see resolution_check()).
+        Every new frame from scrcpy is given the next frame_id, so lookups on an unchanged screen can be memoized.
+        The first read after an input waits (up to fresh_frame_timeout) for a frame newer than the input, so checks
+        straight after a click don't see the screen from before it.
+        The frame is the one in the frame store, read-only and shared rather than copied, see client/frame_store.py.
+
+        Returns:
+            np.ndarray: Last frame from scrcpy.
+
+        Raises:
+            RuntimeError: Scrcpy never delivered a frame, even after a restart.
+        """
+        if self._input_unseen:
+            self._input_unseen = False
+            return self.next_frame(self.input_time, self.fresh_frame_timeout)
+
+        with self.profiler.timer("frame"):
+            if isinstance(self.device, ReplayDevice):
+                self.device.srccpy.advance()  # The frame arrives through _on_frame
+            if self.frames.latest is None and not self.wait_for_frame(0, 5):
+                # Scrcpy hasn't delivered its first frame, give it one more go
+                self.restart_scrcpy("no frames received")
+            if self.frames.latest is None:
+                self.logger.info(
+                    "No frames received from scrcpy, try restarting the emulator and the bot"
+                )
+                raise RuntimeError("No frames received from scrcpy")
+            frame: np.ndarray = self.frames.latest.image
+
+            if frame is not self._frame:
+                self._frame = frame
+                self.frame_data = FrameData(frame)
+                self.frame_id += 1
+                if self.recorder is not None:
+                    self.recorder.frame(self.frame_id, self._frame)
+
+        return self._frame
+
+    def next_frame(
+        self, after: Union[float, None] = None, timeout: float = 1
+    ) -> np.ndarray:
+        """Wait for a frame that arrived after a moment and return it.
+
+        Scrcpy sends nothing while the screen is static, so on timeout the current frame is returned as it is still
+        what the screen shows.
+
+        Args:
+            after (float | None, optional): Time on self.clock, the last input if None. Defaults to None.
+            timeout (float, optional): Maximum wait in seconds. Defaults to 1.
+
+        Returns:
+            np.ndarray: Frame.
+        """
+        moment: float = self.input_time if after is None else after
+        with self.profiler.timer("sleep"), self.frames.ready:
+            self.clock.wait_for(
+                self.frames.ready, lambda: self.frame_time > moment, timeout
+            )
+        return self.get_frame_array()
+
+    def check_templates(self, referenced: list[str]) -> bool:
+        """Check every template and the template manifest, logging anything wrong.
+
+        Broken manifest entries are dropped so lookups fall back to the caller's arguments.
+
+        Args:
+            referenced (list[str]): Template names the game metadata refers to.
+
+        Returns:
+            bool: True if everything is fine.
+        """
+        problems: list[str] = self.manifest.validate(self.templates, referenced)
+        for problem in problems:
+            self.logger.info("Template check: " + problem)
+        return not problems
+
+    def start_recording(self, directory: str) -> None:
+        """Record frames, inputs and match queries for replay, see interaction/session_recorder.py.
+
+        Args:
+            directory (str): Directory to record into.
+        """
+        self.recorder = SessionRecorder(directory, self.logger, clock=self.clock)
+        atexit.register(self.recorder.close)
+        self.logger.info("Recording session to " + directory)
+
+    def start_profiling(self, path: str) -> None:
+        """Time frames, matching, input, shell commands and waits per activity, see automation/profiler.py.
+
+        The summary table is logged and the JSON report written to path when the bot exits.
+
+        Args:
+            path (str): File to write the report to.
+        """
+        self.profiler.enable()
+        atexit.register(self.profiler.save, path, self.logger)
+        self.logger.info("Profiling to " + path)
+
+    def _match_key(
+        self,
+        frame: np.ndarray,
+        kind: str,
+        image: str,
+        confidence: float,
+        grayscale: bool,
+        region: tuple[int, int, int, int],
+    ) -> Union[tuple, None]:
+        """Build the memo key for a lookup.
+
+        Args:
+            frame (np.ndarray): Frame being searched.
+            kind (str): 'locate' or 'locate_all'.
+            image (str): Path to image to search.
+            confidence (float): Locate confidence.
+            grayscale (bool): Locate grayscale.
+            region (tuple[int, int, int, int]): Search region.
+
+        Returns:
+            tuple | None: Memo key, None if the frame isn't the current one so we can't trust its id.
+        """
+        if frame is not self._frame:
+            return None
+        # Some callers pass regions as lists so make it hashable
+        return (self.frame_id, kind, image, tuple(region), confidence, grayscale)
+
+    def _native_region(
+        self, region: tuple[int, int, int, int]
+    ) -> tuple[int, int, int, int]:
+        """Map a 1080x1920 search region to frame pixels.
+
+        Args:
+            region (tuple[int, int, int, int]): X, Y, width, height in 1080x1920 coordinates.
+
+        Returns:
+            tuple[int, int, int, int]: X, Y, width, height in frame pixels.
+        """
+        return matching.scale_region(region, self.scale)
+
+    def _logical_box(self, box: Box) -> Box:
+        """Map a match in frame pixels back to 1080x1920 coordinates.
+
+        Args:
+            box (Box): Left, top, width, height in frame pixels.
+
+        Returns:
+            Box: Left, top, width, height in 1080x1920 coordinates.
+        """
+        return matching.unscale_box(box, self.scale)
+
+    def _locate(
+        self,
+        image: str,
+        frame: np.ndarray,
+        confidence: Union[float, None] = None,
+        grayscale: Union[bool, None] = None,
+        region: Union[tuple[int, int, int, int], None] = None,
+    ) -> Union[Box, None]:
+        """Locate an image in a frame.
+
+        Args:
+            image (str): Path to image to search.
+            frame (np.ndarray): BGR frame from get_frame_array().
+            confidence (float | None, optional): Locate confidence. Defaults to None, the manifest value or 0.9.
+            grayscale (bool | None, optional): Locate grayscale. Defaults to None, the manifest value or False.
+            region (tuple[int, int, int, int] | None, optional): Search region. Defaults to None, the manifest region or the full frame.
+
+        Returns:
+            Box | None: Location of the image, None if not found.
+        """
+        match = self._find(image, frame, confidence, grayscale, region)
+        return match.box if match is not None else None
+
+    def _find(
+        self,
+        image: str,
+        frame: np.ndarray,
+        confidence: Union[float, None] = None,
+        grayscale: Union[bool, None] = None,
+        region: Union[tuple[int, int, int, int], None] = None,
+    ) -> Union[Match, None]:
+        """Find an image in a frame with its score, memoized per frame_id.
+
+        Args:
+            image (str): Path to image to search.
+            frame (np.ndarray): BGR frame from get_frame_array().
+            confidence (float | None, optional): Locate confidence. Defaults to None, the manifest value or 0.9.
+            grayscale (bool | None, optional): Locate grayscale. Defaults to None, the manifest value or False.
+            region (tuple[int, int, int, int] | None, optional): Search region. Defaults to None, the manifest region or the full frame.
+
+        Returns:
+            Match | None: The match, None if not found.
+        """
+        confidence, grayscale, region = self.manifest.apply(
+            image, confidence, grayscale, region
+        )
+        key = self._match_key(frame, "locate", image, confidence, grayscale, region)
+        match = self.match_cache.get(key) if key is not None else MatchCache.MISS
+
+        if match is MatchCache.MISS:
+            with self.profiler.timer("match"):
+                match = self._find_uncached(image, frame, confidence, grayscale, region)
+            if key is not None:
+                self.match_cache.put(key, match)
+            self._remember(match)
+        self._record_match(image, confidence, grayscale, region, match)
+        return match
+
+    def _remember(self, match: Union[Match, None]) -> None:
+        """Add where a match was found to the location index.
+
+        Args:
+            match (Match | None): Result of a search, None if nothing was found.
+        """
+        if (
+            match is not None
+            and self.locations is not None
+            and self.manifest.fixed(match.image)
+        ):
+            self.locations.record(match.image, match.box)
+
+    def _find_near_known(
+        self,
+        image: str,
+        frame: np.ndarray,
+        confidence: float,
+        grayscale: bool,
+        region: tuple[int, int, int, int],
+    ) -> Union[Match, None]:
+        """Search the small window around where an image has always been found, before the whole region.
+
+        Args:
+            image (str): Path to image to search.
+            frame (np.ndarray): BGR frame from get_frame_array().
+            confidence (float): Locate confidence.
+            grayscale (bool): Locate grayscale.
+            region (tuple[int, int, int, int]): Search region the window has to be inside.
+
+        Returns:
+            Match | None: The match, None if there is no window or the image isn't in it.
+        """
+        if self.locations is None or not self.manifest.fixed(image):
+            return None  # List entries and chat buttons move, they always search the whole region
+        window = self.locations.window(image, region)
+        if window is None:
+            return None
+
+        box, score = matching.find(
+            self.templates.get(image, grayscale),
+            self._frame_data(frame),
+            confidence,
+            grayscale,
+            self._native_region(window),
+        )
+        if box is None:
+            self.locations.misses += 1
+            return None
+        self.locations.hits += 1
+        return Match(image, self._logical_box(box), score)
+
+    def _save_locations(self) -> None:
+        """Save the location index, unless replaying as replays would teach it the wrong places.
+
+        Runs at exit and as each activity closes, so a crash or a killed process only loses the current activity.
+        """
+        if self.locations is not None and not isinstance(self.device, ReplayDevice):
+            self.locations.save()
+
+    def _record_match(
+        self,
+        image: str,
+        confidence: float,
+        grayscale: bool,
+        region: tuple[int, int, int, int],
+        match: Union[Match, None],
+    ) -> None:
+        """Add a match query and its result to the session recording, if we're recording.
+
+        Args:
+            image (str): Path to image searched.
+            confidence (float): Locate confidence.
+            grayscale (bool): Locate grayscale.
+            region (tuple[int, int, int, int]): Search region.
+            match (Match | None): Result.
+        """
+        if self.recorder is None:
+            return
+        self.recorder.event(
+            "match",
+            self.frame_id,
+            image=image,
+            confidence=confidence,
+            grayscale=grayscale,
+            region=[int(value) for value in region],
+            box=[int(value) for value in match.box] if match is not None else None,
+            score=match.score if match is not None else None,
+        )
+
+    def _frame_data(self, frame: np.ndarray) -> FrameData:
+        """Get the shared FrameData for a frame, a throwaway one if it isn't the current frame.
+
+        Args:
+            frame (np.ndarray): BGR frame.
+
+        Returns:
+            FrameData: Derived data for the frame.
+        """
+        if frame is self._frame and self.frame_data is not None:
+            return self.frame_data
+        return FrameData(frame)
+
+    def _find_uncached(
+        self,
+        image: str,
+        frame: np.ndarray,
+        confidence: float = 0.9,
+        grayscale: bool = False,
+        region: tuple[int, int, int, int] = (0, 0, 1080, 1920),
+    ) -> Union[Match, None]:
+        """Find an image in a frame using the backend set by 'matching_backend' in settings.ini.
+
+        'opencv' matches natively on the numpy frame, 'pyscreeze' is the original PIL path and 'compare'
+        runs both, logs any disagreement and returns the pyscreeze result. Pyscreeze doesn't give us a score
+        so it is reported as NaN.
+
+        Args:
+            image (str): Path to image to search.
+            frame (np.ndarray): BGR frame from get_frame_array().
+            confidence (float, optional): Locate confidence. Defaults to 0.9.
+            grayscale (bool, optional): Locate grayscale. Defaults to False.
+            region (tuple[int, int, int, int], optional): Search region. Defaults to (0, 0, 1080, 1920).
+
+        Returns:
+            Match | None: The match, None if not found.
+        """
+        search: np.ndarray = self.templates.get(image, grayscale=grayscale)
+        native: tuple[int, int, int, int] = self._native_region(region)
+
+        if self.matching_backend == "opencv":
+            match = self._find_near_known(image, frame, confidence, grayscale, region)
+            if match is not None:
+                return match
+            box, score = matching.find(
+                search, self._frame_data(frame), confidence, grayscale, native
+            )
+            return (
+                Match(image, self._logical_box(box), score) if box is not None else None
+            )
+
+        result: Union[Box, None] = pyscreeze_locate(
+            search,
+            frame,  # Pyscreeze takes BGR arrays as they are, a PIL image would be copied to and fro
+            grayscale=grayscale,
+            confidence=confidence,
+            region=native,
+        )
+        if result is not None:
+            result = self._logical_box(result)
+        if self.matching_backend == "compare":
+            opencv_result = matching.locate(
+                search, self._frame_data(frame), confidence, grayscale, native
+            )
+            if opencv_result is not None:
+                opencv_result = self._logical_box(opencv_result)
+            if (result is None) != (opencv_result is None) or (
+                result is not None and tuple(result) != tuple(opencv_result)
+            ):
+                self.logger.info(
+                    "Backend mismatch for "
+                    + image
+                    + ": pyscreeze "
+                    + str(result)
+                    + ", opencv "
+                    + str(opencv_result)
+                )
+        return Match(image, result, float("nan")) if result is not None else None
+
+    def _find_array(
+        self,
+        images: list[str],
+        frame: np.ndarray,
+        confidence: Union[float, None] = None,
+        grayscale: Union[bool, None] = None,
+        region: Union[tuple[int, int, int, int], None] = None,
+    ) -> list[Match]:
+        """Find several images in one frame in a single pass.
+
+        Anything not already memoized for this frame is matched concurrently on the matcher thread pool.
+
+        Args:
+            images (list[str]): Paths to images to search, in priority order.
+            frame (np.ndarray): BGR frame from get_frame_array().
+            confidence (float | None, optional): Locate confidence. Defaults to None, the manifest value or 0.9.
+            grayscale (bool | None, optional): Locate grayscale. Defaults to None, the manifest value or False.
+            region (tuple[int, int, int, int] | None, optional): Search region. Defaults to None, the manifest region or the full frame.
+
+        Returns:
+            list[Match]: Every image found, in the same priority order as images.
+        """
+        found: dict[str, Union[Match, None]] = {}
+        pending: list[str] = []
+        tuned: list[str] = []  # Searched on their own with their manifest defaults
+        given = (confidence, grayscale, region)
+        confidence, grayscale, region = self.manifest.defaults(*given)
+
+        for image in images:
+            if self.manifest.apply(image, *given) != (confidence, grayscale, region):
+                found[image] = self._find(image, frame, *given)
+                tuned.append(image)
+                continue
+            key = self._match_key(frame, "locate", image, confidence, grayscale, region)
+            match = self.match_cache.get(key) if key is not None else MatchCache.MISS
+            if match is MatchCache.MISS:
+                pending.append(image)
+            else:
+                found[image] = match
+
+        with self.profiler.timer("match"):
+            if self.matching_backend == "opencv" and len(pending) > 1:
+                batch: list[str] = []
+                for image in pending:
+                    match = self._find_near_known(
+                        image, frame, confidence, grayscale, region
+                    )
+                    if match is not None:
+                        found[image] = match
+                    else:
+                        batch.append(image)
+                results = matching.locate_many(
+                    [(image, self.templates.get(image, grayscale)) for image in batch],
+                    self._frame_data(frame),
+                    confidence,
+                    grayscale,
+                    self._native_region(region),
+                    executor=self.matcher_pool,
+                )
+                for image, box, score in results:
+                    found[image] = (
+                        Match(image, self._logical_box(box), score)
+                        if box is not None
+                        else None
+                    )
+            else:
+                for image in pending:
+                    found[image] = self._find_uncached(
+                        image, frame, confidence, grayscale, region
+                    )
+
+        for image in pending:
+            key = self._match_key(frame, "locate", image, confidence, grayscale, region)
+            if key is not None:
+                self.match_cache.put(key, found[image])
+            self._remember(found[image])
+        for image in images:
+            if image not in tuned:
+                self._record_match(image, confidence, grayscale, region, found[image])
+
+        return [found[image] for image in images if found[image] is not None]
+
+    def _locate_all(
+        self,
+        image: str,
+        frame: np.ndarray,
+        confidence: Union[float, None] = None,
+        grayscale: Union[bool, None] = None,
+        region: Union[tuple[int, int, int, int], None] = None,
+    ) -> list[Box]:
+        """Locate every occurrence of an image in a frame, top down, using the configured backend. Memoized per frame_id.
+
+        Args:
+            image (str): Path to image to search.
+            frame (np.ndarray): BGR frame from get_frame_array().
+            confidence (float | None, optional): Locate confidence. Defaults to None, the manifest value or 0.9.
+            grayscale (bool | None, optional): Locate grayscale. Defaults to None, the manifest value or False.
+            region (tuple[int, int, int, int] | None, optional): Search region. Defaults to None, the manifest region or the full frame.
+
+        Returns:
+            list[Box]: Every location found.
+        """
+        confidence, grayscale, region = self.manifest.apply(
+            image, confidence, grayscale, region
+        )
+        key = self._match_key(frame, "locate_all", image, confidence, grayscale, region)
+        results = self.match_cache.get(key) if key is not None else MatchCache.MISS
+
+        if results is MatchCache.MISS:
+            with self.profiler.timer("match"):
+                search: np.ndarray = self.templates.get(image, grayscale=grayscale)
+                native: tuple[int, int, int, int] = self._native_region(region)
+
+                if self.matching_backend == "opencv":
+                    results = matching.locate_all(
+                        search, self._frame_data(frame), confidence, grayscale, native
+                    )
+                else:
+                    results = list(
+                        pyscreeze_locate_all(
+                            search,
+                            frame,
+                            grayscale=grayscale,
+                            confidence=confidence,
+                            region=native,
+                        )
+                    )
+                results = [self._logical_box(box) for box in results]
+            if key is not None:
+                self.match_cache.put(key, tuple(results))
+
+        if self.recorder is not None:
+            self.recorder.event(
+                "match_all",
+                self.frame_id,
+                image=image,
+                confidence=confidence,
+                grayscale=grayscale,
+                region=[int(value) for value in region],
+                boxes=[[int(value) for value in box] for box in results],
+            )
+        return list(results)
 
     def save_screenshot(self, name: str) -> None:
         """Saves screenshot locally.
@@ -538,11 +1422,52 @@ class EmulatorInteractions(EmulatorClient):
         Returns:
             Any: Screenshot color.
         """
-        im: Image.Image = self.get_frame()
-        screenshot: Any = np.asarray(im)  # Make it an array
+        screenshot: np.ndarray = self.get_frame_array()
         self.wait(seconds)
 
-        return screenshot[y, x, c]
+        x_scale, y_scale = self.scale
+        # Frame is BGR, c is an RGB channel
+        return screenshot[int(y * y_scale), int(x * x_scale), 2 - c]
+
+    def current_scene(self) -> str:
+        """Identify the screen we're on from the current frame.
+
+        Returns:
+            str: Scene name from the metadata scenes, or 'unknown'.
+        """
+        if self.scene_classifier is None:
+            return SceneClassifier.UNKNOWN
+
+        frame: np.ndarray = self.get_frame_array()
+        return self.scene_classifier.classify(
+            frame,
+            lambda image, region, confidence: self._locate(
+                image, frame, confidence=confidence, region=region
+            )
+            is not None,
+        )
+
+    def _step_back(
+        self,
+        buttons: list[str],
+        neutral: tuple[int, int] = (420, 5),
+        seconds: int = 1,
+    ) -> None:
+        """Take a single step back: press the first of the buttons on screen, else tap a neutral location.
+
+        Args:
+            buttons (list[str]): Buttons to look for, in priority order.
+            neutral (tuple[int, int], optional): X, Y to tap if none are found. Defaults to (420, 5).
+            seconds (int, optional): Wait time. Defaults to 1.
+        """
+        found: list[Match] = self._find_array(buttons, self.get_frame_array())
+        if found:
+            x, y, w, h = found[0].box
+            self.logger.debug("Stepping back with " + found[0].image)
+            self._tap(round(x + w / 2), round(y + h / 2))
+        else:
+            self._tap(*neutral)
+        self._settle(seconds)
 
     def recover(self, count: int = 3) -> bool:
         """Return to neutral location.
@@ -551,25 +1476,123 @@ class EmulatorInteractions(EmulatorClient):
             count (int, optional): Retry attempts. Defaults to 3.
 
         Returns:
-            bool: Returns True if the image is found, False if not.
+            bool: Returns True if we are back at the main map, False if not.
         """
-        timer: int = 0
-
-        if self.is_visible("labels/sunandstars", region=(770, 40, 100, 100)):
-            return True
+        attempts: int = 0
 
-        while timer < count:
-            self.click("buttons/back", suppress=True)
-            self.click("buttons/back2", suppress=True)
-            self.click_location("neutral")
-            timer += 1
-            if self.is_visible("labels/sunandstars", region=(770, 40, 100, 100)):
+        while True:
+            scene: str = self.current_scene()
+            if scene == SceneClassifier.UNKNOWN:
+                # Most likely mid transition, give it a moment before pressing anything
+                self.wait()
+                scene = self.current_scene()
+            if scene == "main_map":
                 return True
+            if attempts >= count:
+                break
+            self.logger.debug("Recovering from " + scene)
+            self._step_back(["buttons/back", "buttons/back2"])
+            attempts += 1
 
         timestamp: str = datetime.now().strftime("%d-%m-%y_%H-%M-%S")
         self.save_screenshot("recovery_timeout_" + timestamp)
         return False
 
+    def wait_for_scene(self, scene: str, timeout: float = 5) -> bool:
+        """Wait until the scene classifier reports a scene, checking every new frame from scrcpy.
+
+        Args:
+            scene (str): Scene name.
+            timeout (float, optional): Maximum wait in seconds, scaled by loading_multiplier. Defaults to 5.
+
+        Returns:
+            bool: True as soon as the scene shows, False if the timeout passes first.
+        """
+        deadline: float = self.clock.monotonic() + timeout * self.loading_multiplier
+
+        while True:
+            frames_received: int = self.frames_received
+            if self.current_scene() == scene:
+                return True
+
+            remaining: float = deadline - self.clock.monotonic()
+            if remaining <= 0:
+                return False
+            # Capped so we still poll if the frame listener isn't running
+            self.wait_for_frame(frames_received, min(remaining, 0.5))
+
+    def _follow(self, edge: Edge) -> bool:
+        """Send the input for one edge of the navigation graph.
+
+        Args:
+            edge (Edge): (images, where) from NavigationGraph.edge().
+
+        Returns:
+            bool: True if the input was sent, False if none of the images were found.
+        """
+        images, where = edge
+        if not images:
+            self._tap(*where)
+            return True
+
+        found: list[Match] = self._find_array(
+            images, self.get_frame_array(), region=where
+        )
+        if not found:
+            return False
+        x, y, w, h = found[0].box
+        self._tap(round(x + w / 2), round(y + h / 2))
+        return True
+
+    def go_to(self, scene: str, hops: int = 6) -> bool:
+        """Navigate to a scene along the shortest route in the navigation graph, checking each screen as we arrive.
+
+        If we are somewhere the graph doesn't know we recover to the main map first and route from there.
+
+        Args:
+            scene (str): Scene name.
+            hops (int, optional): Maximum inputs sent. Defaults to 6.
+
+        Returns:
+            bool: True once we are on the scene, False if we couldn't get there.
+        """
+        if self.navigation is None:
+            return scene == "main_map" and self.recover()
+
+        recovered: bool = False
+        taken: int = 0
+
+        while True:
+            here: str = self.current_scene()
+            if here == SceneClassifier.UNKNOWN:
+                # Mid transition or a popup on top of the screen
+                self.wait()
+                here = self.current_scene()
+                if here == SceneClassifier.UNKNOWN:
+                    self.click_location("neutral")
+                    here = self.current_scene()
+            if here == scene:
+                return True
+
+            path: Union[list[str], None] = self.navigation.route(here, scene)
+            if path is None:
+                if recovered or not self.recover():
+                    break
+                recovered = True
+                continue
+
+            if taken >= hops:
+                break
+            self.logger.debug("Navigating " + " > ".join(path))
+            if not self._follow(self.navigation.edge(here, path[1])):
+                self.logger.debug("No way from " + here + " to " + path[1] + " found")
+            self._pre_input_signature = None  # We wait on the scene instead
+            taken += 1
+            self.wait_for_scene(path[1])
+
+        self.logger.info("Couldn't navigate to " + scene)
+        return False
+
     def debug_screen(self, name: str) -> None:
         """Saves debug screenshot.
 
@@ -579,27 +1602,49 @@ class EmulatorInteractions(EmulatorClient):
         timestamp: str = datetime.now().strftime("%d-%m-%y_%H-%M-%S")
         self.save_screenshot(name + "_" + timestamp)
 
-    def safe_open_and_close(self, name: str, state: str) -> Union[None, Literal[True]]:
-        """We call this at the start and end of every activity to make sure we are back at the main map screen, if not we are lost and exit.
+    def safe_open_and_close(
+        self, name: str, state: str, scene: str = "main_map"
+    ) -> Union[None, Literal[True]]:
+        """We call this at the start and end of every activity to make sure we know where we are, if not we are lost and exit.
+
+        Opening navigates to the screen the activity starts from along the navigation graph. Closing leaves us where
+        we are if that's a scene on the graph, so the next activity routes from there rather than bouncing through the
+        main map, and only recovers with the back buttons if we're somewhere the graph doesn't know. Scenes are
+        always confirmed by one of their anchors, so a popup that hashes like the screen underneath counts as lost.
 
         Args:
             name (str): Task name.
             state (str): String "open" or "close".
+            scene (str, optional): Scene the activity starts from when opening. Defaults to "main_map".
 
         Returns:
-            None | Literal[True]: True if recover was successful. None otherwise.
+            None | Literal[True]: True if we opened on the scene or closed somewhere known. None otherwise.
         """
-        # We call this at the start and end of every activity to make sure we are back at the main map screen, if not we are lost and exit
         if state == "open":
+            self.profiler.start(name)
             self.logger.debug("opening task " + name)
-            if self.recover() is True:
+            if self.go_to(scene) is True:
                 self.logger.debug(name + " opened successfully!")
+                return True
             else:
                 self.logger.info("Issue opening " + name)
 
         if state == "close":
-            if self.recover() is True:
+            self.logger.debug("Template registry: " + str(self.templates.stats()))
+            self.logger.debug("Match cache: " + str(self.match_cache.stats()))
+            if self.input_backend is not None:
+                self.logger.debug("Tap latency: " + str(self.input_backend.stats()))
+            self.logger.debug("Clock: " + str(self.clock.stats()))
+            self.logger.debug("Frame rates: " + str(self.frame_rate_stats()))
+            if self.locations is not None:
+                self.logger.debug("Location index: " + str(self.locations.stats()))
+            self._save_locations()  # Checkpoint, a crash later in the run keeps what we learned
+            here: str = self.current_scene()
+            if (
+                self.navigation is not None and here in self.navigation
+            ) or self.recover() is True:
                 self.logger.debug(name + " completed successfully!")
+                self.profiler.start("idle")
                 return True
             else:
                 timestamp: str = datetime.now().strftime("%d-%m-%y_%H-%M-%S")
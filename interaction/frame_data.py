@@ -0,0 +1,121 @@
+"""Frame Data Module."""
+
+import cv2
+import numpy as np
+import threading
+from typing import (
+    Any,
+    Callable,
+    Hashable,
+    Union,  # TODO: Update Python. Union required for Python <3.10
+)
+
+
+class FrameData:
+    """Frame Data Class.
+
+    Everything derived from one frame (grayscale crops, pyramid levels, signatures) computed the first time it is
+    asked for and shared by every lookup on that frame, so a burst of lookups pays for each conversion once.
+    Colour crops are views and cost nothing. Safe to share across the matcher pool, each value is computed once.
+    """
+
+    def __init__(self, image: np.ndarray) -> None:
+        """Initialize the frame data.
+
+        Args:
+            image (np.ndarray): BGR frame, read-only.
+        """
+        self.image: np.ndarray = image
+        self._derived: dict[Hashable, Any] = {}
+        self._lock: threading.RLock = (
+            threading.RLock()
+        )  # Reentrant, pyramid levels build on each other
+
+    @property
+    def shape(self) -> tuple[int, ...]:
+        """Get the frame's shape.
+
+        Returns:
+            tuple[int, ...]: Height, width, channels.
+        """
+        return self.image.shape
+
+    def derive(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Get a value derived from the frame, computing it on first use.
+
+        Args:
+            key (Hashable): Name of the value.
+            compute (Callable[[], Any]): Computes the value.
+
+        Returns:
+            Any: The value.
+        """
+        value = self._derived.get(key)
+        if value is None:
+            with self._lock:
+                value = self._derived.get(key)
+                if value is None:
+                    value = compute()
+                    self._derived[key] = value
+        return value
+
+    def crop(
+        self,
+        region: Union[tuple[int, int, int, int], None],
+        grayscale: bool = False,
+    ) -> tuple[np.ndarray, int, int]:
+        """Crop the frame to a search region.
+
+        Args:
+            region (tuple[int, int, int, int] | None): X, Y, width, height in frame pixels. None for the whole frame.
+            grayscale (bool, optional): Grayscale crop, converted once per region (or cut from the whole grayscale
+                                        frame if that has been made). Defaults to False.
+
+        Returns:
+            tuple[np.ndarray, int, int]: The region and its X, Y offset.
+        """
+        x, y, w, h = (
+            region if region is not None else (0, 0, self.shape[1], self.shape[0])
+        )
+        if not grayscale:
+            return self.image[y : y + h, x : x + w], x, y
+
+        whole: Union[np.ndarray, None] = self._derived.get(("gray", None))
+        if whole is not None:
+            return whole[y : y + h, x : x + w], x, y
+        return (
+            self.derive(
+                ("gray", region),
+                lambda: cv2.cvtColor(
+                    self.image[y : y + h, x : x + w], cv2.COLOR_BGR2GRAY
+                ),
+            ),
+            x,
+            y,
+        )
+
+    def gray(self) -> np.ndarray:
+        """Get the whole frame in grayscale.
+
+        Returns:
+            np.ndarray: Grayscale frame.
+        """
+        return self.crop(None, grayscale=True)[0]
+
+    def level(self, n: int) -> np.ndarray:
+        """Get a level of the frame's pyramid, each level half the size of the one before.
+
+        Args:
+            n (int): Level, 0 is the frame itself.
+
+        Returns:
+            np.ndarray: BGR frame downscaled by 2 ** n.
+        """
+        if n == 0:
+            return self.image
+        return self.derive(
+            ("level", n),
+            lambda: cv2.resize(
+                self.level(n - 1), None, fx=0.5, fy=0.5, interpolation=cv2.INTER_AREA
+            ),
+        )
@@ -0,0 +1,131 @@
+"""Location Index Module.
+
+Remembers where each template has been found, across sessions, so the next search can try a small window around
+that spot before the full region. Most templates are buttons and labels that never move, and a window a few
+pixels larger than the template costs a fraction of a full frame matchTemplate.
+
+Only templates marked 'fixed' in img/manifest.json are indexed, and only those that have always been found in the
+same place, min_hits times, get a window. Anything seen in more than one place keeps searching its whole region.
+List entries and chat buttons are never marked fixed, a slot they filled a few times running says nothing about
+where the best or top-most match is next time.
+"""
+
+import json
+import os
+from logging import Logger
+from typing import Union  # TODO: Update Python. Union required for Python <3.10
+
+
+class LocationIndex:
+    """Location Index Class."""
+
+    def __init__(
+        self,
+        path: str,
+        logger: Logger,
+        margin: int = 16,
+        tolerance: int = 8,
+        min_hits: int = 10,
+        max_places: int = 4,
+    ) -> None:
+        """Initialize the index, loading it from disk if it exists.
+
+        Args:
+            path (str): JSON file the index is kept in.
+            logger (Logger): Logger.
+            margin (int, optional): Pixels added around a known position to make the search window. Defaults to 16.
+            tolerance (int, optional): Finds within this many pixels of a known position count as the same place.
+                                       Defaults to 8.
+            min_hits (int, optional): Finds needed before a window is used. Defaults to 10.
+            max_places (int, optional): Places remembered per template, the least found is dropped. Defaults to 4.
+        """
+        self.path: str = path
+        self.logger: Logger = logger
+        self.margin: int = margin
+        self.tolerance: int = tolerance
+        self.min_hits: int = min_hits
+        self.max_places: int = max_places
+        self.hits: int = 0  # Found inside the window
+        self.misses: int = 0  # Not in the window, fell back to the full region
+        # template -> [[x, y, width, height, times found], ...] in 1080x1920 coordinates
+        self.places: dict[str, list[list[int]]] = {}
+        self._dirty: bool = False
+
+        if os.path.isfile(path):
+            try:
+                with open(path, encoding="utf-8") as f:
+                    self.places = json.load(f)
+            except (OSError, ValueError) as e:
+                self.logger.info("Ignoring unreadable location index: " + str(e))
+
+    def window(
+        self, image: str, region: tuple[int, int, int, int]
+    ) -> Union[tuple[int, int, int, int], None]:
+        """Get the window to search first for a template.
+
+        Args:
+            image (str): Template name.
+            region (tuple[int, int, int, int]): Region the caller asked to search.
+
+        Returns:
+            tuple[int, int, int, int] | None: X, Y, width, height inside the region, None to search it all.
+        """
+        places = self.places.get(image)
+        if places is None or len(places) != 1 or places[0][4] < self.min_hits:
+            return None
+
+        x, y, w, h, _ = places[0]
+        rx, ry, rw, rh = region
+        left, top = max(rx, x - self.margin), max(ry, y - self.margin)
+        right = min(rx + rw, x + w + self.margin)
+        bottom = min(ry + rh, y + h + self.margin)
+        if right - left < w or bottom - top < h:
+            return None  # Not inside this region
+        if (right - left) * (bottom - top) >= rw * rh:
+            return None  # No smaller than the region itself
+        return left, top, right - left, bottom - top
+
+    def record(self, image: str, box: tuple[int, int, int, int]) -> None:
+        """Note where a template was found.
+
+        Args:
+            image (str): Template name.
+            box (tuple[int, int, int, int]): Left, top, width, height in 1080x1920 coordinates.
+        """
+        x, y, w, h = (int(value) for value in box)
+        places = self.places.setdefault(image, [])
+        for place in places:
+            if (
+                abs(place[0] - x) <= self.tolerance
+                and abs(place[1] - y) <= self.tolerance
+            ):
+                place[4] += 1
+                self._dirty = True
+                return
+
+        places.append([x, y, w, h, 1])
+        places.sort(key=lambda place: place[4], reverse=True)
+        del places[self.max_places :]
+        self._dirty = True
+
+    def stats(self) -> dict[str, int]:
+        """Return index counters.
+
+        Returns:
+            dict[str, int]: Templates indexed, window hits and misses.
+        """
+        return {"templates": len(self.places), "hits": self.hits, "misses": self.misses}
+
+    def save(self) -> None:
+        """Write the index to disk if anything changed."""
+        if not self._dirty:
+            return
+        try:
+            with open(self.path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump(self.places, f, indent=1, sort_keys=True)
+            os.replace(
+                self.path + ".tmp", self.path
+            )  # Never leave a half written index
+            self._dirty = False
+        except OSError as e:
+            self.logger.info("Couldn't save the location index: " + str(e))
@@ -0,0 +1,77 @@
+"""Match Cache Module."""
+
+from collections import OrderedDict
+from typing import Any, Hashable
+
+
+class MatchCache:
+    """Match Cache Class.
+
+    Bounded LRU memo of match results keyed by frame id and search parameters. Scrcpy only hands us a new
+    frame when the screen changes, so repeat lookups against the same frame id can skip matchTemplate.
+    """
+
+    MISS = object()
+
+    def __init__(self, maxsize: int = 256) -> None:
+        """Initialize the cache.
+
+        Args:
+            maxsize (int, optional): Maximum number of results kept. Defaults to 256.
+        """
+        self.maxsize: int = maxsize
+        self.hits: int = 0
+        self.misses: int = 0
+        self._results: OrderedDict[Hashable, Any] = OrderedDict()
+
+    def get(self, key: Hashable) -> Any:
+        """Return a cached result.
+
+        Args:
+            key (Hashable): (frame_id, template, region, confidence, grayscale, ...) key.
+
+        Returns:
+            Any: The cached result, or MatchCache.MISS if there isn't one. None is a valid cached result.
+        """
+        result = self._results.get(key, self.MISS)
+        if result is self.MISS:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self._results.move_to_end(key)
+        return result
+
+    def put(self, key: Hashable, result: Any) -> None:
+        """Store a result, evicting the least recently used one if full.
+
+        Args:
+            key (Hashable): (frame_id, template, region, confidence, grayscale, ...) key.
+            result (Any): Match result.
+        """
+        self._results[key] = result
+        self._results.move_to_end(key)
+        if len(self._results) > self.maxsize:
+            self._results.popitem(last=False)
+
+    @property
+    def hit_rate(self) -> float:
+        """Get the fraction of lookups served from the cache.
+
+        Returns:
+            float: Hit rate between 0 and 1.
+        """
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> dict[str, Any]:
+        """Return cache counters.
+
+        Returns:
+            dict[str, Any]: Size, hits, misses and hit rate.
+        """
+        return {
+            "size": len(self._results),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hit_rate, 3),
+        }
@@ -0,0 +1,249 @@
+"""Template Matching Module.
+
+Native OpenCV matching on the BGR numpy frames scrcpy hands us, only touching the region of interest.
+Results mirror pyscreeze's locate()/locateAll() (first match top down above the confidence) so either backend
+can be swapped in without changing behaviour.
+"""
+
+import cv2
+import math
+import numpy as np
+from concurrent.futures import Executor
+from pyscreeze import Box
+from typing import (
+    NamedTuple,
+    Union,  # TODO: Update Python. Union required for Python <3.10
+)
+
+from interaction.frame_data import FrameData
+
+
+def crop(
+    frame: np.ndarray, region: Union[tuple[int, int, int, int], None]
+) -> tuple[np.ndarray, int, int]:
+    """Crop a frame to a search region without copying.
+
+    Args:
+        frame (np.ndarray): BGR or grayscale frame.
+        region (tuple[int, int, int, int] | None): X, Y, width, height. None for the whole frame.
+
+    Returns:
+        tuple[np.ndarray, int, int]: View of the region and its X, Y offset.
+    """
+    if region is None:
+        return frame, 0, 0
+    x, y, w, h = region
+    return frame[y : y + h, x : x + w], x, y
+
+
+def scale_region(
+    region: tuple[int, int, int, int], scale: tuple[float, float]
+) -> tuple[int, int, int, int]:
+    """Map a 1080x1920 search region to frame pixels, rounding outwards so scaled templates still fit.
+
+    Args:
+        region (tuple[int, int, int, int]): X, Y, width, height in 1080x1920 coordinates.
+        scale (tuple[float, float]): X, Y frame pixels per 1080x1920 pixel.
+
+    Returns:
+        tuple[int, int, int, int]: X, Y, width, height in frame pixels.
+    """
+    if scale == (1.0, 1.0):
+        return region
+    x_scale, y_scale = scale
+    x, y, w, h = region
+    left, top = math.floor(x * x_scale), math.floor(y * y_scale)
+    return (
+        left,
+        top,
+        math.ceil((x + w) * x_scale) - left,
+        math.ceil((y + h) * y_scale) - top,
+    )
+
+
+def unscale_box(box: Box, scale: tuple[float, float]) -> Box:
+    """Map a match in frame pixels back to 1080x1920 coordinates.
+
+    Args:
+        box (Box): Left, top, width, height in frame pixels.
+        scale (tuple[float, float]): X, Y frame pixels per 1080x1920 pixel.
+
+    Returns:
+        Box: Left, top, width, height in 1080x1920 coordinates.
+    """
+    if scale == (1.0, 1.0):
+        return box
+    x_scale, y_scale = scale
+    return Box(
+        round(box[0] / x_scale),
+        round(box[1] / y_scale),
+        round(box[2] / x_scale),
+        round(box[3] / y_scale),
+    )
+
+
+def match_scores(
+    template: np.ndarray,
+    frame: Union[np.ndarray, FrameData],
+    grayscale: bool = False,
+    region: Union[tuple[int, int, int, int], None] = None,
+) -> tuple[np.ndarray, int, int]:
+    """Run cv2.matchTemplate over the region of interest.
+
+    Args:
+        template (np.ndarray): Template, grayscale if grayscale is set.
+        frame (np.ndarray | FrameData): BGR frame, or its FrameData to share grayscale crops between lookups.
+        grayscale (bool, optional): Match on grayscale, only the cropped region is converted. Defaults to False.
+        region (tuple[int, int, int, int] | None, optional): Search region. Defaults to None.
+
+    Raises:
+        ValueError: If the template is larger than the search region, same as pyscreeze.
+
+    Returns:
+        tuple[np.ndarray, int, int]: TM_CCOEFF_NORMED score map and the X, Y offset of the region.
+    """
+    if isinstance(frame, FrameData):
+        haystack, x_offset, y_offset = frame.crop(region, grayscale)
+    else:
+        haystack, x_offset, y_offset = crop(frame, region)
+    if grayscale and haystack.ndim == 3:
+        haystack = cv2.cvtColor(haystack, cv2.COLOR_BGR2GRAY)
+    if grayscale and template.ndim == 3:
+        template = cv2.cvtColor(template, cv2.COLOR_BGR2GRAY)
+
+    if haystack.shape[0] < template.shape[0] or haystack.shape[1] < template.shape[1]:
+        # Keep pyscreeze's error, resolution_check() relies on it to detect landscape mode
+        raise ValueError(
+            "needle dimension(s) exceed the haystack image or region dimensions"
+        )
+
+    return (
+        cv2.matchTemplate(haystack, template, cv2.TM_CCOEFF_NORMED),
+        x_offset,
+        y_offset,
+    )
+
+
+class Match(NamedTuple):
+    """A template found in a frame."""
+
+    image: str
+    box: Box
+    score: float
+
+
+def find(
+    template: np.ndarray,
+    frame: Union[np.ndarray, FrameData],
+    confidence: float = 0.9,
+    grayscale: bool = False,
+    region: Union[tuple[int, int, int, int], None] = None,
+) -> tuple[Union[Box, None], float]:
+    """Find the first (top down) occurrence of a template in a frame along with its score.
+
+    Args:
+        template (np.ndarray): Template array.
+        frame (np.ndarray | FrameData): BGR frame or its FrameData.
+        confidence (float, optional): Match threshold. Defaults to 0.9.
+        grayscale (bool, optional): Match on grayscale. Defaults to False.
+        region (tuple[int, int, int, int] | None, optional): Search region. Defaults to None.
+
+    Returns:
+        tuple[Box | None, float]: Match in frame coordinates (None if not found) and its score, or the best
+                                  score in the region if not found.
+    """
+    scores, x_offset, y_offset = match_scores(template, frame, grayscale, region)
+    found = scores > confidence
+    # argmax on a bool array is the first True in row-major order, i.e. pyscreeze's top down match
+    y, x = divmod(int(found.argmax()), scores.shape[1])
+
+    if not found[y, x]:
+        return None, float(scores.max())
+    return (
+        Box(x + x_offset, y + y_offset, template.shape[1], template.shape[0]),
+        float(scores[y, x]),
+    )
+
+
+def locate(
+    template: np.ndarray,
+    frame: Union[np.ndarray, FrameData],
+    confidence: float = 0.9,
+    grayscale: bool = False,
+    region: Union[tuple[int, int, int, int], None] = None,
+) -> Union[Box, None]:
+    """Find the first (top down) occurrence of a template in a frame.
+
+    Args:
+        template (np.ndarray): Template array.
+        frame (np.ndarray | FrameData): BGR frame or its FrameData.
+        confidence (float, optional): Match threshold. Defaults to 0.9.
+        grayscale (bool, optional): Match on grayscale. Defaults to False.
+        region (tuple[int, int, int, int] | None, optional): Search region. Defaults to None.
+
+    Returns:
+        Box | None: Left, top, width, height of the match in frame coordinates, None if not found.
+    """
+    return find(template, frame, confidence, grayscale, region)[0]
+
+
+def locate_many(
+    templates: list[tuple[str, np.ndarray]],
+    frame: Union[np.ndarray, FrameData],
+    confidence: float = 0.9,
+    grayscale: bool = False,
+    region: Union[tuple[int, int, int, int], None] = None,
+    executor: Union[Executor, None] = None,
+) -> list[tuple[str, Union[Box, None], float]]:
+    """Search one frame for several templates at once.
+
+    cv2.matchTemplate releases the GIL so running the templates on a thread pool costs roughly the wall time of
+    the slowest single match rather than the sum of them all.
+
+    Args:
+        templates (list[tuple[str, np.ndarray]]): (name, template) pairs in priority order.
+        frame (np.ndarray | FrameData): BGR frame or its FrameData.
+        confidence (float, optional): Match threshold. Defaults to 0.9.
+        grayscale (bool, optional): Match on grayscale. Defaults to False.
+        region (tuple[int, int, int, int] | None, optional): Search region. Defaults to None.
+        executor (Executor | None, optional): Pool to run the matches on, sequential if None. Defaults to None.
+
+    Returns:
+        list[tuple[str, Box | None, float]]: (name, box, score) for every template, in the order given.
+    """
+
+    def run(template: np.ndarray) -> tuple[Union[Box, None], float]:
+        return find(template, frame, confidence, grayscale, region)
+
+    arrays = [template for _, template in templates]
+    results = executor.map(run, arrays) if executor is not None else map(run, arrays)
+
+    return [(name, box, score) for (name, _), (box, score) in zip(templates, results)]
+
+
+def locate_all(
+    template: np.ndarray,
+    frame: Union[np.ndarray, FrameData],
+    confidence: float = 0.9,
+    grayscale: bool = False,
+    region: Union[tuple[int, int, int, int], None] = None,
+) -> list[Box]:
+    """Find every occurrence of a template in a frame, top down.
+
+    Args:
+        template (np.ndarray): Template array.
+        frame (np.ndarray | FrameData): BGR frame or its FrameData.
+        confidence (float, optional): Match threshold. Defaults to 0.9.
+        grayscale (bool, optional): Match on grayscale. Defaults to False.
+        region (tuple[int, int, int, int] | None, optional): Search region. Defaults to None.
+
+    Returns:
+        list[Box]: Every match above the threshold in frame coordinates.
+    """
+    scores, x_offset, y_offset = match_scores(template, frame, grayscale, region)
+    ys, xs = np.nonzero(scores > confidence)
+
+    return [
+        Box(int(x) + x_offset, int(y) + y_offset, template.shape[1], template.shape[0])
+        for y, x in zip(ys, xs)
+    ]
@@ -0,0 +1,73 @@
+"""Navigation Module."""
+
+from collections import deque
+from typing import Union  # TODO: Update Python. Union required for Python <3.10
+
+# (images, where): press the first of the images found in the 'where' region, or tap 'where' as X, Y if images is empty
+Edge = tuple[list[str], tuple[int, ...]]
+
+
+class NavigationGraph:
+    """Navigation Graph Class.
+
+    Declarative graph of game screens (scene names from the scene classifier) and the inputs that move between them,
+    used to find the shortest route from wherever we are to where an activity wants to be.
+    """
+
+    def __init__(self, routes: dict[str, dict[str, Edge]]) -> None:
+        """Initialize the graph.
+
+        Args:
+            routes (dict[str, dict[str, Edge]]): Scene to the scenes reachable from it in one input.
+        """
+        self.routes: dict[str, dict[str, Edge]] = routes
+
+    def __contains__(self, scene: str) -> bool:
+        """Check whether a scene is on the graph.
+
+        Args:
+            scene (str): Scene name.
+
+        Returns:
+            bool: True if we know how to leave the scene.
+        """
+        return scene in self.routes
+
+    def edge(self, start: str, end: str) -> Edge:
+        """Get the input that moves between two adjacent scenes.
+
+        Args:
+            start (str): Scene we are on.
+            end (str): Adjacent scene.
+
+        Returns:
+            Edge: (images, where) input.
+        """
+        return self.routes[start][end]
+
+    def route(self, start: str, goal: str) -> Union[list[str], None]:
+        """Breadth first search for the route with the fewest inputs.
+
+        Args:
+            start (str): Scene we are on.
+            goal (str): Scene we want to reach.
+
+        Returns:
+            list[str] | None: Scenes from start to goal inclusive, None if the goal can't be reached.
+        """
+        previous: dict[str, Union[str, None]] = {start: None}
+        queue: deque[str] = deque([start])
+
+        while queue:
+            scene = queue.popleft()
+            if scene == goal:
+                path: list[str] = []
+                while scene is not None:
+                    path.append(scene)
+                    scene = previous[scene]
+                return path[::-1]
+            for neighbour in self.routes.get(scene, {}):
+                if neighbour not in previous:
+                    previous[neighbour] = scene
+                    queue.append(neighbour)
+        return None
@@ -0,0 +1,124 @@
+"""Scene Classifier Module."""
+
+import cv2
+import numpy as np
+from collections import OrderedDict
+from typing import (
+    Callable,
+    Union,
+)  # TODO: Update Python. Union required for Python <3.10
+
+# (template, region, confidence)
+Anchor = tuple[str, tuple[int, int, int, int], float]
+
+
+class SceneClassifier:
+    """Scene Classifier Class.
+
+    Works out which screen a frame shows. Scenes are identified by anchor templates declared in AFKJMetadata.scenes,
+    and every classified frame is remembered by a compact perceptual hash of a few fixed screen bands so the next time
+    the same screen comes up only that scene's anchors are checked instead of every scene's. A dimmed popup can hash
+    close to the screen underneath, so a recalled scene is never trusted without one of its anchors on the frame.
+    """
+
+    UNKNOWN = "unknown"
+
+    # Top bar, middle and bottom bar of a 1080x1920 portrait frame
+    bands: tuple[tuple[int, int, int, int], ...] = (
+        (0, 0, 1080, 200),
+        (0, 640, 1080, 640),
+        (0, 1620, 1080, 300),
+    )
+
+    def __init__(
+        self,
+        scenes: dict[str, list[Anchor]],
+        max_distance: int = 2,
+        memory: int = 64,
+    ) -> None:
+        """Initialize the classifier.
+
+        Args:
+            scenes (dict[str, list[Anchor]]): Scene name to anchors, any matching anchor identifies the scene.
+                                              Checked in order so overlays (popups, results) should come first.
+            max_distance (int, optional): Maximum Hamming distance per band for two fingerprints to be the same screen.
+                                          Defaults to 2.
+            memory (int, optional): Number of fingerprints remembered. Defaults to 64.
+        """
+        self.scenes: dict[str, list[Anchor]] = scenes
+        self.max_distance: int = max_distance
+        self.memory: int = memory
+        self._known: OrderedDict[tuple[int, ...], str] = OrderedDict()
+
+    def fingerprint(self, frame: np.ndarray) -> tuple[int, ...]:
+        """Difference hash (64 bits) of each band of the frame.
+
+        Args:
+            frame (np.ndarray): BGR frame.
+
+        Returns:
+            tuple[int, ...]: One hash per band.
+        """
+        hashes: list[int] = []
+        # Bands are in 1080x1920 coordinates, frames may come in at any 16:9 resolution
+        x_scale, y_scale = frame.shape[1] / 1080, frame.shape[0] / 1920
+        for x, y, w, h in self.bands:
+            x, y = int(x * x_scale), int(y * y_scale)
+            w, h = int(w * x_scale), int(h * y_scale)
+            band = cv2.resize(
+                frame[y : y + h, x : x + w], (9, 8), interpolation=cv2.INTER_AREA
+            )
+            gray = cv2.cvtColor(band, cv2.COLOR_BGR2GRAY)
+            bits = (gray[:, 1:] > gray[:, :-1]).flatten()
+            hashes.append(int("".join("1" if bit else "0" for bit in bits), 2))
+        return tuple(hashes)
+
+    def recall(self, fingerprint: tuple[int, ...]) -> Union[str, None]:
+        """Look up a previously classified screen by fingerprint.
+
+        Args:
+            fingerprint (tuple[int, ...]): Fingerprint from fingerprint().
+
+        Returns:
+            str | None: Scene name, None if the screen hasn't been seen.
+        """
+        for known, scene in reversed(self._known.items()):
+            if all(
+                bin(a ^ b).count("1") <= self.max_distance
+                for a, b in zip(known, fingerprint)
+            ):
+                self._known.move_to_end(known)
+                return scene
+        return None
+
+    def classify(
+        self,
+        frame: np.ndarray,
+        is_visible: Callable[[str, tuple[int, int, int, int], float], bool],
+    ) -> str:
+        """Identify the scene a frame shows.
+
+        Args:
+            frame (np.ndarray): BGR frame.
+            is_visible (Callable[[str, tuple[int, int, int, int], float], bool]): Checks a template in a region
+                                                                               of this frame at a confidence.
+
+        Returns:
+            str: Scene name from AFKJMetadata.scenes, or 'unknown'.
+        """
+        fingerprint = self.fingerprint(frame)
+        scene = self.recall(fingerprint)
+        if scene is not None and any(
+            is_visible(*anchor) for anchor in self.scenes[scene]
+        ):
+            return scene
+
+        for name, anchors in self.scenes.items():
+            if any(is_visible(*anchor) for anchor in anchors):
+                self._known[fingerprint] = name
+                if len(self._known) > self.memory:
+                    self._known.popitem(last=False)
+                return name
+
+        # Unknown screens aren't remembered, they are usually mid transition
+        return self.UNKNOWN
@@ -0,0 +1,80 @@
+"""Screen Stability Module."""
+
+import cv2
+import numpy as np
+
+
+class ScreenStability:
+    """Screen Stability Class.
+
+    Cheap frame differencing on heavily downsampled grayscale frames, used to tell when the screen has reacted
+    to a tap and when it has stopped moving again.
+    """
+
+    def __init__(
+        self,
+        size: tuple[int, int] = (54, 96),
+        change_threshold: float = 4.0,
+        stable_threshold: float = 1.5,
+    ) -> None:
+        """Initialize the detector.
+
+        Args:
+            size (tuple[int, int], optional): Width, height frames are shrunk to before comparing. Defaults to (54, 96).
+            change_threshold (float, optional): Mean absolute difference (0-255) above which the screen has changed.
+                                                Defaults to 4.0.
+            stable_threshold (float, optional): Mean absolute difference below which two frames are the same.
+                                                Defaults to 1.5.
+        """
+        self.size: tuple[int, int] = size
+        self.change_threshold: float = change_threshold
+        self.stable_threshold: float = stable_threshold
+
+    def signature(self, frame: np.ndarray) -> np.ndarray:
+        """Shrink a frame to a small grayscale signature.
+
+        Args:
+            frame (np.ndarray): BGR frame.
+
+        Returns:
+            np.ndarray: Downsampled grayscale frame.
+        """
+        # Resize first so the colour conversion only touches a few thousand pixels
+        small = cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+
+    def difference(self, a: np.ndarray, b: np.ndarray) -> float:
+        """Mean absolute difference between two signatures.
+
+        Args:
+            a (np.ndarray): First signature.
+            b (np.ndarray): Second signature.
+
+        Returns:
+            float: Difference from 0 (identical) to 255.
+        """
+        return float(cv2.absdiff(a, b).mean())
+
+    def changed(self, a: np.ndarray, b: np.ndarray) -> bool:
+        """Check whether the screen changed between two signatures.
+
+        Args:
+            a (np.ndarray): Earlier signature.
+            b (np.ndarray): Later signature.
+
+        Returns:
+            bool: True if the screen changed.
+        """
+        return self.difference(a, b) > self.change_threshold
+
+    def stable(self, a: np.ndarray, b: np.ndarray) -> bool:
+        """Check whether two signatures show the same, settled screen.
+
+        Args:
+            a (np.ndarray): Earlier signature.
+            b (np.ndarray): Later signature.
+
+        Returns:
+            bool: True if nothing meaningful moved.
+        """
+        return self.difference(a, b) < self.stable_threshold
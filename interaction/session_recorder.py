@@ -0,0 +1,233 @@
+"""Session Recorder Module.
+
+Records a live session for replay: every distinct frame goes into DIR/frames once (named by its hash) and every
+frame change, tap, swipe and match query is appended to DIR/trace.jsonl with a timestamp. All hashing and disk
+writes happen on a background thread fed by a bounded queue, if the writer falls behind events are dropped rather
+than slowing the bot down.
+
+When the recording is closed a replay script (DIR/script.json, see client/replay_device.py) is built from the trace.
+"""
+
+import cv2
+import hashlib
+import json
+import numpy as np
+import os
+import queue
+import threading
+from collections import OrderedDict
+from logging import Logger
+from typing import Any, Union  # TODO: Update Python. Union required for Python <3.10
+
+from automation.clock import Clock
+
+
+class SessionRecorder:
+    """Session Recorder Class."""
+
+    def __init__(
+        self,
+        directory: str,
+        logger: Logger,
+        queue_size: int = 256,
+        clock: Union[Clock, None] = None,
+    ) -> None:
+        """Initialize the recorder and start its writer thread.
+
+        Args:
+            directory (str): Directory to record into, created if needed.
+            logger (Logger): Logger.
+            queue_size (int, optional): Maximum events waiting to be written. Defaults to 256.
+            clock (Clock | None, optional): Clock events are timestamped with, real time if None. Defaults to None.
+        """
+        self.directory: str = directory
+        self.logger: Logger = logger
+        self.clock: Clock = clock if clock is not None else Clock()
+        self.dropped: int = 0
+        os.makedirs(os.path.join(directory, "frames"), exist_ok=True)
+
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._hashes: OrderedDict[int, str] = OrderedDict()  # frame_id to frame hash
+        self._saved: set[str] = set(
+            name[:-4] for name in os.listdir(os.path.join(directory, "frames"))
+        )
+        self._trace = open(
+            os.path.join(directory, "trace.jsonl"), "a", encoding="utf-8"
+        )
+        self._writer: threading.Thread = threading.Thread(
+            target=self._run, name="recorder", daemon=True
+        )
+        self._writer.start()
+
+    def frame(self, frame_id: int, frame: np.ndarray) -> None:
+        """Record a new frame.
+
+        Args:
+            frame_id (int): Frame id from EmulatorInteractions.
+            frame (np.ndarray): BGR frame, must not be modified afterwards.
+        """
+        self._put(("frame", self.clock.time(), frame_id, frame))
+
+    def event(self, kind: str, frame_id: int, **fields: Any) -> None:
+        """Record an input or match query against a frame.
+
+        Args:
+            kind (str): Event name, e.g. "tap", "swipe" or "match".
+            frame_id (int): Frame id the event happened on.
+            **fields (Any): JSON serialisable event details.
+        """
+        self._put((kind, self.clock.time(), frame_id, fields))
+
+    def _put(self, item: Union[tuple, None]) -> None:
+        """Queue an item for the writer without ever blocking.
+
+        Args:
+            item (tuple | None): Event, None to stop the writer.
+        """
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self) -> None:
+        """Writer thread, hashes and saves frames and appends events to the trace."""
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            kind, timestamp, frame_id, payload = item
+
+            if kind == "frame":
+                digest = hashlib.blake2b(
+                    np.ascontiguousarray(payload).data, digest_size=8
+                ).hexdigest()
+                if digest not in self._saved:
+                    if not self._save_frame(digest, payload):
+                        # Events on this frame get no frame rather than one that isn't on disk
+                        self._hashes.pop(frame_id, None)
+                        self.dropped += 1
+                        continue
+                    self._saved.add(digest)
+                self._hashes[frame_id] = digest
+                if len(self._hashes) > 64:
+                    self._hashes.popitem(last=False)
+                record = {"t": timestamp, "event": "frame", "frame": digest}
+            else:
+                record = {
+                    "t": timestamp,
+                    "event": kind,
+                    "frame": self._hashes.get(frame_id),
+                    **payload,
+                }
+
+            self._trace.write(json.dumps(record) + "\n")
+            if self._queue.empty():
+                self._trace.flush()
+
+    def _save_frame(self, digest: str, frame: np.ndarray) -> bool:
+        """Write a frame to DIR/frames.
+
+        Args:
+            digest (str): Frame hash, used as the file name.
+            frame (np.ndarray): BGR frame.
+
+        Returns:
+            bool: True if the frame was written.
+        """
+        path: str = os.path.join(self.directory, "frames", digest + ".png")
+        try:
+            # imencode + tofile rather than imwrite so non-ASCII paths work on Windows
+            encoded, data = cv2.imencode(".png", frame)
+            if not encoded:
+                raise ValueError("PNG encoding failed")
+            data.tofile(path)
+        except (cv2.error, OSError, ValueError) as e:
+            self.logger.debug("Couldn't save frame " + path + ": " + str(e))
+            return False
+        return True
+
+    def close(self) -> None:
+        """Flush everything queued, stop the writer and write the replay script."""
+        if not self._writer.is_alive():
+            return
+        self._queue.put(None)  # Blocking, everything before it gets written
+        self._writer.join()
+        self._trace.close()
+
+        with open(
+            os.path.join(self.directory, "trace.jsonl"), encoding="utf-8"
+        ) as trace:
+            script = replay_script(trace)
+        if script is not None:
+            with open(
+                os.path.join(self.directory, "script.json"), "w", encoding="utf-8"
+            ) as f:
+                json.dump(script, f, indent=1)
+
+        self.logger.info(
+            "Recording saved to "
+            + self.directory
+            + " ("
+            + str(len(self._saved))
+            + " frames, "
+            + str(self.dropped)
+            + " events dropped)"
+        )
+
+
+def replay_script(trace: Any) -> Union[dict[str, Any], None]:
+    """Build a replay script from a trace.
+
+    A frame change straight after a tap, swipe or hold becomes a tap rule on the frame it happened on, any other frame
+    change becomes a timed rule. Only the first transition seen for each frame and input is kept.
+
+    Args:
+        trace (Any): Iterable of trace.jsonl lines.
+
+    Returns:
+        dict[str, Any] | None: Script for ReplayDevice, None if no frames were recorded.
+    """
+    start: Union[str, None] = None
+    current: Union[str, None] = None
+    shown_at: float = 0.0
+    tap: Union[tuple[int, int], None] = None
+    rules: list[dict[str, Any]] = []
+    seen: set[tuple] = set()
+
+    for line in trace:
+        event = json.loads(line)
+        if event["event"] in ("tap", "swipe", "hold"):
+            tap = (
+                (event["x"], event["y"]) if "x" in event else (event["x1"], event["y1"])
+            )
+        elif event["event"] == "frame":
+            name = "frames/" + event["frame"] + ".png"
+            if name == current:
+                continue
+            if start is None:
+                start = name
+            else:
+                if tap is not None:
+                    key = (current, tap)
+                    rule = {
+                        "frame": current,
+                        "tap": [tap[0] - 5, tap[1] - 5, 10, 10],
+                        "next": name,
+                    }
+                else:
+                    key = (current, "after")
+                    rule = {
+                        "frame": current,
+                        "after": round(event["t"] - shown_at, 2),
+                        "next": name,
+                    }
+                if key not in seen:
+                    seen.add(key)
+                    rules.append(rule)
+            current = name
+            shown_at = event["t"]
+            tap = None
+
+    if start is None:
+        return None
+    return {"start": start, "rules": rules}
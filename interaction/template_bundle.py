@@ -0,0 +1,318 @@
+"""Template Bundle Module.
+
+Every template under img/ compiled into one file, img/templates.bundle, so a cold start maps a single file instead
+of looking up and decoding each PNG:
+
+    python -m interaction.template_bundle
+
+The release build runs this before PyInstaller. The file is a short header followed by the raw pixels:
+
+    8 bytes   b"AFKJTPL2"
+    8 bytes   header length, little endian
+    header    JSON: the template manifest, the size, modification time and CRC32 of every source file and, per
+              template, its shape and the offsets of its BGR and grayscale pixels
+    pixels    uint8 arrays, each starting on a 64 byte boundary
+
+Loading memory maps the file and hands out read-only numpy views of it, the OS pages pixels in as they are used.
+If any PNG or manifest.json was added, removed or edited since the bundle was built it is ignored, so editing a
+template or the manifest never needs a rebuild, in a source checkout or a release install alike. Modification
+times alone can't tell, PyInstaller and unzipping reset them, so a file whose time changed is checked by CRC32.
+Templates are stored as cv2.IMREAD_COLOR decodes them, the alpha channel is dropped the same way.
+"""
+
+import argparse
+import cv2
+import json
+import mmap
+import numpy as np
+import os
+import struct
+import sys
+import zlib
+from logging import Logger
+from typing import (
+    Any,
+    Union,  # TODO: Update Python. Union required for Python <3.10
+)
+
+from automation import utility
+
+
+class TemplateBundle:
+    """Template Bundle Class."""
+
+    FILE: str = "templates.bundle"
+    MAGIC: bytes = b"AFKJTPL2"
+    ALIGN: int = 64  # Pixel arrays start on cache line boundaries
+
+    def __init__(self, path: str) -> None:
+        """Map a bundle.
+
+        Args:
+            path (str): Path to the bundle.
+
+        Raises:
+            ValueError: The file isn't a template bundle.
+        """
+        self.path: str = path
+        with open(path, "rb") as f:
+            # The mapping stays valid after the file is closed
+            self._map: mmap.mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        prefix: int = len(self.MAGIC) + 8
+        if len(self._map) < prefix or self._map[: len(self.MAGIC)] != self.MAGIC:
+            raise ValueError(path + " is not a template bundle")
+        (length,) = struct.unpack("<Q", self._map[len(self.MAGIC) : prefix])
+        header: dict[str, Any] = json.loads(self._map[prefix : prefix + length])
+        self.manifest: dict[str, dict[str, Any]] = header["manifest"]
+        self._templates: dict[str, dict[str, Any]] = header["templates"]
+        # Source file name -> [size, modification time in ns, CRC32] when the bundle was built
+        self.sources: dict[str, list[int]] = header["sources"]
+
+    @classmethod
+    def open(cls, root: str, logger: Logger) -> Union["TemplateBundle", None]:
+        """Map the bundle in an img/ directory if there is a usable one.
+
+        Args:
+            root (str): Path to the img/ directory.
+            logger (Logger): Logger.
+
+        Returns:
+            TemplateBundle | None: The bundle, None to load the PNGs instead.
+        """
+        path: str = os.path.join(root, cls.FILE)
+        if not os.path.isfile(path):
+            return None
+        try:
+            bundle = cls(path)
+        except (OSError, ValueError, KeyError) as e:
+            logger.info("Ignoring unreadable template bundle: " + str(e))
+            return None
+
+        # Release installs ship the PNGs and manifest.json too, users may edit them there
+        changed: Union[str, None] = bundle.changed(root)
+        if changed is not None:
+            logger.info(
+                changed
+                + " changed since the template bundle was built, loading the PNGs"
+            )
+            return None
+        return bundle
+
+    def changed(self, root: str) -> Union[str, None]:
+        """Find a source file that differs from the one the bundle was built from.
+
+        Args:
+            root (str): Path to the img/ directory.
+
+        Returns:
+            str | None: Name of the first file added, removed or edited, None if the bundle is up to date.
+        """
+        sources: dict[str, str] = _sources(root)
+        for name in sorted(set(sources) ^ set(self.sources)):
+            return name
+        for name, path in sources.items():
+            size, mtime, crc = self.sources[name]
+            stat = os.stat(path)
+            if stat.st_size != size:
+                return name
+            if stat.st_mtime_ns != mtime and _crc(path) != crc:
+                return name
+        return None
+
+    def names(self) -> list[str]:
+        """Return the names of every template in the bundle.
+
+        Returns:
+            list[str]: Template names, e.g. 'buttons/confirm'.
+        """
+        return list(self._templates)
+
+    def color(self, image: str) -> np.ndarray:
+        """Get a template's BGR pixels.
+
+        Args:
+            image (str): Template name.
+
+        Returns:
+            np.ndarray: Read-only BGR array backed by the bundle.
+        """
+        entry = self._templates[image]
+        height, width = entry["shape"]
+        return self._view(entry["color"], (height, width, 3))
+
+    def gray(self, image: str) -> np.ndarray:
+        """Get a template's grayscale pixels.
+
+        Args:
+            image (str): Template name.
+
+        Returns:
+            np.ndarray: Read-only single channel array backed by the bundle.
+        """
+        entry = self._templates[image]
+        return self._view(entry["gray"], tuple(entry["shape"]))
+
+    def _view(self, offset: int, shape: tuple[int, ...]) -> np.ndarray:
+        """View part of the mapping as an array, without copying.
+
+        Args:
+            offset (int): Byte offset of the pixels.
+            shape (tuple[int, ...]): Array shape.
+
+        Returns:
+            np.ndarray: Read-only uint8 array.
+        """
+        return np.frombuffer(
+            self._map, dtype=np.uint8, count=int(np.prod(shape)), offset=offset
+        ).reshape(shape)
+
+    @classmethod
+    def compile(cls, root: str, path: str) -> int:
+        """Decode every template under img/ and write them with the manifest into a bundle.
+
+        Args:
+            root (str): Path to the img/ directory.
+            path (str): Bundle to write.
+
+        Returns:
+            int: Number of templates compiled.
+        """
+        manifest: dict[str, dict[str, Any]] = {}
+        sources: dict[str, list[int]] = {}
+        for name, file in _sources(root).items():
+            stat = os.stat(file)
+            sources[name] = [stat.st_size, stat.st_mtime_ns, _crc(file)]
+        if "manifest" in sources:
+            with open(os.path.join(root, "manifest.json"), encoding="utf-8") as f:
+                manifest = json.load(f)
+
+        pixels: list[np.ndarray] = []
+        templates: dict[str, dict[str, Any]] = {}
+        offset: int = 0  # From the start of the pixel section
+        for image in sorted(set(sources) - {"manifest"}):
+            file = os.path.join(root, *image.split("/")) + ".png"
+            # np.fromfile + imdecode rather than imread so non-ASCII install paths work on Windows
+            color = cv2.imdecode(np.fromfile(file, dtype=np.uint8), cv2.IMREAD_COLOR)
+            if color is None:
+                raise IOError("Failed to decode template " + file)
+            gray = cv2.cvtColor(color, cv2.COLOR_BGR2GRAY)
+
+            entry: dict[str, Any] = {"shape": list(gray.shape)}
+            for mode, array in (("color", color), ("gray", gray)):
+                entry[mode] = offset
+                pixels.append(np.ascontiguousarray(array))
+                offset = _aligned(offset + array.nbytes, cls.ALIGN)
+            templates[image] = entry
+
+        # Offsets in the header are absolute, so they depend on the header's own length. That only changes with the
+        # offsets' digits, so it settles after a pass or two.
+        start: int = 0
+        while True:
+            header = json.dumps(
+                {
+                    "manifest": manifest,
+                    "sources": sources,
+                    "templates": {
+                        image: {
+                            "shape": entry["shape"],
+                            "color": start + entry["color"],
+                            "gray": start + entry["gray"],
+                        }
+                        for image, entry in templates.items()
+                    },
+                },
+                separators=(",", ":"),
+            ).encode("utf-8")
+            end: int = _aligned(len(cls.MAGIC) + 8 + len(header), cls.ALIGN)
+            if end == start:
+                break
+            start = end
+
+        with open(path + ".tmp", "wb") as f:
+            f.write(cls.MAGIC + struct.pack("<Q", len(header)) + header)
+            for array in pixels:
+                f.write(b"\0" * (_aligned(f.tell(), cls.ALIGN) - f.tell()))
+                f.write(array.tobytes())
+        os.replace(path + ".tmp", path)  # Never leave a half written bundle behind
+        return len(templates)
+
+
+def _sources(root: str) -> dict[str, str]:
+    """List the files a bundle is compiled from.
+
+    Args:
+        root (str): Path to the img/ directory.
+
+    Returns:
+        dict[str, str]: Template names, plus 'manifest' if there is one, to path.
+    """
+    sources: dict[str, str] = {}
+    for directory, _, files in os.walk(root):
+        for file in files:
+            path = os.path.join(directory, file)
+            if file.endswith(".png"):
+                name = os.path.relpath(path, root)[: -len(".png")]
+                sources[name.replace(os.sep, "/")] = path
+            elif file == "manifest.json" and directory == root:
+                sources["manifest"] = path
+    return sources
+
+
+def _crc(path: str) -> int:
+    """CRC32 of a file's contents.
+
+    Args:
+        path (str): File path.
+
+    Returns:
+        int: CRC32.
+    """
+    with open(path, "rb") as f:
+        return zlib.crc32(f.read())
+
+
+def _aligned(offset: int, alignment: int) -> int:
+    """Round an offset up to a multiple of the alignment.
+
+    Args:
+        offset (int): Byte offset.
+        alignment (int): Alignment in bytes.
+
+    Returns:
+        int: Aligned offset.
+    """
+    return -(-offset // alignment) * alignment
+
+
+def main() -> int:
+    """Compile the template bundle from the command line.
+
+    Returns:
+        int: Exit code.
+    """
+    logger: Logger = utility.init_logging()
+    cwd: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    parser = argparse.ArgumentParser(description="Compile img/ into a template bundle")
+    parser.add_argument("--root", default=os.path.join(cwd, "img"), help="img/ path")
+    parser.add_argument(
+        "--output", help="Bundle to write, defaults to ROOT/" + TemplateBundle.FILE
+    )
+    args = parser.parse_args()
+
+    output: str = args.output or os.path.join(args.root, TemplateBundle.FILE)
+    count: int = TemplateBundle.compile(args.root, output)
+    logger.info(
+        "Compiled "
+        + str(count)
+        + " templates into "
+        + output
+        + " ("
+        + str(round(os.path.getsize(output) / 1024))
+        + " KB)"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,235 @@
+"""Template Manifest Module.
+
+Default search settings per template, kept in img/manifest.json so detection can be tuned in one place:
+
+    {
+        "buttons/main_menu": {"region": "main_menu"},
+        "towers/lvl": {"region": [15, 850, 1050, 800], "grayscale": true},
+        "teamup/join": {"region": "chat_window", "confidence": 0.8}
+    }
+
+'region' is X, Y, width, height in 1080x1920 coordinates or the name of one of the game metadata regions,
+'confidence' the match threshold, 'grayscale' the colour mode and 'scale' the size the template was captured at
+relative to 1080x1920 (e.g. 0.5 for a template cut from a 540x960 screenshot). 'fixed' marks a template that only
+ever shows in one place, so the location index may search around where it was last found first. Never set it on
+anything that appears in lists or is looked for with locate_all, click_last or return_xy. Lookups default these arguments
+to None, a manifest value is used only for those left as None and anything passed explicitly wins, even if it is
+the same as the global default.
+"""
+
+import json
+import os
+from logging import Logger
+from typing import (
+    Any,
+    Iterable,
+    Union,  # TODO: Update Python. Union required for Python <3.10
+)
+
+from interaction.template_registry import TemplateRegistry
+
+
+class TemplateManifest:
+    """Template Manifest Class."""
+
+    FIELDS: tuple[str, ...] = ("region", "confidence", "grayscale", "scale", "fixed")
+    FULL_FRAME: tuple[int, int, int, int] = (0, 0, 1080, 1920)
+    DEFAULT_CONFIDENCE: float = 0.9
+
+    def __init__(
+        self,
+        path: str,
+        logger: Logger,
+        entries: Union[dict[str, dict[str, Any]], None] = None,
+    ) -> None:
+        """Initialize the manifest, loading it from disk if it exists.
+
+        Args:
+            path (str): Path to manifest.json.
+            logger (Logger): Logger.
+            entries (dict[str, dict[str, Any]] | None, optional): Entries already loaded, e.g. from the template
+                                                                  bundle, path isn't read then. Defaults to None.
+        """
+        self.path: str = path
+        self.logger: Logger = logger
+        self.entries: dict[str, dict[str, Any]] = dict(entries or {})
+        # Named regions entries can use, set from the game metadata
+        self.regions: dict[str, tuple[int, int, int, int]] = {}
+
+        if entries is None and os.path.isfile(path):
+            try:
+                with open(path, encoding="utf-8") as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError) as e:
+                self.logger.info("Ignoring unreadable template manifest: " + str(e))
+
+    def scales(self) -> dict[str, float]:
+        """Return the capture scale of every template that wasn't cut from a 1080x1920 screenshot.
+
+        Returns:
+            dict[str, float]: Template name to scale.
+        """
+        return {
+            image: entry["scale"]
+            for image, entry in self.entries.items()
+            if isinstance(entry.get("scale"), (int, float)) and entry["scale"] > 0
+        }
+
+    def fixed(self, image: str) -> bool:
+        """Check if a template is marked as always showing in the same place.
+
+        Args:
+            image (str): Template name.
+
+        Returns:
+            bool: True if the location index may be used for it.
+        """
+        return self.entries.get(image, {}).get("fixed", False) is True
+
+    def region(self, value: Union[str, list[int]]) -> tuple[int, int, int, int]:
+        """Resolve a manifest region.
+
+        Args:
+            value (str | list[int]): Region name or X, Y, width, height.
+
+        Returns:
+            tuple[int, int, int, int]: X, Y, width, height.
+        """
+        if isinstance(value, str):
+            return tuple(self.regions[value])
+        return tuple(value)
+
+    def apply(
+        self,
+        image: str,
+        confidence: Union[float, None],
+        grayscale: Union[bool, None],
+        region: Union[tuple[int, int, int, int], None],
+    ) -> tuple[float, bool, tuple[int, int, int, int]]:
+        """Fill in a template's defaults for the arguments a lookup left as None.
+
+        Args:
+            image (str): Template name.
+            confidence (float | None): Confidence passed by the caller.
+            grayscale (bool | None): Grayscale passed by the caller.
+            region (tuple[int, int, int, int] | None): Region passed by the caller.
+
+        Returns:
+            tuple[float, bool, tuple[int, int, int, int]]: Confidence, grayscale and region to search with.
+        """
+        entry = self.entries.get(image, {})
+        if confidence is None:
+            confidence = entry.get("confidence")
+        if grayscale is None:
+            grayscale = entry.get("grayscale")
+        if region is None and "region" in entry:
+            region = self.region(entry["region"])
+        return self.defaults(confidence, grayscale, region)
+
+    def defaults(
+        self,
+        confidence: Union[float, None],
+        grayscale: Union[bool, None],
+        region: Union[tuple[int, int, int, int], None],
+    ) -> tuple[float, bool, tuple[int, int, int, int]]:
+        """Fill in the global defaults, 0.9 confidence in colour over the full frame, for arguments left as None.
+
+        Args:
+            confidence (float | None): Confidence passed by the caller.
+            grayscale (bool | None): Grayscale passed by the caller.
+            region (tuple[int, int, int, int] | None): Region passed by the caller.
+
+        Returns:
+            tuple[float, bool, tuple[int, int, int, int]]: Confidence, grayscale and region to search with.
+        """
+        return (
+            confidence if confidence is not None else self.DEFAULT_CONFIDENCE,
+            grayscale if grayscale is not None else False,
+            tuple(region) if region is not None else self.FULL_FRAME,
+        )
+
+    def validate(
+        self, registry: TemplateRegistry, referenced: Iterable[str] = ()
+    ) -> list[str]:
+        """Check the templates and the manifest, dropping any entry that is wrong so it can't break a lookup.
+
+        Args:
+            registry (TemplateRegistry): Preloaded templates.
+            referenced (Iterable[str], optional): Template names the game metadata refers to. Defaults to ().
+
+        Returns:
+            list[str]: One line per problem, empty if everything is fine.
+        """
+        names: set[str] = set(registry.names())
+        problems: list[str] = [
+            image + " is referenced but not in img/"
+            for image in sorted(set(referenced) - names)
+        ]
+
+        for image in sorted(names):
+            height, width = registry.get(image).shape[:2]
+            if width > self.FULL_FRAME[2] or height > self.FULL_FRAME[3]:
+                problems.append(image + " is larger than the screen")
+
+        for image, entry in sorted(self.entries.items()):
+            problem = self._check(image, entry, registry, names)
+            if problem is not None:
+                problems.append(image + " in manifest.json " + problem)
+                del self.entries[image]
+        return problems
+
+    def _check(
+        self,
+        image: str,
+        entry: Any,
+        registry: TemplateRegistry,
+        names: set[str],
+    ) -> Union[str, None]:
+        """Check one manifest entry.
+
+        Args:
+            image (str): Template name.
+            entry (Any): Its entry.
+            registry (TemplateRegistry): Preloaded templates.
+            names (set[str]): Names of every template.
+
+        Returns:
+            str | None: What is wrong, None if nothing.
+        """
+        if image not in names:
+            return "is not in img/"
+        if not isinstance(entry, dict):
+            return "is not an object"
+        unknown = sorted(set(entry) - set(self.FIELDS))
+        if unknown:
+            return "has unknown fields " + ", ".join(unknown)
+
+        confidence = entry.get("confidence", self.DEFAULT_CONFIDENCE)
+        if not isinstance(confidence, (int, float)) or not 0 < confidence <= 1:
+            return "confidence must be above 0 and at most 1"
+        if not isinstance(entry.get("grayscale", False), bool):
+            return "grayscale must be true or false"
+        if not isinstance(entry.get("fixed", False), bool):
+            return "fixed must be true or false"
+        scale = entry.get("scale", 1.0)
+        if not isinstance(scale, (int, float)) or scale <= 0:
+            return "scale must be above 0"
+
+        region = entry.get("region", list(self.FULL_FRAME))
+        if isinstance(region, str):
+            if region not in self.regions:
+                return "names unknown region " + region
+        elif (
+            not isinstance(region, list)
+            or len(region) != 4
+            or not all(isinstance(value, int) for value in region)
+        ):
+            return "region must be a region name or [X, Y, width, height]"
+        x, y, w, h = self.region(region)
+        if x < 0 or y < 0 or x + w > self.FULL_FRAME[2] or y + h > self.FULL_FRAME[3]:
+            return "region is off the screen"
+
+        height, width = registry.get(image).shape[:2]
+        if width > w or height > h:
+            return "template doesn't fit its region"
+        return None
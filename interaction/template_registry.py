@@ -0,0 +1,188 @@
+"""Template Registry Module."""
+
+import cv2
+import numpy as np
+import os
+import time
+from logging import Logger
+from typing import Union  # TODO: Update Python. Union required for Python <3.10
+
+from interaction.template_bundle import TemplateBundle
+
+
+class TemplateRegistry:
+    """Template Registry Class.
+
+    Decodes every template under img/ once and hands out ready-to-match BGR and grayscale arrays,
+    so the polling loops never go back to disk for a PNG. With a compiled bundle nothing is decoded at all.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        logger: Logger,
+        capture_scales: Union[dict[str, float], None] = None,
+        bundle: Union[TemplateBundle, None] = None,
+    ) -> None:
+        """Initialize the registry.
+
+        Args:
+            root (str): Path to the img/ directory.
+            logger (Logger): Logger.
+            capture_scales (dict[str, float] | None, optional): Templates not cut from 1080x1920 screenshots and the
+                                                              scale they were, from the template manifest.
+                                                              Defaults to None.
+            bundle (TemplateBundle | None, optional): Compiled templates to preload from instead of the PNGs.
+                                                      Defaults to None.
+        """
+        self.root: str = root
+        self.logger: Logger = logger
+        self.hits: int = 0  # Lookups served from memory
+        self.misses: int = 0  # Lookups that had to decode from disk
+        self.scale: tuple[float, float] = (1.0, 1.0)  # X, Y factor from 1080x1920
+        self.capture_scales: dict[str, float] = capture_scales or {}
+        self.bundle: Union[TemplateBundle, None] = bundle
+        self._original: dict[str, np.ndarray] = {}  # As decoded
+        self._color: dict[str, np.ndarray] = {}
+        self._gray: dict[str, np.ndarray] = {}
+
+    def preload(self) -> int:
+        """Decode every .png under the root directory, or map them all from the bundle if there is one.
+
+        Returns:
+            int: Number of templates loaded.
+        """
+        start: float = time.perf_counter()
+
+        if self.bundle is not None:
+            for image in self.bundle.names():
+                self._original[image] = self.bundle.color(image)
+                self._store(image, self._original[image], self.bundle.gray(image))
+        else:
+            self._walk()
+
+        self.logger.debug(
+            "Preloaded "
+            + str(len(self._color))
+            + " templates"
+            + (" from the bundle" if self.bundle is not None else "")
+            + " in "
+            + str(round((time.perf_counter() - start) * 1000))
+            + "ms"
+        )
+        return len(self._color)
+
+    def _walk(self) -> None:
+        """Decode every .png under the root directory."""
+        for directory, _, files in os.walk(self.root):
+            for file in files:
+                if not file.endswith(".png"):
+                    continue
+                path = os.path.join(directory, file)
+                # Templates are keyed the same way the automation refers to them, i.e. 'buttons/confirm'
+                name = os.path.relpath(path, self.root)[: -len(".png")]
+                self._load(name.replace(os.sep, "/"))
+
+    def get(self, image: str, grayscale: bool = False) -> np.ndarray:
+        """Return a template as a numpy array, decoding it from disk only if it wasn't preloaded.
+
+        Args:
+            image (str): Template name relative to img/ without extension, e.g. 'buttons/confirm'.
+            grayscale (bool, optional): Return the grayscale variant. Defaults to False.
+
+        Returns:
+            np.ndarray: BGR array, or single channel array if grayscale.
+        """
+        if image in self._color:
+            self.hits += 1
+        else:
+            self.misses += 1
+            self.logger.debug("Template " + image + " not preloaded, reading from disk")
+            self._load(image)
+
+        return self._gray[image] if grayscale else self._color[image]
+
+    def rescale(self, scale: tuple[float, float]) -> None:
+        """Resize every template once to match frames that aren't 1080x1920, instead of resizing each frame.
+
+        Args:
+            scale (tuple[float, float]): X, Y factor from 1080x1920 to the frame resolution.
+        """
+        if scale == self.scale:
+            return
+        start: float = time.perf_counter()
+        self.scale = scale
+        for image, color in self._original.items():
+            self._store(image, color)
+
+        self.logger.debug(
+            "Rescaled "
+            + str(len(self._original))
+            + " templates by "
+            + str(scale)
+            + " in "
+            + str(round((time.perf_counter() - start) * 1000))
+            + "ms"
+        )
+
+    def names(self) -> list[str]:
+        """Return the names of every loaded template.
+
+        Returns:
+            list[str]: Template names, e.g. 'buttons/confirm'.
+        """
+        return list(self._color)
+
+    def stats(self) -> dict[str, int]:
+        """Return registry counters.
+
+        Returns:
+            dict[str, int]: Loaded template count, hits and misses.
+        """
+        return {"templates": len(self._color), "hits": self.hits, "misses": self.misses}
+
+    def _load(self, image: str) -> None:
+        """Decode a template into both colour modes.
+
+        Args:
+            image (str): Template name relative to img/ without extension.
+        """
+        path = os.path.join(self.root, *image.split("/")) + ".png"
+        # np.fromfile + imdecode rather than imread so non-ASCII install paths work on Windows
+        color = cv2.imdecode(np.fromfile(path, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if color is None:
+            raise IOError("Failed to decode template " + path)
+
+        self._original[image] = color
+        self._store(image, color)
+
+    def _store(
+        self, image: str, color: np.ndarray, gray: Union[np.ndarray, None] = None
+    ) -> None:
+        """Scale a decoded template to the current scale and keep both colour modes.
+
+        Args:
+            image (str): Template name relative to img/ without extension.
+            color (np.ndarray): BGR template as captured.
+            gray (np.ndarray | None, optional): Its grayscale, used if no scaling is needed. Defaults to None.
+        """
+        capture: float = self.capture_scales.get(image, 1.0)
+        x_scale, y_scale = self.scale[0] / capture, self.scale[1] / capture
+        if (x_scale, y_scale) != (1.0, 1.0):
+            color = cv2.resize(
+                color,
+                (
+                    max(1, round(color.shape[1] * x_scale)),
+                    max(1, round(color.shape[0] * y_scale)),
+                ),
+                # Area averaging when shrinking keeps thin edges, linear when growing
+                interpolation=(
+                    cv2.INTER_AREA if x_scale < 1 and y_scale < 1 else cv2.INTER_LINEAR
+                ),
+            )
+            gray = None
+
+        self._color[image] = color
+        self._gray[image] = (
+            gray if gray is not None else cv2.cvtColor(color, cv2.COLOR_BGR2GRAY)
+        )
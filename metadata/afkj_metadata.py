@@ -1,8 +1,6 @@
 """AFK Journey Metadata."""
 
-import time
 from datetime import datetime, timezone
-from typing import Union  # TODO: Update Python. Union required for Python <3.10
 
 
 class AFKJMetadata:
@@ -16,8 +14,8 @@ class AFKJMetadata:
         """
         self.server: str = server  # Call setter
 
-        self._last_corrupt: Union[float, None] = None
-        self._last_synergy: Union[float, None] = None
+        self._last_corrupt: float = 0.0  # 0 means never
+        self._last_synergy: float = 0.0
         self.current_time_utc: datetime = datetime.now(timezone.utc)
         self.first_stage_won: bool = False
         self.formation: int = 1
@@ -52,33 +50,96 @@ class AFKJMetadata:
             "x3_and_skip": (720, 1450, 350, 110),
         }
 
+        # Anchor templates (template, region, confidence) that identify each screen for the scene classifier.
+        # Checked in order so popups and overlays come before the screens they sit on top of
+        self.scenes: dict[str, list[tuple[str, tuple[int, int, int, int], float]]] = {
+            "battle_result": [
+                ("labels/tap_to_close", self.regions["bottom_buttons"], 0.8),
+                ("buttons/retry", self.regions["bottom_buttons"], 0.9),
+                ("buttons/next", self.regions["bottom_buttons"], 0.9),
+            ],
+            "teamup_lobby": [
+                ("teamup/ready", self.regions["bottom_buttons"], 0.9),
+                ("teamup/quit", self.regions["bottom_buttons"], 0.9),
+            ],
+            "main_map": [
+                ("labels/sunandstars", self.regions["sunandstars"], 0.9),
+                ("labels/guild", (730, 1880, 80, 25), 0.8),
+            ],
+            "battle_modes": [("labels/battle_modes", (0, 0, 1080, 1920), 0.9)],
+            "arena": [("buttons/challenge", self.regions["bottom_buttons"], 0.8)],
+            "formation": [("buttons/records", self.regions["bottom_buttons"], 0.9)],
+            "teamup_chat": [("teamup/teamup", self.regions["chat_selection"], 0.9)],
+            "duras_trials": [
+                ("buttons/featured_heroes", self.regions["top_third"], 0.9)
+            ],
+            "dream_realm": [("buttons/dr_rewards", self.regions["top_third"], 0.9)],
+            "afk_rewards": [("labels/afk_rewards_coe", (0, 680, 150, 200), 0.9)],
+            "daily_quests": [("labels/daily_quests", (0, 0, 1080, 1920), 0.9)],
+            "mail": [("labels/mail", (0, 0, 1080, 1920), 0.9)],
+            "friends": [("labels/friends", (0, 0, 1080, 1920), 0.9)],
+            "emporium_guild": [
+                ("labels/emporium_guild", self.regions["top_third"], 0.9)
+            ],
+        }
+
+        # Navigation graph between scenes, scene: {next scene: (images, where)}. The first of the images found in the
+        # 'where' region is pressed, if there are no images 'where' is tapped as X, Y
+        back: tuple[list[str], tuple[int, int, int, int]] = (
+            ["buttons/back", "buttons/back2"],
+            self.regions["back"],
+        )
+        self.routes: dict[str, dict[str, tuple[list[str], tuple[int, ...]]]] = {
+            "main_map": {"battle_modes": ([], (450, 1825))},
+            "battle_modes": {
+                "main_map": back,
+                "arena": (["buttons/arena"], self.regions["battle_modes"]),
+                "dream_realm": (["buttons/dream_realm"], self.regions["battle_modes"]),
+                "duras_trials": (
+                    ["buttons/duras_trials"],
+                    self.regions["battle_modes"],
+                ),
+            },
+            "arena": {"battle_modes": back},
+            "dream_realm": {"battle_modes": back},
+            "duras_trials": {"battle_modes": back},
+        }
+
     @property
-    def last_synergy(self) -> Union[float, None]:
+    def last_synergy(self) -> float:
         """Get last_synergy time.
 
         Returns:
-            float | None: Time of last synergy battle request.
+            float: Time of last synergy battle request, 0 if there hasn't been one.
         """
         return self._last_synergy
 
     @last_synergy.setter
-    def last_synergy(self) -> None:
-        """Set last_synergy time."""
-        self._last_synergy = time.time() - 300
+    def last_synergy(self, value: float) -> None:
+        """Set last_synergy time.
+
+        Args:
+            value (float): Time of the synergy battle request, from the bot's clock.
+        """
+        self._last_synergy = value
 
     @property
-    def last_corrupt(self) -> Union[float, None]:
+    def last_corrupt(self) -> float:
         """Get last_corrupt time.
 
         Returns:
-            float | None: Time of last corrupt creature battle request.
+            float: Time of last corrupt creature battle request, 0 if there hasn't been one.
         """
         return self._last_corrupt
 
     @last_corrupt.setter
-    def last_corrupt(self) -> None:
-        """Set last_corrupt time."""
-        self._last_corrupt = time.time()
+    def last_corrupt(self, value: float) -> None:
+        """Set last_corrupt time.
+
+        Args:
+            value (float): Time of the corrupt creature battle request, from the bot's clock.
+        """
+        self._last_corrupt = value
 
     @property
     def server(self) -> str: